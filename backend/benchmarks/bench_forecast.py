@@ -0,0 +1,68 @@
+"""
+Micro-benchmark of the forecast transformation: original two-pass strptime/strftime pipeline
+versus the single-pass WeatherDataMixin.iter_forecast_info.
+
+    python -m benchmarks.bench_forecast --number 2000
+"""
+import argparse
+import os
+import timeit
+from datetime import datetime, timedelta
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'weather_config.settings')
+django.setup()
+
+from benchmarks.mock_upstream import forecast_payload  # noqa: E402
+from weather_api.views import WeatherDataMixin  # noqa: E402
+
+
+def minimal_payload(entries=40):
+    """ Only the fields the transform reads """
+    payload = forecast_payload(entries=entries)
+    payload['list'] = [
+        {'dt': entry['dt'], 'dt_txt': entry['dt_txt'], 'main': {'temp': entry['main']['temp']},
+         'weather': [{'description': entry['weather'][0]['description']}]}
+        for entry in payload['list']
+    ]
+    return payload
+
+
+def legacy_pipeline(data):
+    """ The transformation as it was before the single-pass rewrite """
+    city_name, country = data['city']['name'], data['city']['country']
+    forecast_info = []
+    for entry in data['list']:
+        formatted_date = datetime.strptime(entry['dt_txt'], '%Y-%m-%d %H:%M:%S')
+        forecast_info.append({
+            'time': formatted_date.strftime('%H:%M'),
+            'country': country,
+            'city': city_name,
+            'temperature': entry['main']['temp'],
+            'description': entry['weather'][0]['description'],
+            'datetime': formatted_date.strftime('%d %B %Y'),
+        })
+    return [entry for entry in forecast_info if
+            datetime.strptime(entry['datetime'], '%d %B %Y') <= datetime.now() + timedelta(days=7)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--number', type=int, default=2000, help='transformations per measurement')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    payloads = {
+        '40-entry (minimal fields)': minimal_payload(),
+        '5-day/3-hour (full payload)': forecast_payload(),
+    }
+    for name, payload in payloads.items():
+        assert WeatherDataMixin.get_next_7_days_forecast(payload) == legacy_pipeline(payload)
+        for label, func in (('legacy', legacy_pipeline), ('single-pass', WeatherDataMixin.get_next_7_days_forecast)):
+            best = min(timeit.repeat(lambda: func(payload), number=args.number, repeat=args.repeat))
+            print(f'{name:<28} {label:<12} {best / args.number * 1e6:>8.1f} us/transform')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark of JSON encoding and decoding on forecast-size payloads: DRF's JSONRenderer and
+JSONParser versus the orjson-backed FastJSONRenderer and FastJSONParser, plus decoding of the
+raw upstream forecast body.
+
+    python -m benchmarks.bench_json --number 2000
+"""
+import argparse
+import io
+import json
+import os
+import timeit
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'weather_config.settings')
+django.setup()
+
+from rest_framework.parsers import JSONParser  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from benchmarks.mock_upstream import forecast_payload  # noqa: E402
+from weather_api import fastjson  # noqa: E402
+from weather_api.parsers import FastJSONParser  # noqa: E402
+from weather_api.renderers import FastJSONRenderer  # noqa: E402
+from weather_api.views import WeatherDataMixin  # noqa: E402
+
+
+def forecast_response(entries):
+    """ The body of /api/weather/forecast/ for one city """
+    data = forecast_payload(entries=entries)
+    return {'next_7_days_forecast': WeatherDataMixin.extract_forecast_info(data, 'London', 'GB')}
+
+
+def measure(label, func, number, repeat):
+    best = min(timeit.repeat(func, number=number, repeat=repeat))
+    print(f'  {label:<36} {best / number * 1e6:>8.1f} us')
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--entries', type=int, nargs='+', default=[40, 400], help='3-hourly entries per forecast')
+    parser.add_argument('--number', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    if not fastjson.HAS_ORJSON:
+        print('orjson is not installed: the fast classes fall back to the stdlib and should match DRF')
+
+    for entries in args.entries:
+        response = forecast_response(entries)
+        upstream_body = json.dumps(forecast_payload(entries=entries)).encode('utf-8')
+        request_body = JSONRenderer().render(response)
+        assert json.loads(FastJSONRenderer().render(response)) == json.loads(request_body)
+        print(f'{entries} entries: response {len(request_body)} bytes, upstream body {len(upstream_body)} bytes')
+
+        drf = measure('render  JSONRenderer', lambda: JSONRenderer().render(response), args.number, args.repeat)
+        fast = measure('render  FastJSONRenderer', lambda: FastJSONRenderer().render(response), args.number,
+                       args.repeat)
+        print(f'  {"speedup":<36} {drf / fast:>8.1f} x')
+
+        drf = measure('parse   JSONParser', lambda: JSONParser().parse(io.BytesIO(request_body)), args.number,
+                      args.repeat)
+        fast = measure('parse   FastJSONParser', lambda: FastJSONParser().parse(io.BytesIO(request_body)),
+                       args.number, args.repeat)
+        print(f'  {"speedup":<36} {drf / fast:>8.1f} x')
+
+        drf = measure('decode  upstream json.loads', lambda: json.loads(upstream_body), args.number, args.repeat)
+        fast = measure('decode  upstream fastjson.loads', lambda: fastjson.loads(upstream_body), args.number,
+                       args.repeat)
+        print(f'  {"speedup":<36} {drf / fast:>8.1f} x')
+
+
+if __name__ == '__main__':
+    main()
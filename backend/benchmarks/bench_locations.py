@@ -0,0 +1,84 @@
+"""
+Latency of location autocomplete lookups, per keystroke prefix, against the bundled city list and
+a synthetic larger list, loaded from CSV and from the packed memory-mapped index.
+
+    python -m benchmarks.bench_locations --synthetic 50000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'weather_config.settings')
+django.setup()
+
+from django.conf import settings  # noqa: E402
+
+from weather_api.locations import LocationIndex, load_csv, write_packed  # noqa: E402
+
+
+def write_synthetic_csv(path, rows, seed=7):
+    """ A city list of random pronounceable names with a long-tailed population """
+    generator = random.Random(seed)
+    syllables = ['ba', 'ro', 'san', 'ta', 'mi', 'lon', 'do', 'ka', 'ri', 'ne', 'po', 'ver', 'al', 'gu', 'sho']
+    with open(path, 'w', encoding='utf-8') as cities_file:
+        cities_file.write('name,country,latitude,longitude,population\n')
+        for _ in range(rows):
+            name = ''.join(generator.choice(syllables) for _ in range(generator.randint(2, 4))).title()
+            cities_file.write(f'{name},{generator.choice(["US", "GB", "DE", "BR", "IN"])},'
+                              f'{generator.uniform(-60, 70):.4f},{generator.uniform(-180, 180):.4f},'
+                              f'{int(generator.paretovariate(1.2) * 1000)}\n')
+
+
+def keystrokes(index, words=300, seed=11):
+    """ Every prefix a user types on the way to a known city name, plus some typos """
+    generator = random.Random(seed)
+    prefixes = []
+    for _ in range(words):
+        name = index.table['keys'][generator.randrange(len(index))].decode('utf-8')
+        prefixes += [name[:length] for length in range(1, len(name) + 1)]
+        if len(name) > 4:
+            prefixes.append(name[:2] + name[3] + name[2] + name[4:])
+    return prefixes
+
+
+def measure(index, prefixes, limit):
+    index.complete('warm up', limit)
+    timings = []
+    for prefix in prefixes:
+        started = time.perf_counter()
+        index.complete(prefix, limit)
+        timings.append((time.perf_counter() - started) * 1e6)
+    timings.sort()
+    return (statistics.median(timings), timings[int(len(timings) * 0.99) - 1], timings[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--synthetic', type=int, default=50000, help='rows of the synthetic city list')
+    parser.add_argument('--limit', type=int, default=10)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        sources = {'bundled': settings.WEATHER_LOCATIONS_FILE}
+        if args.synthetic:
+            sources[f'synthetic {args.synthetic}'] = os.path.join(directory, 'synthetic.csv')
+            write_synthetic_csv(sources[f'synthetic {args.synthetic}'], args.synthetic)
+
+        for name, path in sources.items():
+            packed_path = os.path.join(directory, f'{len(name)}.idx')
+            write_packed(load_csv(path), packed_path)
+            for label, index_path in (('csv', path), ('packed', packed_path)):
+                index = LocationIndex(path=index_path)
+                prefixes = keystrokes(index)
+                p50, p99, worst = measure(index, prefixes, args.limit)
+                print(f'{name:<16} {label:<7} {len(prefixes):>5} lookups  '
+                      f'p50 {p50:>7.1f} us  p99 {p99:>7.1f} us  max {worst:>8.1f} us')
+
+
+if __name__ == '__main__':
+    main()
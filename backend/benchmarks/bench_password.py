@@ -0,0 +1,112 @@
+"""
+Benchmark of the password hashing cost of a login: encode and verify time per hasher and PBKDF2
+iteration count, then a burst of concurrent logins hashed on the request threads versus on the
+clients.hashers process pool, with the latency of light requests served meanwhile.
+
+    python -m benchmarks.bench_password --iterations 600000 260000 --logins 32 --threads 8
+"""
+import argparse
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'weather_config.settings')
+django.setup()
+
+from django.contrib.auth import hashers as django_hashers  # noqa: E402
+from django.test import override_settings  # noqa: E402
+
+from benchmarks.bench_json import forecast_response  # noqa: E402
+from clients import hashers  # noqa: E402
+from weather_api.renderers import FastJSONRenderer  # noqa: E402
+
+PASSWORD = 'correct horse battery staple'
+
+
+def login_cost(hasher, number):
+    """ Best encode and verify times in milliseconds """
+    encoded = hasher.encode(PASSWORD, hasher.salt())
+    encode = verify = float('inf')
+    for _ in range(number):
+        start = time.perf_counter()
+        hasher.encode(PASSWORD, hasher.salt())
+        encode = min(encode, time.perf_counter() - start)
+        start = time.perf_counter()
+        hasher.verify(PASSWORD, encoded)
+        verify = min(verify, time.perf_counter() - start)
+    return encode * 1000, verify * 1000
+
+
+def available_hashers(iterations):
+    for count in iterations:
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=count):
+            yield f'pbkdf2_sha256 ({count} iterations)', hashers.PBKDF2PasswordHasher()
+    yield 'scrypt', django_hashers.ScryptPasswordHasher()
+    for name, hasher in (('argon2', django_hashers.Argon2PasswordHasher()),
+                         ('bcrypt_sha256', django_hashers.BCryptSHA256PasswordHasher())):
+        try:
+            hasher._load_library()
+        except ValueError:
+            print(f'  {name:<36} not installed')
+            continue
+        yield name, hasher
+
+
+def burst(logins, threads, encoded, light_interval):
+    """ Verify `logins` passwords from `threads` threads while timing light requests on another thread """
+    response = forecast_response(40)
+    light = []
+    done = threading.Event()
+
+    def serve_light_requests():
+        while not done.is_set():
+            start = time.perf_counter()
+            FastJSONRenderer().render(response)
+            light.append(time.perf_counter() - start)
+            time.sleep(light_interval)
+
+    watcher = threading.Thread(target=serve_light_requests)
+    watcher.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        assert all(pool.map(lambda _: hashers.check_password(PASSWORD, encoded), range(logins)))
+    elapsed = time.perf_counter() - start
+    done.set()
+    watcher.join()
+    light.sort()
+    return logins / elapsed, statistics.median(light) * 1000, light[int(len(light) * 0.99)] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, nargs='+', default=[600000, 260000, 100000],
+                        help='PBKDF2 iteration counts to compare')
+    parser.add_argument('--number', type=int, default=3)
+    parser.add_argument('--logins', type=int, default=32, help='logins per burst')
+    parser.add_argument('--threads', type=int, default=8, help='request threads in the burst')
+    parser.add_argument('--workers', type=int, nargs='+', default=[2, os.cpu_count() or 1],
+                        help='process pool sizes to compare with hashing on the request threads')
+    args = parser.parse_args()
+
+    print('cost per login (best of %d)' % args.number)
+    for label, hasher in available_hashers(args.iterations):
+        encode, verify = login_cost(hasher, args.number)
+        print(f'  {label:<36} encode {encode:>7.1f} ms   verify {verify:>7.1f} ms')
+
+    encoded = django_hashers.make_password(PASSWORD)
+    print(f'\nburst of {args.logins} logins from {args.threads} threads ({encoded.rsplit("$", 2)[0]})')
+    for workers in [0] + sorted(set(args.workers)):
+        with override_settings(PASSWORD_HASH_WORKERS=workers):
+            hashers.check_password(PASSWORD, encoded)  # start the pool outside the measurement
+            rate, median, p99 = burst(args.logins, args.threads, encoded, light_interval=0.005)
+            hashers.shutdown_executor()
+        label = 'request threads' if not workers else f'process pool, {workers} workers'
+        print(f'  {label:<36} {rate:>6.1f} logins/s   light request p50 {median:>6.2f} ms   p99 {p99:>6.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,48 @@
+"""
+Benchmark of the daily forecast summaries: pure-Python grouping versus the NumPy columnar
+reduction, over batches of city forecasts.
+
+    python -m benchmarks.bench_summary --cities 1000 10000
+"""
+import argparse
+import timeit
+
+from benchmarks.mock_upstream import forecast_payload
+from weather_api.analytics import HAS_NUMPY, summarize_forecasts
+
+
+def build_payloads(cities):
+    """ Full 5-day/3-hour payloads with per-city temperatures and descriptions """
+    descriptions = ('light rain', 'overcast clouds', 'clear sky', 'mist')
+    payloads = []
+    for index in range(cities):
+        payload = forecast_payload(city=f'City {index}')
+        for slot, entry in enumerate(payload['list']):
+            entry['main']['temp'] = round((index * 31 + slot * 7) % 400 / 10 - 10, 1)
+            entry['weather'][0]['description'] = descriptions[(index + slot) % len(descriptions)]
+        payloads.append(payload)
+    return payloads
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cities', type=int, nargs='+', default=[1000, 10000], help='forecasts per batch')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    implementations = [('python', False)] + ([('numpy', True)] if HAS_NUMPY else [])
+    if not HAS_NUMPY:
+        print('numpy is not installed: only the pure-Python implementation is measured')
+
+    for cities in args.cities:
+        payloads = build_payloads(cities)
+        if HAS_NUMPY:
+            assert summarize_forecasts(payloads, vectorized=True) == summarize_forecasts(payloads, vectorized=False)
+        for label, vectorized in implementations:
+            best = min(timeit.repeat(lambda: summarize_forecasts(payloads, days=7, vectorized=vectorized),
+                                     number=1, repeat=args.repeat))
+            print(f'{cities:>6} cities  {label:<7} {best * 1e3:>9.1f} ms/batch  {best / cities * 1e6:>7.1f} us/city')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Closed-loop load test comparing the sync (WSGI) and async (ASGI) weather endpoints.
+
+Start the mock upstream, then the API under each server with caching disabled so every
+request reaches the (slow) upstream. A single token sending thousands of requests a minute
+would otherwise be throttled (WEATHER_USER_RATE) and run out of upstream budget
+(OPENWEATHERMAP_CALLS_PER_MINUTE), so lift both:
+
+    python -m benchmarks.mock_upstream --latency 0.15 &
+    export OPENWEATHERMAP_API_URL=http://127.0.0.1:9000/data/2.5 IPINFO_API_URL=http://127.0.0.1:9000
+    export WEATHER_CACHE_TTL_CURRENT=0 WEATHER_CACHE_TTL_FORECAST=0
+    export WEATHER_USER_RATE=100000000/min OPENWEATHERMAP_CALLS_PER_MINUTE=100000000
+    gunicorn weather_config.wsgi -w 1 --threads 8 -b 127.0.0.1:8000 &
+    uvicorn weather_config.asgi:application --workers 1 --port 8001 &
+
+    python -m benchmarks.load_test --token $TOKEN --concurrency 200 --requests 2000 \\
+        --target sync=http://127.0.0.1:8000/api/weather/search/?query=London \\
+        --target async=http://127.0.0.1:8001/api/weather/async/search/?query=London
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+
+def percentile(sorted_values, fraction):
+    """ Nearest-rank percentile of an already sorted list """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_target(url, token, total, concurrency, headers=None):
+    """ Send total requests with at most concurrency in flight; return latencies and status counts """
+    latencies = []
+    statuses = {}
+    remaining = iter(range(total))
+    request_headers = {'Authorization': f'Bearer {token}'} if token else {}
+    request_headers.update(headers or {})
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+
+        async def worker():
+            for _ in remaining:
+                started = time.perf_counter()
+                try:
+                    response = await client.get(url, headers=request_headers)
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = 'error'
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'requests': total,
+        'elapsed_s': elapsed,
+        'throughput_rps': total / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'statuses': statuses,
+    }
+
+
+def format_result(label, result):
+    return (f"{label:<12} {result['throughput_rps']:>9.1f} req/s  p50 {result['p50_ms']:>8.1f} ms  "
+            f"p95 {result['p95_ms']:>8.1f} ms  p99 {result['p99_ms']:>8.1f} ms  {result['statuses']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', action='append', required=True, help='label=url, may be repeated')
+    parser.add_argument('--token', default='', help='JWT access token from /api/token/')
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    args = parser.parse_args()
+
+    results = {}
+    for target in args.target:
+        label, url = target.split('=', 1)
+        result = results[label] = asyncio.run(run_target(url, args.token, args.requests, args.concurrency))
+        print(format_result(label, result))
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+
+if __name__ == '__main__':
+    main()
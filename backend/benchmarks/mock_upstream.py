@@ -0,0 +1,203 @@
+"""
+Local stand-in for OpenWeatherMap and ipinfo.io used by the benchmarks.
+
+    python -m benchmarks.mock_upstream --port 9000 --latency 0.15 --jitter 0.05 --error-rate 0.01
+
+Payloads vary per city, deterministically. Latency jitter and injected errors come from a seeded
+random generator, so two runs with the same options serve the same sequence.
+
+Point the API at it with:
+
+    OPENWEATHERMAP_API_URL=http://127.0.0.1:9000/data/2.5
+    IPINFO_API_URL=http://127.0.0.1:9000
+"""
+import argparse
+import json
+import random
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+CONDITIONS = (
+    (500, 'Rain', 'light rain', '10d'),
+    (800, 'Clear', 'clear sky', '01d'),
+    (803, 'Clouds', 'broken clouds', '04d'),
+    (804, 'Clouds', 'overcast clouds', '04d'),
+    (701, 'Mist', 'mist', '50d'),
+)
+
+
+def city_seed(city):
+    """ Stable per-city number, so every city gets its own but reproducible weather """
+    return zlib.crc32(city.lower().encode('utf-8'))
+
+
+def condition(seed):
+    weather_id, main, description, icon = CONDITIONS[seed % len(CONDITIONS)]
+    return {'id': weather_id, 'main': main, 'description': description, 'icon': icon}
+
+
+def current_weather_payload(city='London', country='GB'):
+    """ A /data/2.5/weather payload with the fields OpenWeatherMap returns """
+    now = int(time.time())
+    seed = city_seed(city)
+    temp = round(seed % 400 / 10 - 10, 1)
+    return {
+        'coord': {'lon': -0.1257, 'lat': 51.5085},
+        'weather': [condition(seed)],
+        'base': 'stations',
+        'main': {'temp': temp, 'feels_like': round(temp - 0.9, 1), 'temp_min': round(temp - 1.4, 1),
+                 'temp_max': round(temp + 1.3, 1), 'pressure': 1012, 'humidity': 78},
+        'visibility': 10000,
+        'wind': {'speed': 4.6, 'deg': 240},
+        'clouds': {'all': 75},
+        'dt': now - now % 600,
+        'sys': {'type': 2, 'id': 2075535, 'country': country, 'sunrise': now - 20000, 'sunset': now + 20000},
+        'timezone': 0,
+        'id': 2643743,
+        'name': city,
+        'cod': 200,
+    }
+
+
+def forecast_payload(city='London', country='GB', entries=40):
+    """ A /data/2.5/forecast payload: 5 days of 3-hour slots """
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    start -= timedelta(hours=start.hour % 3)
+    seed = city_seed(city)
+    slots = []
+    for index in range(entries):
+        slot = start + timedelta(hours=3 * index)
+        temp = round(seed % 300 / 10 - 5 + index % 8, 1)
+        slots.append({
+            'dt': int(slot.timestamp()),
+            'main': {'temp': temp, 'feels_like': round(temp - 1, 1), 'temp_min': round(temp - 0.5, 1),
+                     'temp_max': round(temp + 0.5, 1), 'pressure': 1011, 'sea_level': 1011, 'grnd_level': 1008,
+                     'humidity': 81, 'temp_kf': 0},
+            'weather': [condition(seed + index // 4)],
+            'clouds': {'all': 90},
+            'wind': {'speed': 5.1, 'deg': 230, 'gust': 9.8},
+            'visibility': 10000,
+            'pop': 0.4,
+            'sys': {'pod': 'd'},
+            'dt_txt': slot.strftime('%Y-%m-%d %H:%M:%S'),
+        })
+    return {
+        'cod': '200',
+        'message': 0,
+        'cnt': entries,
+        'list': slots,
+        'city': {'id': 2643743, 'name': city, 'coord': {'lat': 51.5085, 'lon': -0.1257}, 'country': country,
+                 'population': 1000000, 'timezone': 0},
+    }
+
+
+def ipinfo_payload(ip):
+    return {'ip': ip, 'city': 'London', 'region': 'England', 'country': 'GB', 'loc': '51.5085,-0.1257',
+            'timezone': 'Europe/London'}
+
+
+class UpstreamBehaviour:
+    """ Latency, jitter and error injection shared by the handler threads, plus served-request counters """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, error_status=500, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def next_response(self):
+        """ (delay, fail) of the next request """
+        with self._lock:
+            self.requests += 1
+            delay = self.latency
+            if self.jitter:
+                delay = max(0.0, delay + self.random.uniform(-self.jitter, self.jitter))
+            fail = self.error_rate > 0 and self.random.random() < self.error_rate
+            self.errors += fail
+        return delay, fail
+
+
+class MockUpstreamHandler(BaseHTTPRequestHandler):
+    """ Serve canned payloads after the configured latency, failing the configured share of requests """
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are written separately: without this, Nagle's algorithm holds the body back ~40 ms
+    disable_nagle_algorithm = True
+    behaviour = UpstreamBehaviour()
+
+    def do_GET(self):
+        delay, fail = self.behaviour.next_response()
+        if delay:
+            time.sleep(delay)
+        if fail:
+            self.send_json({'cod': self.behaviour.error_status, 'message': 'injected error'},
+                           status=self.behaviour.error_status)
+            return
+
+        url = urlsplit(self.path)
+        query = {name: values[0] for name, values in parse_qs(url.query).items()}
+        city, _, country = (query.get('q') or 'London,GB').partition(',')
+        city, country = city.title(), (country.rsplit(',', 1)[-1] or 'GB').upper()
+
+        if url.path.endswith('/data/2.5/weather'):
+            self.send_json(current_weather_payload(city, country))
+        elif url.path.endswith('/data/2.5/forecast'):
+            self.send_json(forecast_payload(city, country))
+        elif url.path.endswith('/json'):
+            self.send_json(ipinfo_payload(url.path.strip('/').split('/')[0]))
+        else:
+            self.send_json({'cod': '404', 'message': 'not found'}, status=404)
+
+    def send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def build_server(host='127.0.0.1', port=9000, latency=0.0, jitter=0.0, error_rate=0.0, error_status=500, seed=0):
+    """ A threaded mock server; port 0 picks a free port. Its UpstreamBehaviour is server.behaviour """
+    behaviour = UpstreamBehaviour(latency, jitter, error_rate, error_status, seed)
+    handler = type('ConfiguredHandler', (MockUpstreamHandler,), {'behaviour': behaviour})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.behaviour = behaviour
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=9000)
+    parser.add_argument('--latency', type=float, default=0.15, help='seconds to wait before each response')
+    parser.add_argument('--jitter', type=float, default=0.0, help='uniform +/- seconds added to the latency')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests answered with an error')
+    parser.add_argument('--error-status', type=int, default=500, help='HTTP status of injected errors')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the jitter and error sequence')
+    args = parser.parse_args()
+
+    server = build_server(args.host, args.port, args.latency, args.jitter, args.error_rate, args.error_status,
+                          args.seed)
+    print(f'Mock upstream listening on http://{args.host}:{args.port} (latency {args.latency}s '
+          f'+/- {args.jitter}s, error rate {args.error_rate})')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
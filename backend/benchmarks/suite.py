@@ -0,0 +1,371 @@
+"""
+Reproducible benchmark suite covering every endpoint of weather_api/urls.py and clients/urls.py, plus the
+JWT token endpoint. Requests go through Django's test client in this process, against the local mock
+upstream and a throwaway SQLite database, so a run needs no server and no network:
+
+    python -m benchmarks.suite --output results.json
+    python -m benchmarks.suite --scenario search --scenario forecast --latency 0.02 --error-rate 0.01
+    python -m benchmarks.suite --no-cache --output no-cache.json
+    python -m benchmarks.suite --compare baseline.json --output results.json
+
+Each scenario sends its requests one after another, so throughput is 1 / mean service time of a single
+worker. Allocations are measured with tracemalloc in a separate pass, which would otherwise slow the
+timed requests down: peak KiB allocated while serving one request, and KiB still held after the pass.
+Settings can be changed through the usual environment variables (FAST_JSON=0, WEATHER_CACHE_TTL_*...).
+With --compare, the exit status is 1 when a scenario's p95 or throughput is worse than the baseline by
+more than --tolerance. For real servers and concurrency, use benchmarks.load_test.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from collections import Counter, namedtuple
+from datetime import datetime, timezone
+
+from benchmarks.load_test import percentile
+from benchmarks.mock_upstream import build_server
+
+# build(i, context) -> (path, client kwargs); prepare(context, count) runs once before the requests
+Scenario = namedtuple('Scenario', ['name', 'method', 'build', 'role', 'is_async', 'max_requests', 'prepare'],
+                      defaults=('user', False, None, None))
+
+# Hashing a password (PBKDF2 by default) costs far more than the rest of the request; cap those scenarios
+HASHING_REQUESTS = 20
+
+
+def city_query(i, context):
+    return {'data': {'query': context.cities[i % len(context.cities)]}}
+
+
+def client_ip(i, context):
+    # Public addresses, one per simulated client; the mock ipinfo places all of them in London
+    return {'HTTP_X_FORWARDED_FOR': f'81.2.{i // 250 % 250}.{i % 250 + 1}'}
+
+
+def prepare_victims(context, count):
+    context.victims = context.create_users('delete', count)
+
+
+SCENARIOS = [
+    Scenario('current', 'get', lambda i, c: ('/api/weather/current/', client_ip(i, c))),
+    Scenario('current_forecast', 'get', lambda i, c: ('/api/weather/current_forecast/', client_ip(i, c))),
+    Scenario('search', 'get', lambda i, c: ('/api/weather/search/', city_query(i, c))),
+    Scenario('batch', 'post', lambda i, c: ('/api/weather/batch/', {
+        'data': {'queries': [c.cities[(i + k) % len(c.cities)] for k in range(10)]}, 'format': 'json'})),
+    Scenario('forecast', 'get', lambda i, c: ('/api/weather/forecast/', city_query(i, c))),
+    Scenario('forecast_summary', 'get', lambda i, c: ('/api/weather/forecast/', {
+        'data': {'query': c.cities[i % len(c.cities)], 'summary': '1'}})),
+    Scenario('history', 'get', lambda i, c: ('/api/weather/history/', city_query(i, c))),
+    Scenario('locations', 'get', lambda i, c: ('/api/weather/locations/', {
+        'data': {'prefix': c.cities[i % len(c.cities)][:3 + i % 3]}})),
+    Scenario('quota', 'get', lambda i, c: ('/api/weather/quota/', {}), role='admin'),
+    Scenario('async_current', 'get', lambda i, c: ('/api/weather/async/current/', client_ip(i, c)),
+             is_async=True),
+    Scenario('async_current_forecast', 'get',
+             lambda i, c: ('/api/weather/async/current_forecast/', client_ip(i, c)), is_async=True),
+    Scenario('async_search', 'get', lambda i, c: ('/api/weather/async/search/', city_query(i, c)), is_async=True),
+    Scenario('async_forecast', 'get', lambda i, c: ('/api/weather/async/forecast/', city_query(i, c)),
+             is_async=True),
+    Scenario('user_list', 'get', lambda i, c: ('/api/users/', {})),
+    Scenario('user_list_prefix', 'get', lambda i, c: ('/api/users/', {
+        'data': {'username': f'seed-{i % 10}', 'fields': 'username,date_joined'}}), role='admin'),
+    Scenario('user_export', 'get', lambda i, c: ('/api/users/', {'data': {'stream': '1'}}), role='admin'),
+    Scenario('user_detail', 'get', lambda i, c: (f'/api/users/{c.user_ids[i % len(c.user_ids)]}/', {})),
+    Scenario('create_user', 'post', lambda i, c: ('/api/create_user/', {
+        'data': {'username': f'created-{i}', 'password': 'benchmark-password'}, 'format': 'json'}),
+             role=None, max_requests=HASHING_REQUESTS),
+    Scenario('user_update', 'put', lambda i, c: (f'/api/users/{c.user_ids[i % len(c.user_ids)]}/', {
+        'data': {'username': f'seed-{i % len(c.user_ids)}', 'password': 'benchmark-password'},
+        'format': 'json'}), max_requests=HASHING_REQUESTS),
+    Scenario('user_delete', 'delete', lambda i, c: (f'/api/users/{c.victims[i]}/', {}), prepare=prepare_victims),
+    Scenario('token', 'post', lambda i, c: ('/api/token/', {
+        'data': {'username': 'bench', 'password': 'benchmark-password'}, 'format': 'json'}),
+             role=None, max_requests=HASHING_REQUESTS),
+]
+
+
+def configure_environment(args, upstream_url, database):
+    """ Point the settings at the mock upstream and a fresh database; anything else may come from the env """
+    os.environ.update({
+        'DJANGO_SETTINGS_MODULE': 'weather_config.settings',
+        'DB_ENGINE': 'django.db.backends.sqlite3',
+        'POSTGRES_DB': database,
+        'OPENWEATHERMAP_API_URL': f'{upstream_url}/data/2.5',
+        'IPINFO_API_URL': upstream_url,
+    })
+    os.environ.setdefault('SECRET_KEY', 'benchmark-secret-key')
+    os.environ.setdefault('OPENWEATHERMAP_API_KEY', 'benchmark')
+    # Neither the upstream budget nor the per-user throttles are under test
+    os.environ.setdefault('OPENWEATHERMAP_CALLS_PER_MINUTE', '100000000')
+    os.environ.setdefault('WEATHER_USER_RATE', '100000000/min')
+    os.environ.setdefault('WEATHER_LOCATIONS_USER_RATE', '100000000/min')
+    # The history scenario reads the observations stored by the upstream scenarios before it
+    os.environ.setdefault('WEATHER_STORE_OBSERVATIONS', '1')
+    if args.no_cache:
+        os.environ['WEATHER_CACHE_TTL_CURRENT'] = os.environ['WEATHER_CACHE_TTL_FORECAST'] = '0'
+
+
+class Context:
+    """ Users, tokens and test data shared by the scenarios """
+
+    def __init__(self, cities, users):
+        from django.contrib.auth import get_user_model
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        self.model = get_user_model()
+        self.cities = cities
+        bench = self.model.objects.create_user(username='bench', password='benchmark-password')
+        admin = self.model.objects.create_user(username='bench-admin', password='benchmark-password', is_staff=True)
+        self.headers = {
+            'user': {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(bench)}'},
+            'admin': {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(admin)}'},
+            None: {},
+        }
+        self.user_ids = self.create_users('seed', users)
+        self.victims = []
+
+    def create_users(self, prefix, count):
+        """ Users with unusable passwords, so creating them skips the hasher """
+        users = self.model.objects.bulk_create(
+            self.model(username=f'{prefix}-{index}', password='!') for index in range(count))
+        return [user.pk for user in users]
+
+
+def top_cities(count):
+    """ 'Name,CC' of the most populous cities of the bundled location index """
+    from weather_api.locations import location_index
+
+    table = location_index.table
+    order = sorted(range(len(table['names'])), key=lambda index: -table['population'][index])[:count]
+    return [f"{table['names'][index]},{table['countries'][index]}" for index in order]
+
+
+def send(client, scenario, context, i):
+    path, kwargs = scenario.build(i, context)
+    response = getattr(client, scenario.method)(path, **kwargs, **context.headers[scenario.role])
+    if response.streaming:
+        b''.join(response.streaming_content)
+    return response.status_code
+
+
+async def asend(client, scenario, context, i):
+    path, kwargs = scenario.build(i, context)
+    # AsyncClient takes request headers by name rather than as WSGI environ keys
+    extra = {**kwargs, **context.headers[scenario.role]}
+    headers = {key[5:].replace('_', '-').title(): extra.pop(key) for key in list(extra) if key.startswith('HTTP_')}
+    response = await getattr(client, scenario.method)(path, headers=headers, **extra)
+    return response.status_code
+
+
+def run_requests(scenario, context, indices, observe):
+    """ Send one request per index, calling observe(send_one) around each; returns the status counts """
+    from django.test import AsyncClient
+    from rest_framework.test import APIClient
+
+    statuses = Counter()
+    if scenario.is_async:
+        client = AsyncClient()
+
+        async def run():
+            for i in indices:
+                statuses[await observe(lambda: asend(client, scenario, context, i), is_async=True)] += 1
+
+        asyncio.run(run())
+    else:
+        client = APIClient()
+        for i in indices:
+            statuses[observe(lambda: send(client, scenario, context, i))] += 1
+    return statuses
+
+
+def reset_caches():
+    """ Start every scenario cold, so its numbers do not depend on the scenarios that ran before it """
+    from weather_api.cache import weather_cache
+    from weather_api.geolocation import geo_cache
+
+    weather_cache.clear()
+    geo_cache.clear()
+
+
+def measure(scenario, context, requests, warmup, alloc_requests):
+    """ Latencies, throughput, status counts, upstream calls and allocations of one scenario """
+    latencies = []
+
+    def timed(send_one, is_async=False):
+        if is_async:
+            async def timed_async():
+                started = time.perf_counter()
+                status = await send_one()
+                latencies.append(time.perf_counter() - started)
+                return status
+            return timed_async()
+        started = time.perf_counter()
+        status = send_one()
+        latencies.append(time.perf_counter() - started)
+        return status
+
+    peaks = []
+
+    def traced(send_one, is_async=False):
+        if is_async:
+            async def traced_async():
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                status = await send_one()
+                peaks.append(tracemalloc.get_traced_memory()[1] - before)
+                return status
+            return traced_async()
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        status = send_one()
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+        return status
+
+    if scenario.max_requests is not None:
+        requests = min(requests, scenario.max_requests)
+        warmup = min(warmup, scenario.max_requests)
+        alloc_requests = min(alloc_requests, scenario.max_requests)
+    if scenario.prepare is not None:
+        scenario.prepare(context, warmup + requests + alloc_requests)
+    reset_caches()
+
+    run_requests(scenario, context, range(warmup), lambda send_one, is_async=False: send_one())
+
+    upstream_before = context.upstream.requests
+    started = time.perf_counter()
+    statuses = run_requests(scenario, context, range(warmup, warmup + requests), timed)
+    elapsed = time.perf_counter() - started
+    upstream_calls = context.upstream.requests - upstream_before
+
+    tracemalloc.start()
+    retained_before = tracemalloc.get_traced_memory()[0]
+    run_requests(scenario, context, range(warmup + requests, warmup + requests + alloc_requests), traced)
+    retained = tracemalloc.get_traced_memory()[0] - retained_before
+    tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        'requests': requests,
+        'statuses': {str(status): count for status, count in sorted(statuses.items())},
+        'throughput_rps': requests / elapsed if elapsed else 0.0,
+        'mean_ms': sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'max_ms': latencies[-1] * 1000 if latencies else 0.0,
+        'upstream_calls_per_request': upstream_calls / requests if requests else 0.0,
+        'alloc_peak_kib': sum(peaks) / len(peaks) / 1024 if peaks else 0.0,
+        'alloc_retained_kib': retained / 1024,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, tolerance):
+    """ Regressions of p95 latency or throughput beyond the tolerance, as printable lines """
+    regressions = []
+    for name, result in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None:
+            continue
+        if result['p95_ms'] > previous['p95_ms'] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']:.2f} -> {result['p95_ms']:.2f} ms")
+        if result['throughput_rps'] < previous['throughput_rps'] * (1 - tolerance):
+            regressions.append(
+                f"{name}: throughput {previous['throughput_rps']:.1f} -> {result['throughput_rps']:.1f} req/s")
+    return regressions
+
+
+def format_result(name, result):
+    statuses = ' '.join(f'{status}x{count}' for status, count in result['statuses'].items())
+    return (f"{name:<24} {result['throughput_rps']:>8.1f} req/s  p50 {result['p50_ms']:>7.2f}  "
+            f"p95 {result['p95_ms']:>7.2f}  p99 {result['p99_ms']:>7.2f} ms  "
+            f"alloc {result['alloc_peak_kib']:>7.1f} KiB  upstream {result['upstream_calls_per_request']:.2f}  "
+            f"{statuses}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenario', action='append', choices=[scenario.name for scenario in SCENARIOS],
+                        help='run only these scenarios (repeatable); all by default')
+    parser.add_argument('--requests', type=int, default=200, help='timed requests per scenario')
+    parser.add_argument('--warmup', type=int, default=20, help='untimed requests sent first')
+    parser.add_argument('--alloc-requests', type=int, default=20, help='requests of the allocation pass')
+    parser.add_argument('--cities', type=int, default=50, help='distinct cities the weather scenarios rotate over')
+    parser.add_argument('--users', type=int, default=200, help='users created before the run')
+    parser.add_argument('--no-cache', action='store_true', help='disable the weather response cache')
+    parser.add_argument('--latency', type=float, default=0.0, help='mock upstream latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.0, help='mock upstream latency jitter in seconds')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of failing upstream responses')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the mock upstream jitter and errors')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    parser.add_argument('--compare', help='baseline JSON results to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='allowed relative regression')
+    args = parser.parse_args()
+
+    server = build_server(port=0, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                          seed=args.seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    host, port = server.server_address[:2]
+
+    with tempfile.TemporaryDirectory() as directory:
+        configure_environment(args, f'http://{host}:{port}', os.path.join(directory, 'benchmark.sqlite3'))
+
+        import django
+        from django.core.management import call_command
+        from django.test.utils import setup_test_environment
+
+        django.setup()
+        setup_test_environment()
+        call_command('migrate', verbosity=0, interactive=False)
+
+        context = Context(top_cities(args.cities), args.users)
+        context.upstream = server.behaviour
+
+        selected = [scenario for scenario in SCENARIOS if not args.scenario or scenario.name in args.scenario]
+        results = {
+            'meta': {
+                'started_at': datetime.now(timezone.utc).isoformat(),
+                'revision': git_revision(),
+                'python': sys.version.split()[0],
+                'django': django.get_version(),
+                'platform': platform.platform(),
+                'options': vars(args),
+            },
+            'scenarios': {},
+        }
+        for scenario in selected:
+            result = measure(scenario, context, args.requests, args.warmup, args.alloc_requests)
+            results['scenarios'][scenario.name] = result
+            print(format_result(scenario.name, result), flush=True)
+
+    server.shutdown()
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(results, output, indent=2)
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            regressions = compare(results, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print(f'REGRESSION {regression}')
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
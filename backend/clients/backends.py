@@ -0,0 +1,32 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from clients import hashers
+
+UserModel = get_user_model()
+
+
+class PooledPasswordBackend(ModelBackend):
+    """
+    ModelBackend verifying passwords on the clients.hashers process pool. A hash made with another hasher or
+    other parameters than the preferred ones is re-encoded after a successful login.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Hash anyway so that unknown usernames take as long as wrong passwords
+            hashers.make_password(password)
+            return None
+
+        if not hashers.check_password(password, user.password) or not self.user_can_authenticate(user):
+            return None
+        if hashers.must_update(user.password):
+            user.password = hashers.make_password(password)
+            user.save(update_fields=['password'])
+        return user
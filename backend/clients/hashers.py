@@ -0,0 +1,103 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import django
+from django.conf import settings
+from django.contrib.auth import hashers
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+_lock = threading.Lock()
+_executor = None
+_executor_pid = None
+_slots = None
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """ PBKDF2-SHA256 with PASSWORD_PBKDF2_ITERATIONS; hashes with another count are upgraded on login """
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class PasswordHashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many concurrent logins, try again later.'
+    default_code = 'password_hashing_busy'
+
+
+def get_executor():
+    """
+    Process pool hashing passwords off the request threads, or None when PASSWORD_HASH_WORKERS is 0. Workers
+    are spawned rather than forked from a multi-threaded web worker, and a pool inherited over a fork (e.g. a
+    preloading server) is replaced.
+    """
+    global _executor, _executor_pid, _slots
+    if not settings.PASSWORD_HASH_WORKERS:
+        return None
+    if _executor is None or _executor_pid != os.getpid():
+        with _lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS,
+                                                mp_context=multiprocessing.get_context('spawn'),
+                                                initializer=django.setup)
+                _executor_pid = os.getpid()
+                _slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_MAX_PENDING)
+    return _executor
+
+
+def shutdown_executor():
+    """ Stop the pool; the next hash starts a new one """
+    global _executor
+    with _lock:
+        if _executor is not None and _executor_pid == os.getpid():
+            _executor.shutdown(cancel_futures=True)
+        _executor = None
+
+
+def run(func, *args):
+    """
+    Run a hashing function on the pool. At most PASSWORD_HASH_MAX_PENDING hashes are queued per process:
+    callers wait PASSWORD_HASH_QUEUE_TIMEOUT seconds for a slot, then get PasswordHashingBusy (503).
+    """
+    executor = get_executor()
+    if executor is None:
+        return func(*args)
+
+    slots = _slots
+    if not slots.acquire(timeout=settings.PASSWORD_HASH_QUEUE_TIMEOUT):
+        raise PasswordHashingBusy()
+    try:
+        return executor.submit(func, *args).result()
+    except BrokenProcessPool:
+        # A worker died: hash on this thread and let the next call start a fresh pool
+        shutdown_executor()
+        return func(*args)
+    finally:
+        slots.release()
+
+
+def make_password(password):
+    """ django.contrib.auth.hashers.make_password with the preferred hasher, on the pool """
+    return run(hashers.make_password, password)
+
+
+def check_password(password, encoded):
+    """ django.contrib.auth.hashers.check_password on the pool, without its upgrade callback """
+    if password is None or not hashers.is_password_usable(encoded):
+        return False
+    return run(hashers.check_password, password, encoded)
+
+
+def must_update(encoded):
+    """ Whether a verified hash should be re-encoded with the preferred hasher and its current parameters """
+    try:
+        hasher = hashers.identify_hasher(encoded)
+    except ValueError:
+        return False
+    preferred = hashers.get_hasher('default')
+    return hasher.algorithm != preferred.algorithm or preferred.must_update(encoded)
@@ -0,0 +1,10 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class UserCursorPagination(CursorPagination):
+    """ Keyset pagination of the user list by id: every page is `WHERE id > last seen ORDER BY id LIMIT n` """
+    page_size = settings.USERS_PAGE_SIZE
+    page_size_query_param = 'limit'
+    max_page_size = settings.USERS_MAX_PAGE_SIZE
+    ordering = 'id'
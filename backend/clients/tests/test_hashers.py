@@ -0,0 +1,61 @@
+import threading
+from unittest.mock import patch
+
+from django.contrib.auth.hashers import PBKDF2SHA1PasswordHasher
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from clients import hashers
+from clients.models import CustomUser
+
+
+class PasswordHashingTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def login(self, password):
+        return self.client.post('/api/token/', {'username': 'testuser', 'password': password}, format='json')
+
+    def test_login_upgrades_stale_hash(self):
+        """ Ensure that a hash of another hasher is verified on the pool and re-encoded with the preferred one """
+        stale = PBKDF2SHA1PasswordHasher().encode('testpassword', 'somesalt', iterations=1000)
+        user = CustomUser.objects.create(username='testuser', password=stale)
+
+        self.assertEqual(self.login('wrongpassword').status_code, status.HTTP_401_UNAUTHORIZED)
+        user.refresh_from_db()
+        self.assertEqual(user.password, stale)
+
+        self.assertEqual(self.login('testpassword').status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$'))
+        self.assertFalse(hashers.must_update(user.password))
+        self.assertTrue(user.check_password('testpassword'))
+
+    @override_settings(PASSWORD_HASH_WORKERS=0, PASSWORD_PBKDF2_ITERATIONS=1000)
+    def test_iterations(self):
+        """ Ensure that new hashes use the configured iterations and are upgraded when it changes """
+        response = self.client.post(reverse('create_user'), {'username': 'testuser', 'password': 'testpassword'},
+                                    format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        user = CustomUser.objects.get()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$1000$'))
+
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            self.assertEqual(self.login('testpassword').status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$2000$'))
+
+    @override_settings(PASSWORD_HASH_QUEUE_TIMEOUT=0)
+    def test_busy(self):
+        """ Ensure that logins beyond the pending hash limit are turned away with a 503 """
+        CustomUser.objects.create_user(username='testuser', password='testpassword')
+        hashers.get_executor()
+        slots = threading.BoundedSemaphore(1)
+        slots.acquire()
+
+        with patch.object(hashers, '_slots', slots):
+            response = self.login('testpassword')
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
@@ -1,3 +1,5 @@
+import json
+
 from django.test import TestCase
 from django.urls import reverse
 
@@ -40,7 +42,7 @@ class UserAPIViewTest(TestCase):
 
         # Check that the response is successful and contains the expected data
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data['results'], [{'id': self.user.id, 'username': 'existinguser'}])
 
     def test_get_user_detail(self):
         """ Test retrieving details of a specific user """
@@ -71,3 +73,60 @@ class UserAPIViewTest(TestCase):
         # Check that the response is successful and the user is deleted
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(CustomUser.objects.count(), 0)
+
+
+class UserListTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        CustomUser.objects.bulk_create(CustomUser(username=f'user{i:02}', email=f'user{i:02}@example.com')
+                                       for i in range(25))
+        self.user = CustomUser.objects.get(username='user00')
+        self.client.force_authenticate(user=self.user)
+
+    def test_pages(self):
+        """ Ensure that the list is walked page by page with the cursor of the next link """
+        url = reverse('user_list')
+        usernames = []
+        while url:
+            response = self.client.get(url, {'limit': 10} if not usernames else None)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            usernames.extend(user['username'] for user in response.data['results'])
+            url = response.data['next']
+
+        self.assertEqual(usernames, [f'user{i:02}' for i in range(25)])
+
+    def test_username_prefix_and_fields(self):
+        """ Ensure that the list is filtered by username prefix and returns the requested fields only """
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(reverse('user_list'), {'username': 'user1', 'fields': 'username,email'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 10)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'username', 'email'})
+
+        response = self.client.get(reverse('user_list'), {'fields': 'username,password'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_personal_fields_need_admin(self):
+        """ Ensure that users who are not admins can list ids and usernames only """
+        response = self.client.get(reverse('user_list'), {'fields': 'email'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get(reverse('user_list'), {'fields': 'username'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data['results'][0]), {'id', 'username'})
+
+    def test_export(self):
+        """ Ensure that only admins can stream the whole list as NDJSON """
+        response = self.client.get(reverse('user_list'), {'stream': 1})
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get(reverse('user_list'), {'stream': 1, 'fields': 'username,date_joined'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 25)
+        self.assertEqual(json.loads(lines[0])['username'], 'user00')
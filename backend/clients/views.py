@@ -1,11 +1,15 @@
-from django.contrib.auth.hashers import make_password
+from django.conf import settings
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 
+from clients.hashers import make_password
 from clients.models import CustomUser
+from clients.pagination import UserCursorPagination
 from clients.serializers import CustomUserSerializer
+from weather_api.renderers import NDJSONRenderer, NDJSONStreamMixin
 
 
 class CreateUserAPIView(APIView):
@@ -24,21 +28,67 @@ class CreateUserAPIView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UserAPIView(APIView):
+class UserAPIView(APIView, NDJSONStreamMixin):
+    """
+    Users by ID, and the user list: keyset-paginated (?limit= and the `next` link), filtered by ?username=
+    prefix and limited to the columns in ?fields= (only admins can select more than the id and username).
+    Admins can export the whole list as NDJSON with ?stream=1.
+    """
     permission_classes = [IsAuthenticated]
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [NDJSONRenderer]
+    pagination_class = UserCursorPagination
+    # Columns admins can list; the password hash is never selected
+    list_fields = ('id', 'username', 'email', 'first_name', 'last_name', 'is_active', 'date_joined', 'last_login')
+    # Columns other users can list
+    default_list_fields = ('id', 'username')
 
     def get(self, request, user_id=None):
         """ GET requests for user information """
-        if user_id:
-            user = self.get_user(user_id)
-            if isinstance(user, Response):
-                return user
-            serializer = CustomUserSerializer(user)
-        else:
-            users = CustomUser.objects.all()
-            serializer = CustomUserSerializer(users, many=True)
+        if not user_id:
+            return self.list_users(request)
+
+        user = self.get_user(user_id)
+        if isinstance(user, Response):
+            return user
+        serializer = CustomUserSerializer(user)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
+    def list_users(self, request):
+        """ One page of users, read as dicts of the requested columns only """
+        allowed = self.list_fields if request.user.is_staff else self.default_list_fields
+        fields = self.get_list_fields(request.query_params, allowed)
+        if fields is None:
+            return Response({"detail": f"fields must be a comma-separated subset of: {', '.join(allowed)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        users = CustomUser.objects.values(*fields)
+        prefix = request.query_params.get('username')
+        if prefix:
+            # A LIKE 'prefix%' range scan on the username index (varchar_pattern_ops on PostgreSQL)
+            users = users.filter(username__startswith=prefix)
+
+        if self.wants_stream(request):
+            if not request.user.is_staff:
+                return Response({"detail": "Only admins can export the user list"}, status=status.HTTP_403_FORBIDDEN)
+            return self.stream_response(users.order_by('id').iterator(chunk_size=settings.USERS_EXPORT_CHUNK_SIZE))
+
+        paginator = self.pagination_class()
+        page = paginator.paginate_queryset(users, request, view=self)
+        return Response({
+            "next": paginator.get_next_link(),
+            "previous": paginator.get_previous_link(),
+            "results": page,
+        }, status=status.HTTP_200_OK)
+
+    def get_list_fields(self, query_params, allowed):
+        """ The requested columns, always with the id the cursor is built from, or None if one is not allowed """
+        requested = [field.strip() for field in query_params.get('fields', '').split(',') if field.strip()]
+        if not requested:
+            return self.default_list_fields
+        if not set(requested) <= set(allowed):
+            return None
+        return tuple(dict.fromkeys(['id'] + requested))
+
     def put(self, request, user_id):
         """ PUT requests for updating user information """
         user = self.get_user(user_id)
@@ -1,3 +1,18 @@
 from django.contrib import admin
+from weather_api.models import ForecastSlot, Observation
 
-# Register your models here.
+
+@admin.register(Observation)
+class ObservationAdmin(admin.ModelAdmin):
+    """ Filed in admin panel """
+    list_display = ('city', 'country', 'observed_at', 'temperature', 'description')
+    list_filter = ('country',)
+    search_fields = ('city', 'location')
+
+
+@admin.register(ForecastSlot)
+class ForecastSlotAdmin(admin.ModelAdmin):
+    """ Filed in admin panel """
+    list_display = ('city', 'country', 'forecast_for', 'temperature', 'description', 'fetched_at')
+    list_filter = ('country',)
+    search_fields = ('city', 'location')
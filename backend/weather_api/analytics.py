@@ -0,0 +1,148 @@
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional: the pure-Python implementation is used instead
+    np = None
+
+EPOCH_DATE = date(1970, 1, 1)
+
+HAS_NUMPY = np is not None
+
+
+def entry_day(entry):
+    """ Day number since the epoch of a forecast entry, from 'dt' or else 'dt_txt' """
+    epoch = entry.get('dt')
+    if epoch is None:
+        epoch = datetime.fromisoformat(entry['dt_txt']).replace(tzinfo=timezone.utc).timestamp()
+    return int(epoch) // 86400
+
+
+class Columns:
+    """
+    Forecast entries of many payloads flattened into parallel columns: owning payload index, day number,
+    temperature and description code. Descriptions are interned into `labels` while loading.
+    """
+
+    def __init__(self, payloads, days=None):
+        last_day = (datetime.now().date() + timedelta(days=days) - EPOCH_DATE).days if days is not None else None
+        self.count = len(payloads)
+        self.owners, self.days, self.temperatures, self.codes = [], [], [], []
+        codes = {}
+        for owner, data in enumerate(payloads):
+            for entry in data['list']:
+                day = entry_day(entry)
+                if last_day is not None and day > last_day:
+                    continue
+                description = entry['weather'][0]['description']
+                code = codes.get(description)
+                if code is None:
+                    code = codes[description] = len(codes)
+                self.owners.append(owner)
+                self.days.append(day)
+                self.temperatures.append(entry['main']['temp'])
+                self.codes.append(code)
+        self.labels = list(codes)
+
+
+class DayFormatter:
+    """ Builds summary items, formatting each distinct day only once """
+
+    def __init__(self):
+        self.formatted_days = {}
+
+    def __call__(self, day, minimum, maximum, mean, description, trend):
+        formatted = self.formatted_days.get(day)
+        if formatted is None:
+            formatted = self.formatted_days[day] = (EPOCH_DATE + timedelta(days=day)).strftime('%d %B %Y')
+        return {
+            'datetime': formatted,
+            'min_temperature': round(minimum, 2),
+            'max_temperature': round(maximum, 2),
+            'mean_temperature': round(mean, 2),
+            'description': description,
+            'trend': None if trend is None else round(trend, 2),
+        }
+
+
+def summarize_columns_python(columns):
+    """ Reference implementation: one pass grouping rows by (payload, day) """
+    groups = {}
+    for owner, day, temperature, code in zip(columns.owners, columns.days, columns.temperatures, columns.codes):
+        group = groups.get((owner, day))
+        if group is None:
+            group = groups[owner, day] = [temperature, temperature, 0.0, 0, Counter()]
+        group[0] = min(group[0], temperature)
+        group[1] = max(group[1], temperature)
+        group[2] += temperature
+        group[3] += 1
+        group[4][code] += 1
+
+    build_day = DayFormatter()
+    summaries = [[] for _ in range(columns.count)]
+    for (owner, day), (minimum, maximum, total, samples, tally) in sorted(groups.items()):
+        mean = total / samples
+        previous = summaries[owner][-1]['mean_temperature'] if summaries[owner] else None
+        # Ties go to the alphabetically first description, as in the vectorized version
+        code = min(tally, key=lambda code: (-tally[code], columns.labels[code]))
+        summaries[owner].append(build_day(day, minimum, maximum, mean, columns.labels[code],
+                                          None if previous is None else round(mean, 2) - previous))
+    return summaries
+
+
+def summarize_columns_numpy(columns):
+    """ Vectorized implementation: sort rows by (payload, day) and reduce each contiguous group """
+    summaries = [[] for _ in range(columns.count)]
+    if not columns.owners:
+        return summaries
+
+    owner = np.asarray(columns.owners, dtype=np.int64)
+    day = np.asarray(columns.days, dtype=np.int64)
+    temperature = np.asarray(columns.temperatures, dtype=np.float64)
+    # Rank codes alphabetically so that argmax resolves ties to the first label, like the Python version
+    labels = sorted(columns.labels)
+    rank = np.empty(len(labels), dtype=np.int64)
+    rank[np.argsort(np.asarray(columns.labels, dtype=object))] = np.arange(len(labels))
+    code = rank[np.asarray(columns.codes, dtype=np.int64)]
+
+    order = np.lexsort((day, owner))
+    owner, day, temperature, code = owner[order], day[order], temperature[order], code[order]
+
+    starts = np.flatnonzero(np.r_[True, (owner[1:] != owner[:-1]) | (day[1:] != day[:-1])])
+    samples = np.diff(np.r_[starts, len(temperature)])
+    minimum = np.minimum.reduceat(temperature, starts)
+    maximum = np.maximum.reduceat(temperature, starts)
+    mean = np.round(np.add.reduceat(temperature, starts) / samples, 2)
+
+    group = np.repeat(np.arange(len(starts)), samples)
+    tally = np.bincount(group * len(labels) + code, minlength=len(starts) * len(labels))
+    dominant = tally.reshape(len(starts), len(labels)).argmax(axis=1)
+
+    group_owner = owner[starts]
+    first_of_owner = np.r_[True, group_owner[1:] != group_owner[:-1]]
+    trend = np.r_[0.0, np.diff(mean)]
+
+    build_day = DayFormatter()
+    rows = zip(group_owner.tolist(), day[starts].tolist(), minimum.tolist(), maximum.tolist(), mean.tolist(),
+               dominant.tolist(), trend.tolist(), first_of_owner.tolist())
+    for owner_index, day_number, low, high, average, label, delta, first in rows:
+        summaries[owner_index].append(build_day(day_number, low, high, average, labels[label],
+                                                None if first else delta))
+    return summaries
+
+
+def summarize_forecasts(payloads, days=None, vectorized=None):
+    """
+    Per-day min/max/mean temperature, dominant description and day-over-day trend of the mean for many
+    forecast payloads at once, in payload order. The lists are loaded into columns once; vectorized=None
+    reduces them with NumPy when it is installed and falls back to the identical pure-Python version.
+    """
+    vectorized = HAS_NUMPY if vectorized is None else vectorized
+    summarize = summarize_columns_numpy if vectorized else summarize_columns_python
+    return summarize(Columns(payloads, days=days))
+
+
+def summarize_forecast(data, days=None, vectorized=None):
+    """ Daily summaries of a single forecast payload """
+    return summarize_forecasts([data], days=days, vectorized=vectorized)[0]
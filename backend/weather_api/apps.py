@@ -4,3 +4,14 @@ from django.apps import AppConfig
 class WeatherApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'weather_api'
+
+    def ready(self):
+        from django.db import connections
+        from django.db.backends.signals import connection_created
+
+        from weather_api.instrumentation import install_query_timer
+
+        # Time queries of connections opened from now on, and of any opened before the app was ready
+        connection_created.connect(install_query_timer)
+        for connection in connections.all(initialized_only=True):
+            install_query_timer(connection=connection)
@@ -0,0 +1,50 @@
+import asyncio
+import time
+import weakref
+
+import httpx
+from django.conf import settings
+
+from weather_api.instrumentation import record_upstream
+from weather_api.resilience import aget_with_retries
+
+# httpx clients are bound to the event loop that created them, so keep one pool per running loop
+_clients = weakref.WeakKeyDictionary()
+
+
+def build_client():
+    """ Build an httpx.AsyncClient with the same pool size and timeouts as the sync session """
+    limits = httpx.Limits(
+        max_connections=settings.UPSTREAM_POOL_MAXSIZE,
+        max_keepalive_connections=settings.UPSTREAM_POOL_MAXSIZE,
+    )
+    timeout = httpx.Timeout(settings.UPSTREAM_READ_TIMEOUT, connect=settings.UPSTREAM_CONNECT_TIMEOUT)
+    return httpx.AsyncClient(limits=limits, timeout=timeout, headers={'Accept': 'application/json'})
+
+
+def get_client():
+    """ Return the shared async client of the running event loop """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _clients[loop] = build_client()
+    return client
+
+
+async def aclose():
+    """ Close the client of the running event loop """
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
+
+
+async def get(url, params=None, before_attempt=None):
+    """ GET an upstream URL through the shared async pool, the host's breaker and retries """
+    start = time.perf_counter()
+    try:
+        response = await aget_with_retries(url, lambda: get_client().get(url, params=params), before_attempt)
+    except Exception as e:
+        record_upstream(url, type(e).__name__, time.perf_counter() - start)
+        raise
+    record_upstream(url, response.status_code, time.perf_counter() - start)
+    return response
@@ -0,0 +1,221 @@
+import asyncio
+import logging
+
+import httpx
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.views import View
+from rest_framework import status
+from rest_framework.exceptions import AuthenticationFailed
+
+from weather_api import async_upstream, fastjson, store
+from weather_api.authentication import WeatherJWTAuthentication
+from weather_api.cache import weather_cache
+from weather_api.conditional import ConditionalResponseMixin, apply_validators, not_modified_response
+from weather_api.geolocation import aresolve_location
+from weather_api.hot_queries import hot_queries
+from weather_api.locations import tidy_query
+from weather_api.ratelimit import UpstreamRateLimited, WeatherUserRateThrottle, upstream_limiter
+from weather_api.renderers import FastJsonResponse
+from weather_api.views import WeatherCurrentView, WeatherDataMixin
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncWeatherDataMixin(WeatherDataMixin):
+    """ Async counterparts of the WeatherDataMixin upstream calls """
+    response_class = FastJsonResponse
+
+    @classmethod
+    async def aget_weather_data(cls, base_url, params):
+        """ Return upstream weather data, served from the response cache when fresh """
+        return await weather_cache.aget_or_fetch(base_url, params, lambda: cls.aload_weather_data(base_url, params))
+
+    @classmethod
+    async def aload_weather_data(cls, base_url, params):
+        """ Answer from the observation store when recent data exists, otherwise fetch and persist """
+        if settings.WEATHER_STORE_READ_THROUGH:
+            data = await sync_to_async(store.load_recent_payload)(base_url, params)
+            if data is not None:
+                return data
+
+        data = await cls.afetch_weather_data(base_url, params)
+
+        if settings.WEATHER_STORE_OBSERVATIONS:
+            try:
+                await sync_to_async(store.save_payload)(base_url, data)
+            except Exception:
+                # Persisting is best effort and must never fail the request
+                logger.exception('Could not store weather data from %s', base_url)
+        return data
+
+    @staticmethod
+    async def afetch_weather_data(base_url, params):
+        try:
+            # Every attempt, retries included, spends a call of the OpenWeatherMap budget
+            response = await async_upstream.get(base_url, params=params, before_attempt=upstream_limiter.aacquire)
+            response.raise_for_status()
+            return fastjson.response_json(response)
+        except httpx.HTTPError as e:
+            raise requests.RequestException(f"Error retrieving weather data: {str(e)}") from e
+
+    async def aget_current_weather(self, latitude, longitude):
+        """ Current weather for coordinates, shaped like the sync views """
+        params = {
+            'lat': latitude,
+            'lon': longitude,
+            'appid': settings.OPENWEATHERMAP_API_KEY,
+            'units': 'metric',
+        }
+        data = await self.aget_weather_data(f'{settings.OPENWEATHERMAP_API_URL}/weather', params)
+        return self.extract_current_weather_info(data)
+
+    async def aget_forecast(self, params):
+        """ Forecast for the next 7 days, shaped like the sync views """
+        params = dict(params, appid=settings.OPENWEATHERMAP_API_KEY, units='metric')
+        data = await self.aget_weather_data(f'{settings.OPENWEATHERMAP_API_URL}/forecast', params)
+        return self.get_next_7_days_forecast(data)
+
+
+class AsyncWeatherView(View, AsyncWeatherDataMixin):
+    """ Base view for async weather endpoints: JWT authentication without DRF's sync dispatch """
+    http_method_names = ['get', 'options']
+    authentication_class = WeatherJWTAuthentication
+    throttle_class = WeatherUserRateThrottle
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            if settings.WEATHER_STATELESS_AUTH:
+                # No database lookup: authenticate on the event loop instead of hopping to a thread
+                auth = self.authentication_class().authenticate(request)
+            else:
+                auth = await sync_to_async(self.authentication_class().authenticate)(request)
+        except AuthenticationFailed as e:
+            return FastJsonResponse({"detail": str(e.detail)}, status=status.HTTP_401_UNAUTHORIZED)
+
+        if auth is None:
+            return FastJsonResponse({"detail": "Authentication credentials were not provided."},
+                                    status=status.HTTP_401_UNAUTHORIZED)
+
+        request.user, request.auth = auth
+
+        throttle = self.throttle_class()
+        if not throttle.allow_request(request, self):
+            return FastJsonResponse({"detail": "Request was throttled."}, status=status.HTTP_429_TOO_MANY_REQUESTS,
+                                    headers={'Retry-After': str(int(throttle.wait() or 1))})
+
+        return await super().dispatch(request, *args, **kwargs)
+
+    @staticmethod
+    def get_query(request):
+        return request.GET.get('query', None)
+
+
+class AsyncWeatherCurrentView(AsyncWeatherView):
+    """ GET the current weather based on the user's IP address """
+
+    async def get(self, request):
+        location = await aresolve_location(WeatherCurrentView.get_client_ip(request))
+
+        if not location:
+            return FastJsonResponse({"detail": "Unable to determine user location."},
+                                    status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        try:
+            weather_info = await self.aget_current_weather(*location)
+        except UpstreamRateLimited as e:
+            return self.rate_limited_response(e)
+
+        return FastJsonResponse({"current_weather_data": weather_info}, status=status.HTTP_200_OK)
+
+
+class AsyncWeatherSearchView(AsyncWeatherView, ConditionalResponseMixin):
+    """ GET the current weather based on the provided city name or zip code """
+
+    async def get(self, request):
+        try:
+            query = self.get_query(request)
+
+            if not query:
+                return FastJsonResponse({"detail": "Please provide a city name or zip code"},
+                                        status=status.HTTP_400_BAD_REQUEST)
+
+            hot_queries.record('weather', tidy_query(query))
+            params = self.get_query_params(query)
+
+            data, validators = await self.aget_validated_data(
+                request, f'{settings.OPENWEATHERMAP_API_URL}/weather', params)
+            if data is None:
+                return not_modified_response(validators)
+
+            weather_info = self.extract_current_weather_info(data)
+
+            return apply_validators(FastJsonResponse({"current_weather_data": weather_info}, status=status.HTTP_200_OK),
+                                    validators)
+
+        except UpstreamRateLimited as e:
+            return self.rate_limited_response(e)
+        except Exception as e:
+            error_message = f"Check that the entered data is correct:  {str(e)}"
+            return FastJsonResponse({"error": error_message}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AsyncWeatherForecastView(AsyncWeatherView, ConditionalResponseMixin):
+    """ GET the weather forecast for the next 7 days based on the provided city name or zip code """
+
+    async def get(self, request):
+        try:
+            query = self.get_query(request)
+
+            if not query:
+                return FastJsonResponse({"detail": "Please provide a city name or zip code"},
+                                        status=status.HTTP_400_BAD_REQUEST)
+
+            hot_queries.record('forecast', tidy_query(query))
+            data, validators = await self.aget_validated_data(
+                request, f'{settings.OPENWEATHERMAP_API_URL}/forecast', self.get_query_params(query))
+            if data is None:
+                return not_modified_response(validators)
+
+            next_7_days_forecast = self.get_next_7_days_forecast(data)
+
+            return apply_validators(FastJsonResponse({"next_7_days_forecast": next_7_days_forecast},
+                                                     status=status.HTTP_200_OK), validators)
+
+        except UpstreamRateLimited as e:
+            return self.rate_limited_response(e)
+        except Exception as e:
+            error_message = f"Check that the entered data is correct:  {str(e)}"
+            return FastJsonResponse({"error": error_message}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class AsyncWeatherCurrentForecastView(AsyncWeatherView):
+    """ GET the current weather and forecast for the next 7 days based on the user's IP address """
+
+    async def get(self, request):
+        location = await aresolve_location(WeatherCurrentView.get_client_ip(request))
+
+        if not location:
+            return FastJsonResponse({"detail": "Unable to determine user location."},
+                                    status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        latitude, longitude = location
+        try:
+            # Both calls only need the coordinates, so they run concurrently
+            current_weather_data, next_7_days_forecast = await asyncio.gather(
+                self.aget_current_weather(latitude, longitude),
+                self.aget_forecast({'lat': latitude, 'lon': longitude}),
+            )
+        except UpstreamRateLimited as e:
+            return self.rate_limited_response(e)
+        except Exception as e:
+            error_message = f"Error retrieving forecast data: {str(e)}"
+            return FastJsonResponse({"error": error_message}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        response_data = {
+            "current_weather_data": current_weather_data,
+            "next_7_days_forecast": next_7_days_forecast
+        }
+
+        return FastJsonResponse(response_data, status=status.HTTP_200_OK)
@@ -0,0 +1,57 @@
+import time
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from weather_api.cache import LRUCache
+from weather_api.instrumentation import timed
+
+# Verified access tokens of the stateless mode: raw token -> (TokenUser, validated token)
+verified_tokens = LRUCache(settings.WEATHER_AUTH_CACHE_MAXSIZE)
+
+
+class TimedJWTAuthentication(JWTAuthentication):
+    """ JWTAuthentication recording token validation and the user lookup as the 'auth' phase """
+
+    def authenticate(self, request):
+        with timed('auth'):
+            return super().authenticate(request)
+
+
+class WeatherJWTAuthentication(TimedJWTAuthentication):
+    """
+    Authentication of the weather views. With WEATHER_STATELESS_AUTH on, only the token signature and claims
+    are checked: request.user is a TokenUser built from the claims instead of a database row, and verified
+    tokens are cached in process until they expire, at most WEATHER_AUTH_CACHE_TTL seconds. Deactivating a
+    user therefore takes effect on these views when their access tokens expire.
+    """
+
+    def authenticate(self, request):
+        if not settings.WEATHER_STATELESS_AUTH:
+            return super().authenticate(request)
+
+        with timed('auth'):
+            header = self.get_header(request)
+            if header is None:
+                return None
+            raw_token = self.get_raw_token(header)
+            if raw_token is None:
+                return None
+
+            auth = verified_tokens.get(raw_token)
+            if auth is None:
+                validated_token = self.get_validated_token(raw_token)
+                auth = (self.get_token_user(validated_token), validated_token)
+                ttl = min(settings.WEATHER_AUTH_CACHE_TTL, validated_token['exp'] - time.time())
+                if ttl > 0:
+                    verified_tokens.set(raw_token, auth, ttl)
+            return auth
+
+    @staticmethod
+    def get_token_user(validated_token):
+        if api_settings.USER_ID_CLAIM not in validated_token:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+        return api_settings.TOKEN_USER_CLASS(validated_token)
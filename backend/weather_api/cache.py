@@ -0,0 +1,439 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import urlencode, urlsplit
+
+from django.conf import settings
+from django.core.cache import caches
+
+from weather_api import upstream
+from weather_api.instrumentation import record_cache
+from weather_api.locations import normalize_query
+
+EXCLUDED_PARAMS = frozenset({'appid'})
+# Location params whose spellings share a key ('São Paulo' and 'sao  paulo')
+FOLDED_PARAMS = frozenset({'q', 'zip'})
+
+# How often a worker waiting on another worker's lock re-checks the shared tier
+LOCK_POLL_INTERVAL = 0.05
+# stats() counter for each record_cache() result
+COUNTERS = {'hit': 'hits', 'stale': 'stale_hits', 'miss': 'misses'}
+
+
+class LRUCache:
+    """ Bounded, thread-safe in-process cache with per-entry expiry and an optional stale window """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """ Return a fresh value, or None """
+        entry = self.get_entry(key)
+        if entry is None or not entry[1]:
+            return None
+        return entry[0]
+
+    def get_entry(self, key):
+        """ Return (value, is_fresh) while the entry is fresh or stale, or None once it has expired """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            fresh_until, expires_at, value = entry
+            now = time.monotonic()
+            if expires_at <= now:
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value, fresh_until > now
+
+    def remaining(self, key):
+        """ Seconds until the entry goes stale, or 0 """
+        with self._lock:
+            entry = self._data.get(key)
+            return max(0.0, entry[0] - time.monotonic()) if entry is not None else 0.0
+
+    def set(self, key, value, ttl, stale_ttl=0):
+        with self._lock:
+            now = time.monotonic()
+            self._data[key] = (now + ttl, now + ttl + stale_ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class _Call:
+    """ One in-flight fetch shared by every caller of the same key """
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """ Run at most one call per key at a time; concurrent callers wait for and share its result """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    async def ado(self, key, fn):
+        """
+        Async variant: fn is a coroutine function; calls are shared within one event loop. The call runs as
+        its own task that every caller awaits, so cancelling one caller (e.g. on a client disconnect) neither
+        cancels the call nor leaves the others waiting.
+        """
+        loop = asyncio.get_running_loop()
+        flight_key = (id(loop), key)
+        task = self._calls.get(flight_key)
+        if task is None:
+            task = self._calls[flight_key] = loop.create_task(fn())
+            task.add_done_callback(lambda done: self._finish(flight_key, done))
+        return await asyncio.shield(task)
+
+    def _finish(self, flight_key, task):
+        if self._calls.get(flight_key) is task:
+            del self._calls[flight_key]
+        if not task.cancelled():
+            # Mark the exception as retrieved in case every caller was cancelled
+            task.exception()
+
+
+class WeatherCache:
+    """
+    Two-tier TTL cache for upstream weather payloads: local LRU in front of a Django cache.
+    Concurrent misses for one key are coalesced into a single upstream fetch, and entries are
+    served stale for stale_ttl seconds after expiry while one background refresh runs.
+    """
+
+    def __init__(self, maxsize, ttls, shared_alias=None, stale_ttl=0, distributed_lock=False, lock_timeout=10):
+        self.ttls = ttls
+        self.local = LRUCache(maxsize)
+        self.shared_alias = shared_alias
+        self.stale_ttl = stale_ttl
+        self.distributed_lock = distributed_lock
+        self.lock_timeout = lock_timeout
+        self.flights = SingleFlight()
+        self._refreshing = set()
+        self._refreshing_lock = threading.Lock()
+        self._background_tasks = set()
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    @property
+    def shared(self):
+        return caches[self.shared_alias] if self.shared_alias else None
+
+    @staticmethod
+    def make_key(base_url, params):
+        """ Build a cache key from the endpoint path and the normalized params, without the API key """
+        path = urlsplit(base_url).path.rstrip('/')
+        normalized = sorted(
+            (name, normalize_query(value) if name in FOLDED_PARAMS else str(value).strip().lower())
+            for name, value in (params or {}).items()
+            if name not in EXCLUDED_PARAMS and value is not None
+        )
+        return f'weather:{path}?{urlencode(normalized)}'
+
+    def get_ttl(self, base_url):
+        """ TTL for an endpoint, looked up by the last path segment (e.g. 'weather', 'forecast') """
+        endpoint = urlsplit(base_url).path.rstrip('/').rsplit('/', 1)[-1]
+        return self.ttls.get(endpoint, 0)
+
+    def promote(self, key, stored):
+        """ Copy an entry read from the shared tier into the local tier; returns (value, is_fresh) """
+        remaining = stored['fresh_until'] - time.time()
+        if remaining > 0:
+            self.local.set(key, stored['value'], remaining, self.stale_ttl)
+        else:
+            self.local.set(key, stored['value'], 0, self.stale_ttl + remaining)
+        return stored['value'], remaining > 0
+
+    def adopt(self, entry, key, stored):
+        """ The entry to serve given the local one and the shared one: a stale local entry yields to a fresh one """
+        if stored is not None and (entry is None or stored['fresh_until'] > time.time()):
+            return self.promote(key, stored)
+        return entry
+
+    def lookup(self, key):
+        """
+        Look a key up in the local tier, then in the shared tier when it is missing or stale locally (another
+        worker or the pre-warmer may have refreshed it); returns (value, is_fresh) or None
+        """
+        entry = self.local.get_entry(key)
+        if (entry is None or not entry[1]) and self.shared is not None:
+            entry = self.adopt(entry, key, self.shared.get(key))
+        return entry
+
+    async def alookup(self, key):
+        entry = self.local.get_entry(key)
+        if (entry is None or not entry[1]) and self.shared is not None:
+            entry = self.adopt(entry, key, await self.shared.aget(key))
+        return entry
+
+    def get(self, key):
+        """ Return a fresh cached value, or None """
+        entry = self.lookup(key)
+        return entry[0] if entry is not None and entry[1] else None
+
+    def set(self, key, value, ttl):
+        if ttl <= 0:
+            return
+        self.local.set(key, value, ttl, self.stale_ttl)
+        if self.shared is not None:
+            self.shared.set(key, {'value': value, 'fresh_until': time.time() + ttl}, ttl + self.stale_ttl)
+
+    async def aset(self, key, value, ttl):
+        if ttl <= 0:
+            return
+        self.local.set(key, value, ttl, self.stale_ttl)
+        if self.shared is not None:
+            await self.shared.aset(key, {'value': value, 'fresh_until': time.time() + ttl}, ttl + self.stale_ttl)
+
+    def peek(self, base_url, params):
+        """ Return the fresh cached payload for a request without fetching it on a miss """
+        ttl = self.get_ttl(base_url)
+        if ttl <= 0:
+            return None
+        value = self.get(self.make_key(base_url, params))
+        if value is not None:
+            self.count('hit')
+        return value
+
+    async def apeek(self, base_url, params):
+        ttl = self.get_ttl(base_url)
+        if ttl <= 0:
+            return None
+        entry = await self.alookup(self.make_key(base_url, params))
+        if entry is None or not entry[1]:
+            return None
+        self.count('hit')
+        return entry[0]
+
+    def get_or_fetch(self, base_url, params, fetch):
+        """ Return the cached payload for a request or call fetch() and cache its result """
+        ttl = self.get_ttl(base_url)
+        if ttl <= 0:
+            return fetch()
+
+        key = self.make_key(base_url, params)
+        entry = self.lookup(key)
+        if entry is not None:
+            value, fresh = entry
+            if fresh:
+                self.count('hit')
+            else:
+                self.count('stale')
+                self.refresh_in_background(key, ttl, fetch)
+            return value
+
+        self.count('miss')
+        return self.flights.do(key, lambda: self.load(key, ttl, fetch))
+
+    def count(self, result):
+        """ Count a lookup result ('hit', 'stale' or 'miss') in stats() and the metrics """
+        with self._stats_lock:
+            name = COUNTERS[result]
+            setattr(self, name, getattr(self, name) + 1)
+        record_cache(result)
+
+    def load(self, key, ttl, fetch):
+        """ Fetch and store a payload, holding the cross-worker lock when it is enabled """
+        if not self.distributed_lock or self.shared is None:
+            value = fetch()
+            self.set(key, value, ttl)
+            return value
+
+        lock_key = f'{key}:lock'
+        locked = self.shared.add(lock_key, 1, self.lock_timeout)
+        if not locked:
+            # Another worker is fetching this key: wait for its result in the shared tier
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline:
+                time.sleep(LOCK_POLL_INTERVAL)
+                value = self.get(key)
+                if value is not None:
+                    return value
+        try:
+            value = fetch()
+            self.set(key, value, ttl)
+            return value
+        finally:
+            # After a timed-out wait the lock is another worker's: leave it to expire or be released by it
+            if locked:
+                self.shared.delete(lock_key)
+
+    def reload(self, key, ttl, fetch):
+        """ Refresh a stale key, unless another worker or the pre-warmer already refreshed it in the shared tier """
+        if self.shared is not None:
+            stored = self.shared.get(key)
+            if stored is not None and stored['fresh_until'] > time.time():
+                return self.promote(key, stored)[0]
+        return self.load(key, ttl, fetch)
+
+    def remaining_ttl(self, base_url, params):
+        """ Seconds until the cached payload for a request goes stale (0 when stale or missing) """
+        key = self.make_key(base_url, params)
+        entry = self.local.get_entry(key)
+        if entry is not None and entry[1]:
+            return self.local.remaining(key)
+        if self.shared is not None:
+            stored = self.shared.get(key)
+            if stored is not None:
+                return max(0.0, stored['fresh_until'] - time.time())
+        return 0.0
+
+    async def aremaining_ttl(self, base_url, params):
+        key = self.make_key(base_url, params)
+        entry = self.local.get_entry(key)
+        if entry is not None and entry[1]:
+            return self.local.remaining(key)
+        if self.shared is not None:
+            stored = await self.shared.aget(key)
+            if stored is not None:
+                return max(0.0, stored['fresh_until'] - time.time())
+        return 0.0
+
+    def refresh(self, base_url, params, fetch):
+        """ Fetch and store a payload regardless of what is cached """
+        ttl = self.get_ttl(base_url)
+        key = self.make_key(base_url, params)
+        return self.flights.do(key, lambda: self.load(key, ttl, fetch))
+
+    def refresh_in_background(self, key, ttl, fetch):
+        """ Start one background refresh for a stale key on the upstream pool """
+        with self._refreshing_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                upstream.run_in_worker(self.flights.do, key, lambda: self.reload(key, ttl, fetch))
+            except Exception:
+                # Keep serving the stale value; the first request after it expires fetches again
+                pass
+            finally:
+                with self._refreshing_lock:
+                    self._refreshing.discard(key)
+
+        upstream.get_executor().submit(refresh)
+
+    async def aget_or_fetch(self, base_url, params, fetch):
+        """ Async variant of get_or_fetch; fetch is a coroutine function """
+        ttl = self.get_ttl(base_url)
+        if ttl <= 0:
+            return await fetch()
+
+        key = self.make_key(base_url, params)
+        entry = await self.alookup(key)
+        if entry is not None:
+            value, fresh = entry
+            if fresh:
+                self.count('hit')
+            else:
+                self.count('stale')
+                self.arefresh_in_background(key, ttl, fetch)
+            return value
+
+        self.count('miss')
+        return await self.flights.ado(key, lambda: self.aload(key, ttl, fetch))
+
+    async def aload(self, key, ttl, fetch):
+        value = await fetch()
+        await self.aset(key, value, ttl)
+        return value
+
+    async def areload(self, key, ttl, fetch):
+        if self.shared is not None:
+            stored = await self.shared.aget(key)
+            if stored is not None and stored['fresh_until'] > time.time():
+                return self.promote(key, stored)[0]
+        return await self.aload(key, ttl, fetch)
+
+    def arefresh_in_background(self, key, ttl, fetch):
+        """ Start one background refresh task for a stale key on the running event loop """
+        with self._refreshing_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        async def refresh():
+            try:
+                await self.flights.ado(key, lambda: self.areload(key, ttl, fetch))
+            except Exception:
+                pass
+            finally:
+                with self._refreshing_lock:
+                    self._refreshing.discard(key)
+
+        task = asyncio.get_running_loop().create_task(refresh())
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    def clear(self):
+        """ Drop every cached payload; the shared tier must be a dedicated cache alias """
+        self.local.clear()
+        if self.shared is not None:
+            self.shared.clear()
+        with self._stats_lock:
+            self.hits = self.stale_hits = self.misses = 0
+
+    def stats(self):
+        with self._stats_lock:
+            hits, stale_hits, misses = self.hits, self.stale_hits, self.misses
+        total = hits + stale_hits + misses
+        return {
+            'hits': hits,
+            'stale_hits': stale_hits,
+            'misses': misses,
+            'hit_rate': (hits + stale_hits) / total if total else 0.0,
+            'local_size': len(self.local),
+        }
+
+
+weather_cache = WeatherCache(
+    maxsize=settings.WEATHER_CACHE_MAXSIZE,
+    ttls=settings.WEATHER_CACHE_TTLS,
+    shared_alias=settings.WEATHER_CACHE_SHARED_ALIAS,
+    stale_ttl=settings.WEATHER_CACHE_STALE_TTL,
+    distributed_lock=settings.WEATHER_CACHE_DISTRIBUTED_LOCK,
+    lock_timeout=settings.WEATHER_CACHE_LOCK_TIMEOUT,
+)
@@ -0,0 +1,87 @@
+import hashlib
+import zlib
+from collections import namedtuple
+
+from django.conf import settings
+from django.http import HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+from weather_api.cache import weather_cache
+
+Validators = namedtuple('Validators', ['etag', 'last_modified', 'max_age'])
+
+
+def payload_version(data):
+    """ Identity of an upstream payload: current weather changes with its observation time, a forecast with its slots """
+    if 'dt' in data:
+        return str(data['dt'])
+    slots = [(entry.get('dt'), entry['main']['temp'], entry['weather'][0]['description'])
+             for entry in data.get('list', ())]
+    return format(zlib.crc32(repr(slots).encode()), '08x')
+
+
+def build_validators(request, payloads, max_age):
+    """
+    Validators of a response built from upstream payloads. The weak ETag covers the request URL, the
+    negotiated media type and every payload version; Last-Modified is the latest observation time.
+    """
+    digest = hashlib.blake2b(digest_size=12)
+    digest.update(request.get_full_path().encode())
+    digest.update(str(getattr(request, 'accepted_media_type', '')).encode())
+    for data in payloads:
+        digest.update(payload_version(data).encode())
+    observed = [data['dt'] for data in payloads if 'dt' in data]
+    return Validators(
+        etag=f'W/"{digest.hexdigest()}"',
+        last_modified=max(observed) if observed else None,
+        max_age=int(max_age),
+    )
+
+
+def is_not_modified(request, validators):
+    """ Whether the client's copy is current; If-None-Match takes precedence over If-Modified-Since """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        # Weak comparison: W/"x" and "x" match
+        return '*' in etags or validators.etag.removeprefix('W/') in {etag.removeprefix('W/') for etag in etags}
+    if_modified_since = parse_http_date_safe(request.META.get('HTTP_IF_MODIFIED_SINCE') or '')
+    return if_modified_since is not None and validators.last_modified is not None and \
+        validators.last_modified <= if_modified_since
+
+
+def apply_validators(response, validators):
+    """ Set ETag, Last-Modified and a Cache-Control max-age matching the data's remaining freshness """
+    response['ETag'] = validators.etag
+    if validators.last_modified is not None:
+        response['Last-Modified'] = http_date(validators.last_modified)
+    patch_cache_control(response, max_age=validators.max_age, **{settings.WEATHER_CACHE_CONTROL: True})
+    patch_vary_headers(response, ['Accept'])
+    return response
+
+
+def not_modified_response(validators):
+    return apply_validators(HttpResponseNotModified(), validators)
+
+
+class ConditionalResponseMixin:
+    """ Conditional GET for views answering from a single cached upstream payload """
+
+    def get_validated_data(self, request, base_url, params):
+        """
+        Return (data, validators). A fresh cached payload is validated before anything else happens, so a
+        matching If-None-Match costs neither an upstream call nor serialization; data is None in that case.
+        """
+        data = weather_cache.peek(base_url, params)
+        if data is None:
+            data = self.get_weather_data(base_url, params)
+        validators = build_validators(request, [data], weather_cache.remaining_ttl(base_url, params))
+        return (None if is_not_modified(request, validators) else data), validators
+
+    async def aget_validated_data(self, request, base_url, params):
+        data = await weather_cache.apeek(base_url, params)
+        if data is None:
+            data = await self.aget_weather_data(base_url, params)
+        validators = build_validators(request, [data], await weather_cache.aremaining_ttl(base_url, params))
+        return (None if is_not_modified(request, validators) else data), validators
@@ -0,0 +1,50 @@
+import json
+
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # orjson is optional: the stdlib json module is used instead
+    orjson = None
+
+HAS_ORJSON = orjson is not None
+
+# Same output as the stdlib path: UTC datetimes end in 'Z' like DRF's encoder renders them
+ORJSON_OPTIONS = orjson.OPT_UTC_Z if HAS_ORJSON else 0
+
+# DRF's encoder covers what orjson does not serialize natively (Decimal, timedelta, lazy strings, querysets...)
+encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+
+
+def stdlib_dumps(obj):
+    return encoder.encode(obj).encode('utf-8')
+
+
+def dumps(obj):
+    """ Compact UTF-8 JSON bytes of an object, through orjson when it is installed """
+    if HAS_ORJSON:
+        try:
+            return orjson.dumps(obj, default=encoder.default, option=ORJSON_OPTIONS)
+        except TypeError:
+            # Integers beyond 64 bits, non-string keys and the like are left to the stdlib
+            pass
+    return stdlib_dumps(obj)
+
+
+def loads(data):
+    """ Decode JSON bytes or str; raises ValueError on invalid input """
+    return orjson.loads(data) if HAS_ORJSON else json.loads(data)
+
+
+def response_json(response):
+    """
+    Decode the JSON body of a requests or httpx response. Bodies are UTF-8 in practice and decoded from
+    the raw bytes; anything else goes through the client's own decoding, which also raises its usual errors.
+    """
+    content = response.content
+    if HAS_ORJSON and isinstance(content, bytes):
+        try:
+            return orjson.loads(content)
+        except ValueError:
+            pass
+    return response.json()
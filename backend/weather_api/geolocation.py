@@ -0,0 +1,225 @@
+import csv
+import ipaddress
+import threading
+from array import array
+from bisect import bisect_right
+
+import httpx
+import requests
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from weather_api import async_upstream, fastjson, upstream
+from weather_api.cache import LRUCache
+
+
+# Cached for IPs that cannot be resolved, so they are not looked up again until the negative TTL expires
+UNRESOLVED = ()
+
+geo_cache = LRUCache(settings.WEATHER_GEOIP_CACHE_MAXSIZE)
+
+
+def parse_ip(ip):
+    """ Parse an IP address string, returning None when it is not a valid address """
+    try:
+        return ipaddress.ip_address((ip or '').strip())
+    except ValueError:
+        return None
+
+
+def is_public_ip(ip):
+    """ Private, loopback, link-local and reserved addresses can never be geolocated """
+    address = parse_ip(ip)
+    return address is not None and address.is_global
+
+
+def get_cache_key(ip):
+    """ Cache per IP, or per /24 (IPv4) and /48 (IPv6) prefix when WEATHER_GEOIP_CACHE_BY_PREFIX is on """
+    address = parse_ip(ip)
+    if not settings.WEATHER_GEOIP_CACHE_BY_PREFIX:
+        return f'geoip:{address}'
+    prefix = 24 if address.version == 4 else 48
+    return f'geoip:{ipaddress.ip_network(f"{address}/{prefix}", strict=False)}'
+
+
+def parse_loc(loc):
+    """ Convert an ipinfo 'lat,lon' string into a (latitude, longitude) tuple """
+    if not loc or ',' not in loc:
+        return None
+    latitude, longitude = loc.split(',', 1)
+    return latitude.strip(), longitude.strip()
+
+
+class IpinfoProvider:
+    """ Resolve client IPs over HTTP through ipinfo.io """
+
+    def lookup(self, ip):
+        """
+        Return (latitude, longitude) or None; raises requests.RequestException on transport errors and
+        error responses (e.g. 429), which must not be cached as an IP without a location
+        """
+        return self.parse_response(upstream.get(self.get_url(ip)))
+
+    async def alookup(self, ip):
+        """ Async lookup; raises httpx.HTTPError on transport errors and error responses """
+        return self.parse_response(await async_upstream.get(self.get_url(ip)))
+
+    @staticmethod
+    def get_url(ip):
+        return f'{settings.IPINFO_API_URL}/{ip}/json'
+
+    @staticmethod
+    def parse_response(response):
+        response.raise_for_status()
+        try:
+            data = fastjson.response_json(response)
+        except ValueError:
+            return None
+        return parse_loc(data.get('loc', ''))
+
+
+class RangeDatabaseProvider:
+    """
+    Resolve client IPs offline from a local CSV of IP ranges: start_ip,end_ip,latitude,longitude.
+    Ranges are kept in sorted typed arrays and searched with bisect.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or settings.WEATHER_GEOIP_DATABASE
+        self._tables = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _new_table(version):
+        # IPv4 bounds fit in unsigned 32-bit arrays; IPv6 bounds need arbitrary-size ints
+        bounds = (lambda: array('I')) if version == 4 else list
+        return {'starts': bounds(), 'ends': bounds(), 'lat': array('f'), 'lon': array('f')}
+
+    def load(self):
+        """ Load and sort the range table; called lazily on the first lookup """
+        rows = {4: [], 6: []}
+        with open(self.path, newline='') as db_file:
+            for row in csv.reader(db_file):
+                if not row or row[0].startswith('#'):
+                    continue
+                try:
+                    start, end = ipaddress.ip_address(row[0].strip()), ipaddress.ip_address(row[1].strip())
+                    rows[start.version].append((int(start), int(end), float(row[2]), float(row[3])))
+                except ValueError:
+                    # Skips the header line and malformed rows
+                    continue
+
+        tables = {}
+        for version, version_rows in rows.items():
+            version_rows.sort()
+            table = self._new_table(version)
+            for start, end, latitude, longitude in version_rows:
+                table['starts'].append(start)
+                table['ends'].append(end)
+                table['lat'].append(latitude)
+                table['lon'].append(longitude)
+            tables[version] = table
+        return tables
+
+    @property
+    def tables(self):
+        if self._tables is None:
+            with self._lock:
+                if self._tables is None:
+                    self._tables = self.load()
+        return self._tables
+
+    def lookup(self, ip):
+        """ Return (latitude, longitude) for the range containing the IP, or None """
+        address = parse_ip(ip)
+        if address is None:
+            return None
+        table = self.tables[address.version]
+        value = int(address)
+        index = bisect_right(table['starts'], value) - 1
+        if index < 0 or value > table['ends'][index]:
+            return None
+        return f"{table['lat'][index]:.4f}", f"{table['lon'][index]:.4f}"
+
+    async def alookup(self, ip):
+        """ Lookups are in-memory, so the async variant does not need to yield """
+        return self.lookup(ip)
+
+
+def build_providers():
+    """ Instantiate the providers listed in WEATHER_GEOIP_PROVIDERS, in fallback order """
+    return [import_string(path)() for path in settings.WEATHER_GEOIP_PROVIDERS]
+
+
+_providers = None
+
+
+def get_providers():
+    global _providers
+    if _providers is None:
+        _providers = build_providers()
+    return _providers
+
+
+def reset_providers():
+    global _providers
+    _providers = None
+
+
+def get_cached_location(ip):
+    """ Return (hit, location) from the cache; private addresses are a hit with no location """
+    if not is_public_ip(ip):
+        return True, None
+    cached = geo_cache.get(get_cache_key(ip))
+    if cached is None:
+        return False, None
+    return True, cached or None
+
+
+def cache_location(ip, location, failed):
+    """ Cache a resolved location, or negatively cache an IP that no provider could resolve """
+    if location:
+        geo_cache.set(get_cache_key(ip), location, settings.WEATHER_GEOIP_CACHE_TTL)
+    elif not failed:
+        # Transport errors are not cached: the next request retries the lookup
+        geo_cache.set(get_cache_key(ip), UNRESOLVED, settings.WEATHER_GEOIP_NEGATIVE_TTL)
+
+
+def resolve_location(ip):
+    """ Return (latitude, longitude) for a client IP, or None when it cannot be determined """
+    hit, location = get_cached_location(ip)
+    if hit:
+        return location
+
+    failed = False
+    for provider in get_providers():
+        try:
+            location = provider.lookup(ip)
+        except requests.RequestException:
+            failed = True
+            continue
+        if location:
+            break
+
+    cache_location(ip, location, failed)
+    return location
+
+
+async def aresolve_location(ip):
+    """ Async variant of resolve_location """
+    hit, location = get_cached_location(ip)
+    if hit:
+        return location
+
+    failed = False
+    for provider in get_providers():
+        try:
+            location = await provider.alookup(ip)
+        except (httpx.HTTPError, requests.RequestException):
+            failed = True
+            continue
+        if location:
+            break
+
+    cache_location(ip, location, failed)
+    return location
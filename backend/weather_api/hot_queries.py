@@ -0,0 +1,131 @@
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+SHARED_KEY = 'weather:hot_queries'
+
+
+class DecayingTopK:
+    """
+    Approximate top-K counter whose scores halve every half_life seconds.
+    Decay is applied lazily: new hits are weighted by exp(rate * age), so stored scores never need rescaling
+    until the weight grows large.
+    """
+
+    def __init__(self, half_life, capacity):
+        self.rate = math.log(2) / half_life
+        self.capacity = capacity
+        self.origin = time.time()
+        self.scores = {}
+        self._lock = threading.Lock()
+
+    def _weight(self, now):
+        return math.exp(self.rate * (now - self.origin))
+
+    def _rebase(self, now):
+        """ Fold the accumulated weight into the stored scores to keep floats in range """
+        factor = 1 / self._weight(now)
+        self.scores = {item: score * factor for item, score in self.scores.items()}
+        self.origin = now
+
+    def add(self, item, amount=1.0, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            if now - self.origin > 50 / self.rate:
+                self._rebase(now)
+            self.scores[item] = self.scores.get(item, 0.0) + amount * self._weight(now)
+            if len(self.scores) > 2 * self.capacity:
+                # Drop the long tail, keeping the capacity highest scores
+                top = sorted(self.scores.items(), key=lambda pair: pair[1], reverse=True)[:self.capacity]
+                self.scores = dict(top)
+
+    def top(self, k, now=None):
+        """ The k highest items with their scores decayed to now """
+        now = time.time() if now is None else now
+        with self._lock:
+            factor = 1 / self._weight(now)
+            ranked = sorted(self.scores.items(), key=lambda pair: pair[1], reverse=True)[:k]
+        return [(item, score * factor) for item, score in ranked]
+
+    def drain(self, now=None):
+        """ Return all items with decayed scores and reset the counter """
+        now = time.time() if now is None else now
+        with self._lock:
+            factor = 1 / self._weight(now)
+            scores = {item: score * factor for item, score in self.scores.items()}
+            self.scores = {}
+            self.origin = now
+        return scores
+
+
+class HotQueryTracker:
+    """
+    Tracks the most requested (kind, query) pairs of this worker and periodically merges them into a
+    snapshot in the shared cache, where the pre-warming worker reads them. Concurrent merges from several
+    workers may drop a few hits, which is acceptable for a popularity estimate.
+    """
+
+    def __init__(self, half_life, capacity, flush_interval, cache_alias):
+        self.half_life = half_life
+        self.capacity = capacity
+        self.flush_interval = flush_interval
+        self.cache_alias = cache_alias
+        self.local = DecayingTopK(half_life, capacity)
+        self.last_flush = time.monotonic()
+
+    @property
+    def shared(self):
+        return caches[self.cache_alias]
+
+    @property
+    def is_process_local(self):
+        """ Whether the snapshot lives in this process only, out of reach of other workers and commands """
+        return isinstance(self.shared, (LocMemCache, DummyCache))
+
+    def record(self, kind, query):
+        """ Count one request for a query; kind is the upstream endpoint ('weather' or 'forecast') """
+        query = ' '.join(str(query).split()).lower()
+        if not query:
+            return
+        self.local.add(f'{kind}:{query}')
+        if time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """ Merge the local counts into the shared snapshot """
+        self.last_flush = time.monotonic()
+        now = time.time()
+        deltas = self.local.drain(now)
+        if not deltas:
+            return
+        merged = self.decay(self.shared.get(SHARED_KEY), now)
+        for item, score in deltas.items():
+            merged[item] = merged.get(item, 0.0) + score
+        top = sorted(merged.items(), key=lambda pair: pair[1], reverse=True)[:self.capacity]
+        self.shared.set(SHARED_KEY, {'updated_at': now, 'scores': dict(top)}, None)
+
+    def decay(self, snapshot, now):
+        if not snapshot:
+            return {}
+        factor = 0.5 ** ((now - snapshot['updated_at']) / self.half_life)
+        return {item: score * factor for item, score in snapshot['scores'].items()}
+
+    def top(self, k):
+        """ The k most requested (kind, query, score) triples across all workers """
+        self.flush()
+        scores = self.decay(self.shared.get(SHARED_KEY), time.time())
+        ranked = sorted(scores.items(), key=lambda pair: pair[1], reverse=True)[:k]
+        return [(*item.split(':', 1), score) for item, score in ranked]
+
+
+hot_queries = HotQueryTracker(
+    half_life=settings.WEATHER_HOT_QUERIES_HALF_LIFE,
+    capacity=settings.WEATHER_HOT_QUERIES_CAPACITY,
+    flush_interval=settings.WEATHER_HOT_QUERIES_FLUSH_INTERVAL,
+    cache_alias=settings.WEATHER_HOT_QUERIES_CACHE_ALIAS,
+)
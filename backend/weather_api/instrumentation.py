@@ -0,0 +1,182 @@
+import contextvars
+import functools
+import inspect
+from contextlib import contextmanager
+from time import perf_counter
+from urllib.parse import urlsplit
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from weather_api.metrics import cache_lookups, phase_duration, request_duration, upstream_duration
+
+
+class RequestTimings:
+    """ Per-request phase durations, summed per phase, and notes such as the cache result """
+
+    def __init__(self):
+        self.phases = {}
+        self.notes = {}
+
+    def add(self, phase, duration, description=None):
+        # dict updates are atomic under the GIL, which is enough for the worker threads of one request
+        total, previous = self.phases.get(phase, (0.0, None))
+        self.phases[phase] = (total + duration, description if description is not None else previous)
+
+    def note(self, name, description):
+        self.notes[name] = description
+
+    def server_timing(self, total):
+        """ The Server-Timing header value, durations in milliseconds """
+        metrics = []
+        for phase, (duration, description) in self.phases.items():
+            metric = f'{phase};dur={duration * 1000:.1f}'
+            if description is not None:
+                metric += f';desc="{description}"'
+            metrics.append(metric)
+        metrics.extend(f'{name};desc="{description}"' for name, description in self.notes.items())
+        metrics.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(metrics)
+
+
+current_timings = contextvars.ContextVar('weather_request_timings', default=None)
+
+
+def record_phase(phase, duration, description=None):
+    """ Add time spent in a phase to the current request, if any """
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add(phase, duration, description)
+
+
+@contextmanager
+def timed(phase):
+    """ Record the time spent in the block as a phase of the current request """
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        record_phase(phase, perf_counter() - start)
+
+
+def instrument(phase):
+    """ Decorator recording every call of a function or coroutine function as a phase """
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                start = perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    record_phase(phase, perf_counter() - start)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record_phase(phase, perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def record_cache(result):
+    """ Count a response cache lookup ('hit', 'stale' or 'miss') and note it on the current request """
+    cache_lookups.inc(result)
+    timings = current_timings.get()
+    if timings is not None:
+        timings.note('cache', result)
+
+
+def upstream_service(url):
+    """ Metric name of the upstream API a URL belongs to """
+    host = urlsplit(url).netloc
+    if host == urlsplit(settings.OPENWEATHERMAP_API_URL).netloc:
+        return 'openweathermap'
+    if host == urlsplit(settings.IPINFO_API_URL).netloc:
+        return 'ipinfo'
+    return 'upstream'
+
+
+def record_upstream(url, status, duration):
+    """ Record an upstream call: its status is an HTTP code, or the exception name when it did not complete """
+    service = upstream_service(url)
+    upstream_duration.observe(duration, service, str(status))
+    record_phase(service, duration, status)
+
+
+def time_query(execute, sql, params, many, context):
+    """ Database execute wrapper adding query time to the 'db' phase """
+    start = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        record_phase('db', perf_counter() - start)
+
+
+def install_query_timer(sender=None, connection=None, **kwargs):
+    """ connection_created receiver wrapping every new database connection with time_query """
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+class ServerTimingMiddleware:
+    """
+    Time every request and its phases: JWT auth, database queries, upstream calls, cache lookups, the
+    extract_* transforms and rendering. Durations feed the Prometheus histograms of weather_api.metrics
+    and, with SERVER_TIMING on, a Server-Timing response header. Keep it first in MIDDLEWARE.
+    """
+    sync_capable = True
+    # Async requests must stay on the event loop: a sync-only middleware first in the chain would run the
+    # async views through async_to_sync, where their concurrent sync_to_async calls can deadlock
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        start = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.finish(request, response, timings, perf_counter() - start)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        start = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timings.reset(token)
+        return self.finish(request, response, timings, perf_counter() - start)
+
+    @staticmethod
+    def finish(request, response, timings, total):
+        """ Record the request in the histograms and add the Server-Timing header """
+        match = request.resolver_match
+        view = match.view_name if match is not None else 'unmatched'
+        request_duration.observe(total, view, request.method, str(response.status_code))
+        for phase, (duration, _) in timings.phases.items():
+            phase_duration.observe(duration, phase)
+
+        if settings.SERVER_TIMING:
+            response['Server-Timing'] = timings.server_timing(total)
+        return response
+
+    def process_template_response(self, request, response):
+        """ DRF responses are rendered after this hook: time that as the 'render' phase """
+        start = perf_counter()
+        response.add_post_render_callback(lambda rendered: record_phase('render', perf_counter() - start))
+        return response
@@ -0,0 +1,357 @@
+import csv
+import heapq
+import mmap
+import struct
+import threading
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import namedtuple
+from itertools import islice
+
+from django.conf import settings
+
+Location = namedtuple('Location', ['id', 'name', 'country', 'latitude', 'longitude', 'population'])
+
+# Packed index file: magic, row count, then the lat/lon/population columns and UTF-8 string columns
+PACKED_MAGIC = b'WLOCIDX1'
+PACKED_HEADER = struct.Struct('=8sI4x')
+STRING_COLUMNS = ('keys', 'names', 'countries')
+
+# Prefixes at least this long also match names one typo away
+TYPO_MIN_LENGTH = 3
+
+
+def fold(text):
+    """ Lowercase, strip accents and collapse whitespace: 'São  Paulo ' -> 'sao paulo' """
+    decomposed = unicodedata.normalize('NFKD', text)
+    return ' '.join(''.join(char for char in decomposed if not unicodedata.combining(char)).lower().split())
+
+
+def normalize_query(query):
+    """ Canonical spelling of a 'city[,state][,country]' or 'zip[,country]' query """
+    return ','.join(part for part in (fold(part) for part in str(query).split(',')) if part)
+
+
+def tidy_query(query):
+    """ Collapse whitespace and drop empty comma parts, keeping the spelling: ' Łódź ,  PL' -> 'Łódź,PL' """
+    return ','.join(part for part in (' '.join(part.split()) for part in str(query).split(',')) if part)
+
+
+def split_query(query):
+    """ (name, country) of a normalized query; a middle state part is ignored """
+    parts = query.split(',')
+    country = parts[-1] if len(parts) > 1 and len(parts[-1]) == 2 else ''
+    return parts[0], country
+
+
+def is_zip_query(query):
+    return any(char.isdigit() for char in query.split(',', 1)[0])
+
+
+def load_csv(path):
+    """ Read a city list CSV (name,country,latitude,longitude,population) into a table """
+    rows = []
+    with open(path, newline='', encoding='utf-8') as cities_file:
+        for row in csv.DictReader(cities_file):
+            try:
+                rows.append((fold(row['name']), -int(row['population'] or 0), row['name'].strip(),
+                             row['country'].strip().upper(), float(row['latitude']), float(row['longitude'])))
+            except (KeyError, TypeError, ValueError):
+                # Skips malformed rows
+                continue
+    return build_table(rows)
+
+
+def build_table(rows):
+    """ Column table sorted by folded name, then by descending population; names are searched as UTF-8 keys """
+    rows.sort()
+    table = {'keys': [], 'names': [], 'countries': [], 'lat': array('d'), 'lon': array('d'),
+             'population': array('Q')}
+    for key, population, name, country, latitude, longitude in rows:
+        table['keys'].append(key.encode('utf-8'))
+        table['names'].append(name)
+        table['countries'].append(country)
+        table['lat'].append(latitude)
+        table['lon'].append(longitude)
+        table['population'].append(-population)
+    table['maxima'] = build_maxima(table['population'])
+    return table
+
+
+def sparse_levels(count):
+    return count.bit_length()
+
+
+def build_maxima(population):
+    """
+    Sparse table for range-maximum queries: level j holds, for every row i, the most populous row of
+    [i, i + 2**j). Levels are stored one after another, `count` entries each.
+    """
+    count = len(population)
+    maxima = array('I', range(count))
+    for level in range(1, sparse_levels(count)):
+        half = 1 << (level - 1)
+        previous = (level - 1) * count
+        for index in range(count):
+            left = maxima[previous + index]
+            right = maxima[previous + min(index + half, count - 1)]
+            maxima.append(right if population[right] > population[left] else left)
+    return maxima
+
+
+class PackedBytes:
+    """ Read-only sequence of byte strings sliced on access from an offsets array and a mapped blob """
+
+    def __init__(self, offsets, mapped, base):
+        self.offsets = offsets
+        self.mapped = mapped
+        self.base = base
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        # Slicing the mmap itself is several times faster than going through a memoryview
+        return self.mapped[self.base + self.offsets[index]:self.base + self.offsets[index + 1]]
+
+
+class PackedStrings(PackedBytes):
+    """ PackedBytes decoded as UTF-8 """
+
+    def __getitem__(self, index):
+        return super().__getitem__(index).decode('utf-8')
+
+
+def write_packed(table, path):
+    """
+    Write a table as a packed index file, including its range-maximum table. Reading it maps the file
+    instead of building Python objects, so every worker on the host shares one copy through the page
+    cache. Uses native byte order.
+    """
+    columns = [array('d', table['lat']), array('d', table['lon']), array('Q', table['population']),
+               array('I', table['maxima'])]
+    blobs = []
+    for column in STRING_COLUMNS:
+        encoded = [value if isinstance(value, bytes) else value.encode('utf-8') for value in table[column]]
+        offsets = array('I', [0])
+        for value in encoded:
+            offsets.append(offsets[-1] + len(value))
+        columns.append(offsets)
+        blobs.append(b''.join(encoded))
+
+    with open(path, 'wb') as index_file:
+        index_file.write(PACKED_HEADER.pack(PACKED_MAGIC, len(table['keys'])))
+        for column in columns:
+            index_file.write(column.tobytes())
+        for blob in blobs:
+            index_file.write(blob)
+
+
+def load_packed(path):
+    """ Map a packed index file and expose its columns as zero-copy views, except for the search keys """
+    with open(path, 'rb') as index_file:
+        mapped = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    _, count = PACKED_HEADER.unpack_from(view)
+    position = PACKED_HEADER.size
+
+    def take(typecode, length):
+        nonlocal position
+        end = position + length * array(typecode).itemsize
+        column = view[position:end].cast(typecode)
+        position = end
+        return column
+
+    table = {'lat': take('d', count), 'lon': take('d', count), 'population': take('Q', count),
+             'maxima': take('I', count * sparse_levels(count))}
+    offsets = [take('I', count + 1) for _ in STRING_COLUMNS]
+    for column, column_offsets in zip(STRING_COLUMNS, offsets):
+        table[column] = (PackedBytes if column == 'keys' else PackedStrings)(column_offsets, mapped, position)
+        position += column_offsets[count]
+    # Bisect compares keys a few hundred times per lookup; a per-process list of them (a few MB for
+    # every city of the world) keeps that off the slow mapped path while the other columns stay shared
+    table['keys'] = list(table['keys'])
+    return table
+
+
+class LocationIndex:
+    """
+    In-memory index of a city list CSV (name,country,latitude,longitude,population) or of a packed index
+    file built from one with `manage.py build_location_index`. Folded names are kept sorted next to typed
+    coordinate and population columns, so exact and prefix lookups are bisect ranges and the most populous
+    rows of a range come out of a sparse table in O(limit log limit).
+    """
+
+    def __init__(self, path=None):
+        self.path = settings.WEATHER_LOCATIONS_FILE if path is None else path
+        self._table = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """ Load the city list or packed index; called lazily on the first lookup """
+        if not self.path:
+            return build_table([])
+        with open(self.path, 'rb') as index_file:
+            packed = index_file.read(len(PACKED_MAGIC)) == PACKED_MAGIC
+        return load_packed(self.path) if packed else load_csv(self.path)
+
+    @property
+    def table(self):
+        if self._table is None:
+            with self._lock:
+                if self._table is None:
+                    self._table = self.load()
+        return self._table
+
+    def __len__(self):
+        return len(self.table['keys'])
+
+    def location(self, index):
+        table = self.table
+        return Location(
+            id=f"{table['keys'][index].decode('utf-8')},{table['countries'][index].lower()}",
+            name=table['names'][index],
+            country=table['countries'][index],
+            latitude=table['lat'][index],
+            longitude=table['lon'][index],
+            population=table['population'][index],
+        )
+
+    def prefix_range(self, prefix, start=0, end=None):
+        keys = self.table['keys']
+        end = len(keys) if end is None else end
+        start = bisect_left(keys, prefix, start, end)
+        # 0xff never occurs in UTF-8, so it sorts after every key starting with the prefix
+        return start, bisect_left(keys, prefix + b'\xff', start, end)
+
+    def range_max(self, start, end):
+        """ The most populous row of [start, end); ties go to the first row """
+        table = self.table
+        count = len(table['keys'])
+        level = (end - start).bit_length() - 1
+        left = table['maxima'][level * count + start]
+        right = table['maxima'][level * count + end - (1 << level)]
+        return right if table['population'][right] > table['population'][left] else left
+
+    def iter_by_population(self, *ranges):
+        """ Rows of the given (start, end) ranges from the most to the least populous """
+        population = self.table['population']
+
+        def entry(low, high):
+            index = self.range_max(low, high)
+            return -population[index], index, low, high
+
+        heap = [entry(start, end) for start, end in ranges if start < end]
+        heapq.heapify(heap)
+        while heap:
+            _, index, low, high = heapq.heappop(heap)
+            yield index
+            if low < index:
+                heapq.heappush(heap, entry(low, index))
+            if index + 1 < high:
+                heapq.heappush(heap, entry(index + 1, high))
+
+    def branches(self, prefix, start, end):
+        """ (byte, start, end) of every distinct byte that follows the prefix in its range """
+        keys = self.table['keys']
+        depth = len(prefix)
+        while start < end:
+            key = keys[start]
+            if len(key) == depth:
+                start += 1
+                continue
+            branch_end = bisect_left(keys, key[:depth + 1] + b'\xff', start, end)
+            yield key[depth:depth + 1], start, branch_end
+            start = branch_end
+
+    def typo_ranges(self, name):
+        """
+        Disjoint index ranges of names starting one typo (deletion, swap, substitution or insertion) away
+        from the prefix, keeping its first character. Typos are edits of the UTF-8 key, which is plain ASCII
+        for most folded names. Every variant shares a head with the prefix, so it is searched within the
+        head's range, and substitutions and insertions only try bytes that actually follow that head.
+        """
+        ranges = set()
+        start, end = 0, len(self.table['keys'])
+        for i in range(1, len(name) + 1):
+            head = name[:i]
+            start, end = self.prefix_range(head, start, end)
+            if start == end:
+                break
+            if i < len(name):
+                ranges.add(self.prefix_range(head + name[i + 1:], start, end))
+            if i + 1 < len(name):
+                ranges.add(self.prefix_range(head + name[i + 1:i + 2] + name[i:i + 1] + name[i + 2:], start, end))
+            for byte, branch_start, branch_end in self.branches(head, start, end):
+                tails = {name[i + 1:], name[i:]} if i < len(name) else {b''}
+                ranges.update(self.prefix_range(head + byte + tail, branch_start, branch_end) for tail in tails)
+
+        # Prefix ranges are either nested or disjoint: keep the outermost ones
+        disjoint = []
+        for start, end in sorted(ranges, key=lambda bounds: (bounds[0], -bounds[1])):
+            if start < end and (not disjoint or start >= disjoint[-1][1]):
+                disjoint.append((start, end))
+        return disjoint
+
+    def resolve(self, query):
+        """
+        The Location of a city query, or None. Without a country the most populous city of that name wins,
+        so 'london' resolves to London, GB.
+        """
+        name, country = split_query(normalize_query(query))
+        if not name:
+            return None
+        name = name.encode('utf-8')
+        keys = self.table['keys']
+        start = bisect_left(keys, name)
+        # Rows of one name are sorted by descending population
+        for index in range(start, len(keys)):
+            if keys[index] != name:
+                break
+            if not country or self.table['countries'][index].lower() == country:
+                return self.location(index)
+        return None
+
+    def complete(self, prefix, limit=10):
+        """
+        Up to `limit` locations whose name starts with the prefix, most populous first. When that leaves
+        room, names whose start is one typo away from a prefix of TYPO_MIN_LENGTH+ characters follow.
+        """
+        name, country = split_query(normalize_query(prefix))
+        if not name:
+            return []
+        name = name.encode('utf-8')
+        countries = self.table['countries']
+
+        def best(ranges, count, exclude=()):
+            rows = (index for index in self.iter_by_population(*ranges) if index not in exclude)
+            if country:
+                rows = (index for index in rows if countries[index].lower() == country)
+            return list(islice(rows, count))
+
+        found = best([self.prefix_range(name)], limit)
+
+        if len(found) < limit and len(name) >= TYPO_MIN_LENGTH:
+            found += best(self.typo_ranges(name), limit - len(found), exclude=set(found))
+
+        return [self.location(index) for index in found]
+
+
+location_index = LocationIndex()
+
+
+def location_params(query):
+    """
+    The location part of the upstream params for a query: indexed cities become their canonical
+    'Name,CC' so every spelling shares one upstream call and cache key; anything else is passed on as
+    typed with its spacing tidied, as a zip code when it contains digits. Folding is only used to look
+    the index up, since it changes letters ('Київ' -> 'киів'). State-qualified queries are left to upstream.
+    """
+    normalized = normalize_query(query)
+    if is_zip_query(normalized):
+        return {'zip': tidy_query(query)}
+    location = location_index.resolve(normalized) if normalized.count(',') < 2 else None
+    if location is not None:
+        return {'q': f'{location.name},{location.country}'}
+    return {'q': tidy_query(query)}
@@ -0,0 +1,26 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from weather_api.locations import load_csv, write_packed
+
+
+class Command(BaseCommand):
+    """ Pack a city list CSV into an index file that workers memory-map instead of parsing """
+    help = 'Build a packed location index from a city list CSV'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='path of the packed index file to write')
+        parser.add_argument('--source', default=settings.WEATHER_LOCATIONS_FILE,
+                            help='city list CSV (name,country,latitude,longitude,population)')
+
+    def handle(self, *args, **options):
+        source = options['source']
+        if not source or not os.path.exists(source):
+            raise CommandError(f'City list not found: {source!r}')
+
+        table = load_csv(source)
+        write_packed(table, options['output'])
+        self.stdout.write(f"Packed {len(table['keys'])} locations into {options['output']}; "
+                          f"set WEATHER_LOCATIONS_FILE to use it")
@@ -0,0 +1,60 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from weather_api.cache import weather_cache
+from weather_api.hot_queries import hot_queries
+from weather_api.views import WeatherDataMixin
+
+
+class Command(BaseCommand):
+    """ Refresh the most requested current weather and forecast queries before their cache entries go stale """
+    help = 'Keep the response cache warm for the most requested cities'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--top', type=int, default=settings.WEATHER_PREWARM_TOP,
+                            help='number of hot queries to keep warm')
+        parser.add_argument('--lead-time', type=int, default=settings.WEATHER_PREWARM_LEAD_TIME,
+                            help='refresh entries that go stale within this many seconds')
+        parser.add_argument('--calls-per-minute', type=int, default=settings.WEATHER_PREWARM_CALLS_PER_MINUTE,
+                            help='upstream call budget; calls are spread evenly over the minute')
+        parser.add_argument('--interval', type=int, default=30, help='seconds between scans')
+        parser.add_argument('--once', action='store_true', help='run a single scan and exit')
+        parser.add_argument('--allow-local-cache', action='store_true',
+                            help='run even though hot queries are kept in a process-local cache')
+
+    def handle(self, *args, **options):
+        if hot_queries.is_process_local and not options['allow_local_cache']:
+            # The web workers count hot queries in their own memory: this process would never see any
+            raise CommandError(
+                f'WEATHER_HOT_QUERIES_CACHE_ALIAS ({hot_queries.cache_alias!r}) is a process-local cache: '
+                f'point it at a cache shared with the web workers (e.g. Redis or Memcached)')
+        if weather_cache.shared is None:
+            self.stderr.write(self.style.WARNING(
+                'WEATHER_CACHE_SHARED_ALIAS is not set: refreshed entries stay in this process only'))
+
+        pause = 60 / max(1, options['calls_per_minute'])
+        while True:
+            refreshed = self.scan(options['top'], options['lead_time'], pause)
+            self.stdout.write(f'Refreshed {refreshed} hot queries')
+            if options['once']:
+                return
+            time.sleep(options['interval'])
+
+    def scan(self, top, lead_time, pause):
+        """ Refresh every hot query whose entry goes stale within lead_time, one call per pause """
+        refreshed = 0
+        for kind, query, _ in hot_queries.top(top):
+            base_url = f'{settings.OPENWEATHERMAP_API_URL}/{kind}'
+            params = WeatherDataMixin.get_query_params(query)
+            if weather_cache.remaining_ttl(base_url, params) > lead_time:
+                continue
+            try:
+                weather_cache.refresh(base_url, params,
+                                      lambda: WeatherDataMixin.fetch_weather_data(base_url, params))
+                refreshed += 1
+            except Exception as e:
+                self.stderr.write(f'Could not refresh {kind} {query!r}: {e}')
+            time.sleep(pause)
+        return refreshed
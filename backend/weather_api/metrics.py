@@ -0,0 +1,165 @@
+import hmac
+import ipaddress
+import threading
+from bisect import bisect_left
+
+from django.conf import settings
+from django.http import HttpResponse
+
+# Upper bounds in seconds, from cache-hit fast paths to slow upstream calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def format_labels(labelnames, values):
+    if not labelnames:
+        return ''
+    pairs = (f'{name}="{escape_label(value)}"' for name, value in zip(labelnames, values))
+    return '{' + ','.join(pairs) + '}'
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """ Monotonic counter with a fixed set of label names """
+    kind = 'counter'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels):
+        return self._values.get(labels, 0)
+
+    def samples(self):
+        with self._lock:
+            values = sorted(self._values.items())
+        for labels, value in values:
+            yield f'{self.name}{format_labels(self.labelnames, labels)} {format_value(value)}'
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram:
+    """
+    Histogram with fixed buckets. Observations only bump one bucket counter under a lock; buckets are made
+    cumulative when the metric is exported.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                # One counter per bucket plus +Inf, then the sum of observed values
+                series = self._series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, *labels):
+        series = self._series.get(labels)
+        return sum(series[:-1]) if series is not None else 0
+
+    def samples(self):
+        with self._lock:
+            series = sorted((labels, list(values)) for labels, values in self._series.items())
+        for labels, values in series:
+            cumulative = 0
+            for bound, observed in zip(self.buckets + (float('inf'),), values):
+                cumulative += observed
+                le = '+Inf' if bound == float('inf') else format_value(bound)
+                bucket_labels = format_labels(self.labelnames + ('le',), labels + (le,))
+                yield f'{self.name}_bucket{bucket_labels} {cumulative}'
+            suffix = format_labels(self.labelnames, labels)
+            yield f'{self.name}_sum{suffix} {format_value(values[-1])}'
+            yield f'{self.name}_count{suffix} {cumulative}'
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class Registry:
+    """ The metrics of this process, exported in the Prometheus text format """
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def export(self):
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+    def clear(self):
+        for metric in self.metrics:
+            metric.clear()
+
+
+registry = Registry()
+
+request_duration = registry.register(Histogram(
+    'weather_http_request_duration_seconds', 'Time spent serving requests, by view, method and status.',
+    ('view', 'method', 'status')))
+phase_duration = registry.register(Histogram(
+    'weather_request_phase_duration_seconds', 'Time a request spent in each phase (auth, db, upstream, ...).',
+    ('phase',)))
+upstream_duration = registry.register(Histogram(
+    'weather_upstream_request_duration_seconds', 'Upstream API calls including retries, by service and status.',
+    ('service', 'status')))
+cache_lookups = registry.register(Counter(
+    'weather_cache_lookups_total', 'Weather response cache lookups, by result.', ('result',)))
+
+
+def from_allowed_network(request):
+    """ Whether the peer address is in METRICS_ALLOWED_NETWORKS; forwarded headers are not trusted """
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network, strict=False) for network in settings.METRICS_ALLOWED_NETWORKS)
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint. Metrics are per process: scrape every worker, or run a single one. Scrapes
+    must send METRICS_TOKEN as a bearer token or come from METRICS_ALLOWED_NETWORKS; nothing else gets in.
+    """
+    if not from_allowed_network(request):
+        if not settings.METRICS_TOKEN:
+            return HttpResponse(status=403)
+        supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if not hmac.compare_digest(supplied.encode(), settings.METRICS_TOKEN.encode()):
+            return HttpResponse(status=401)
+    return HttpResponse(registry.export(), content_type=PROMETHEUS_CONTENT_TYPE)
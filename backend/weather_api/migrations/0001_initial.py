@@ -0,0 +1,65 @@
+# Generated by Django 4.2.7 on 2026-10-18 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ForecastSlot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location', models.CharField(help_text="Normalized 'city,country' key", max_length=150)),
+                ('city', models.CharField(max_length=100)),
+                ('country', models.CharField(max_length=2)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('forecast_for', models.DateTimeField()),
+                ('temperature', models.FloatField()),
+                ('description', models.CharField(max_length=100)),
+                ('fetched_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Forecast slot',
+                'verbose_name_plural': 'Forecast slots',
+            },
+        ),
+        migrations.CreateModel(
+            name='Observation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('location', models.CharField(help_text="Normalized 'city,country' key", max_length=150)),
+                ('city', models.CharField(max_length=100)),
+                ('country', models.CharField(max_length=2)),
+                ('latitude', models.FloatField(blank=True, null=True)),
+                ('longitude', models.FloatField(blank=True, null=True)),
+                ('observed_at', models.DateTimeField()),
+                ('temperature', models.FloatField()),
+                ('description', models.CharField(max_length=100)),
+                ('fetched_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'Observation',
+                'verbose_name_plural': 'Observations',
+                'indexes': [models.Index(fields=['latitude', 'longitude', 'observed_at'], name='observation_coords_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='observation',
+            constraint=models.UniqueConstraint(fields=('location', 'observed_at'), name='unique_observation_per_time'),
+        ),
+        migrations.AddIndex(
+            model_name='forecastslot',
+            index=models.Index(fields=['location', 'fetched_at'], name='forecast_fetched_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='forecastslot',
+            constraint=models.UniqueConstraint(fields=('location', 'forecast_for'), name='unique_forecast_slot'),
+        ),
+    ]
@@ -1,3 +1,57 @@
 from django.db import models
 
-# Create your models here.
+
+class Observation(models.Model):
+    """ Current weather observed at a location, as returned by OpenWeatherMap """
+    location = models.CharField(max_length=150, help_text="Normalized 'city,country' key")
+    city = models.CharField(max_length=100)
+    country = models.CharField(max_length=2)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    observed_at = models.DateTimeField()
+    temperature = models.FloatField()
+    description = models.CharField(max_length=100)
+    fetched_at = models.DateTimeField()
+
+    def __str__(self):
+        """ String representation """
+        return f'{self.city}, {self.country} at {self.observed_at:%Y-%m-%d %H:%M}'
+
+    class Meta:
+        """ Representation in admin panel """
+        verbose_name = 'Observation'
+        verbose_name_plural = 'Observations'
+        constraints = [
+            models.UniqueConstraint(fields=['location', 'observed_at'], name='unique_observation_per_time'),
+        ]
+        indexes = [
+            models.Index(fields=['latitude', 'longitude', 'observed_at'], name='observation_coords_idx'),
+        ]
+
+
+class ForecastSlot(models.Model):
+    """ One 3-hour forecast slot for a location; refreshed in place when a newer forecast is fetched """
+    location = models.CharField(max_length=150, help_text="Normalized 'city,country' key")
+    city = models.CharField(max_length=100)
+    country = models.CharField(max_length=2)
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    forecast_for = models.DateTimeField()
+    temperature = models.FloatField()
+    description = models.CharField(max_length=100)
+    fetched_at = models.DateTimeField()
+
+    def __str__(self):
+        """ String representation """
+        return f'{self.city}, {self.country} for {self.forecast_for:%Y-%m-%d %H:%M}'
+
+    class Meta:
+        """ Representation in admin panel """
+        verbose_name = 'Forecast slot'
+        verbose_name_plural = 'Forecast slots'
+        constraints = [
+            models.UniqueConstraint(fields=['location', 'forecast_for'], name='unique_forecast_slot'),
+        ]
+        indexes = [
+            models.Index(fields=['location', 'fetched_at'], name='forecast_fetched_idx'),
+        ]
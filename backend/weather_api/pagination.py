@@ -0,0 +1,13 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class HistoryCursorPagination(CursorPagination):
+    """
+    Keyset pagination over a unique, ordered column: each page continues with `WHERE column > last seen`,
+    so deep pages cost the same as the first one. The view sets `ordering` per request.
+    """
+    page_size = settings.WEATHER_HISTORY_PAGE_SIZE
+    page_size_query_param = 'limit'
+    max_page_size = settings.WEATHER_HISTORY_MAX_PAGE_SIZE
+    ordering = 'observed_at'
@@ -0,0 +1,148 @@
+import asyncio
+import math
+import threading
+import time
+
+import requests
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import UserRateThrottle
+
+
+class UpstreamRateLimited(requests.RequestException):
+    """ The OpenWeatherMap call budget is exhausted; retry_after is the whole seconds until the next call """
+
+    def __init__(self, *args, retry_after=1, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """ Process-local token bucket: `rate` tokens per `period` seconds, holding at most `burst` tokens """
+
+    def __init__(self, rate, period=60, burst=None):
+        self.rate = rate
+        self.period = period
+        self.capacity = burst or rate
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate / self.period)
+        self.updated_at = now
+
+    def try_acquire(self):
+        """ Take a token if one is available; otherwise return the seconds until the next one """
+        with self._lock:
+            self._refill(time.monotonic())
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) * self.period / self.rate
+
+
+class SharedWindowCounter:
+    """
+    Budget shared by every worker through the Django cache. Django's cache API has no compare-and-set,
+    so this is a fixed window counter built on the atomic add()/incr() pair rather than a token bucket.
+    """
+
+    def __init__(self, rate, period=60, cache_alias='default'):
+        self.rate = rate
+        self.period = period
+        self.cache_alias = cache_alias
+
+    def try_acquire(self):
+        now = time.time()
+        window = int(now // self.period)
+        key = f'weather:ratelimit:{window}'
+        cache = caches[self.cache_alias]
+        cache.add(key, 0, self.period * 2)
+        try:
+            used = cache.incr(key)
+        except ValueError:
+            # The key expired between add() and incr()
+            cache.add(key, 1, self.period * 2)
+            used = 1
+        if used <= self.rate:
+            return 0.0
+        return (window + 1) * self.period - now
+
+
+class UpstreamRateLimiter:
+    """ Governs OpenWeatherMap calls: waits up to max_wait for budget, then raises UpstreamRateLimited """
+
+    def __init__(self, bucket, max_wait):
+        self.bucket = bucket
+        self.max_wait = max_wait
+        self.allowed = 0
+        self.delayed = 0
+        self.rejected = 0
+
+    def acquire(self, max_wait=None):
+        max_wait = self.max_wait if max_wait is None else max_wait
+        deadline = time.monotonic() + max_wait
+        waited = False
+        while True:
+            wait = self.bucket.try_acquire()
+            if not wait:
+                self.allowed += 1
+                self.delayed += waited
+                return
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.rejected += 1
+                raise UpstreamRateLimited('OpenWeatherMap call budget exhausted, try again later',
+                                          retry_after=max(1, math.ceil(wait)))
+            waited = True
+            time.sleep(min(wait, remaining))
+
+    async def aacquire(self, max_wait=None):
+        max_wait = self.max_wait if max_wait is None else max_wait
+        deadline = time.monotonic() + max_wait
+        waited = False
+        while True:
+            wait = self.bucket.try_acquire()
+            if not wait:
+                self.allowed += 1
+                self.delayed += waited
+                return
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self.rejected += 1
+                raise UpstreamRateLimited('OpenWeatherMap call budget exhausted, try again later',
+                                          retry_after=max(1, math.ceil(wait)))
+            waited = True
+            await asyncio.sleep(min(wait, remaining))
+
+    def stats(self):
+        return {
+            'limit_per_minute': settings.OPENWEATHERMAP_CALLS_PER_MINUTE,
+            'mode': settings.WEATHER_RATE_LIMIT_MODE,
+            'allowed': self.allowed,
+            'delayed': self.delayed,
+            'rejected': self.rejected,
+        }
+
+
+def build_limiter():
+    rate = settings.OPENWEATHERMAP_CALLS_PER_MINUTE
+    if settings.WEATHER_RATE_LIMIT_MODE == 'shared':
+        bucket = SharedWindowCounter(rate, cache_alias=settings.WEATHER_RATE_LIMIT_CACHE_ALIAS)
+    else:
+        bucket = TokenBucket(rate, burst=settings.WEATHER_RATE_LIMIT_BURST)
+    return UpstreamRateLimiter(bucket, settings.WEATHER_RATE_LIMIT_MAX_WAIT)
+
+
+upstream_limiter = build_limiter()
+
+
+class WeatherUserRateThrottle(UserRateThrottle):
+    """ Per-user limit on the weather endpoints so a single client cannot spend the shared quota """
+    scope = 'weather'
+
+
+class LocationsUserRateThrottle(UserRateThrottle):
+    """ Per-user limit on autocomplete, which is called on every keystroke and never spends upstream quota """
+    scope = 'locations'
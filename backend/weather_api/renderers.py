@@ -0,0 +1,67 @@
+from django.http import HttpResponse, StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from weather_api import fastjson
+
+NDJSON_MEDIA_TYPE = 'application/x-ndjson'
+
+
+def to_ndjson_line(item):
+    """ Encode one item as a newline-terminated UTF-8 JSON line """
+    return fastjson.dumps(item) + b'\n'
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer that encodes with orjson when it is installed. Requests for indented output, and
+    ASCII-only or non-compact settings, are rendered by the stdlib encoder as before.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (not fastjson.HAS_ORJSON or self.ensure_ascii or not self.compact
+                or self.get_indent(accepted_media_type, renderer_context or {})):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = fastjson.dumps(data)
+        # Escaped like JSONRenderer does, so the output stays valid JavaScript
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class FastJsonResponse(HttpResponse):
+    """ Django JsonResponse counterpart for plain (non-DRF) views, encoded with orjson when installed """
+
+    def __init__(self, data, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=fastjson.dumps(data), **kwargs)
+
+
+class NDJSONRenderer(BaseRenderer):
+    """ Newline-delimited JSON: one line per list item, or a single line for any other payload """
+    media_type = NDJSON_MEDIA_TYPE
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        items = data if isinstance(data, list) else [data]
+        return b''.join(to_ndjson_line(item) for item in items)
+
+
+class NDJSONStreamMixin:
+    """ Opt-in NDJSON streaming for views returning many items (Accept: application/x-ndjson or ?stream=1) """
+
+    @staticmethod
+    def wants_stream(request):
+        if request.query_params.get('stream', '').lower() in ('1', 'true', 'yes'):
+            return True
+        renderer = getattr(request, 'accepted_renderer', None)
+        return renderer is not None and renderer.media_type == NDJSON_MEDIA_TYPE
+
+    @staticmethod
+    def stream_response(items):
+        """ Emit every item as soon as the iterable produces it """
+        return StreamingHttpResponse((to_ndjson_line(item) for item in items), content_type=NDJSON_MEDIA_TYPE)
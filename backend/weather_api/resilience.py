@@ -0,0 +1,208 @@
+import asyncio
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+import httpx
+import requests
+from django.conf import settings
+
+
+class CircuitOpenError(requests.RequestException):
+    """ The upstream host failed repeatedly and calls to it are rejected until the breaker resets """
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker: opens after `threshold` consecutive failures, rejects calls for
+    `reset_timeout` seconds, then lets a single half-open probe through to decide whether to close.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, threshold, reset_timeout):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """ Whether a call may go out now """
+        with self._lock:
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._probing = False
+            if self.state == self.HALF_OPEN:
+                if self._probing:
+                    return False
+                self._probing = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self._probing = False
+
+    def release_probe(self):
+        """ Give up a half-open probe that ended without telling anything about the host, e.g. when cancelled """
+        with self._lock:
+            self._probing = False
+
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+def get_breaker(url):
+    """ The breaker of the URL's host, created on first use """
+    host = urlsplit(url).netloc
+    breaker = _breakers.get(host)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.setdefault(
+                host, CircuitBreaker(settings.UPSTREAM_BREAKER_THRESHOLD, settings.UPSTREAM_BREAKER_RESET_TIMEOUT))
+    return breaker
+
+
+def reset_breakers():
+    with _breakers_lock:
+        _breakers.clear()
+
+
+def backoff_delay(attempt):
+    """ Exponential backoff with full jitter """
+    return random.uniform(0, min(settings.UPSTREAM_RETRY_BACKOFF_MAX, settings.UPSTREAM_RETRY_BACKOFF * 2 ** attempt))
+
+
+def retry_after(response):
+    """ Seconds asked for by a numeric Retry-After header, or None """
+    try:
+        return max(0.0, float(response.headers.get('Retry-After')))
+    except (TypeError, ValueError):
+        return None
+
+
+def retry_delay(attempt, response):
+    """
+    Seconds to wait before the next attempt, or None to stop retrying: a 429 is retried after its Retry-After
+    when it fits within UPSTREAM_RETRY_BACKOFF_MAX, other failures with jittered backoff
+    """
+    if response is not None and response.status_code == 429:
+        delay = retry_after(response)
+        if delay is not None:
+            return delay if delay <= settings.UPSTREAM_RETRY_BACKOFF_MAX else None
+    return backoff_delay(attempt)
+
+
+def get_with_retries(url, send, before_attempt=None):
+    """
+    Call send() (an idempotent GET) through the host's breaker, retrying transport errors, 5xx and 429
+    responses with jittered backoff. The last response is returned when retries run out on an HTTP error.
+    before_attempt() runs ahead of every attempt the breaker lets through, e.g. to take a token of an upstream
+    call budget.
+    """
+    breaker = get_breaker(url)
+    retries = settings.UPSTREAM_RETRIES
+    for attempt in range(retries + 1):
+        if not breaker.allow():
+            raise CircuitOpenError(f'Circuit open for {urlsplit(url).netloc}')
+        if before_attempt is not None:
+            try:
+                before_attempt()
+            except BaseException:
+                # Nothing went out: hand a half-open probe over to the next caller
+                breaker.release_probe()
+                raise
+
+        error = response = None
+        try:
+            response = send()
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+            breaker.record_failure()
+        except requests.RequestException:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            # Not the host's fault, but a half-open probe must not stay taken or the breaker would stay shut
+            breaker.release_probe()
+            raise
+        else:
+            if response.ok or response.status_code < 500:
+                breaker.record_success()
+                if response.ok or response.status_code != 429:
+                    return response
+            else:
+                breaker.record_failure()
+
+        if attempt < retries:
+            delay = retry_delay(attempt, response)
+            if delay is None:
+                break
+            time.sleep(delay)
+
+    if error is not None:
+        raise error
+    return response
+
+
+async def aget_with_retries(url, send, before_attempt=None):
+    """ Async variant of get_with_retries; send and before_attempt are coroutine functions """
+    breaker = get_breaker(url)
+    retries = settings.UPSTREAM_RETRIES
+    for attempt in range(retries + 1):
+        if not breaker.allow():
+            raise CircuitOpenError(f'Circuit open for {urlsplit(url).netloc}')
+        if before_attempt is not None:
+            try:
+                await before_attempt()
+            except BaseException:
+                breaker.release_probe()
+                raise
+
+        error = response = None
+        try:
+            response = await send()
+        except httpx.TransportError as e:
+            error = e
+            breaker.record_failure()
+        except httpx.HTTPError:
+            breaker.record_failure()
+            raise
+        except BaseException:
+            # Including cancellation on a client disconnect
+            breaker.release_probe()
+            raise
+        else:
+            if response.is_server_error:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+                if response.status_code != 429:
+                    return response
+
+        if attempt < retries:
+            delay = retry_delay(attempt, response)
+            if delay is None:
+                break
+            await asyncio.sleep(delay)
+
+    if error is not None:
+        raise error
+    return response
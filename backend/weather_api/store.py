@@ -0,0 +1,185 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db.models import Avg, Count, Max, Min
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from weather_api.models import ForecastSlot, Observation
+
+# Coordinates are matched to stored rows with this tolerance (~1 km)
+COORDINATE_TOLERANCE = 0.01
+
+HISTORY_INTERVALS = {'hour': TruncHour, 'day': TruncDay}
+
+
+def get_endpoint(base_url):
+    return urlsplit(base_url).path.rstrip('/').rsplit('/', 1)[-1]
+
+
+def make_location(city, country=''):
+    """ Normalized 'city,country' key shared by observations and forecast slots """
+    return f"{' '.join(city.split()).lower()},{country.strip().lower()}"
+
+
+def from_epoch(epoch):
+    return datetime.fromtimestamp(int(epoch), tz=dt_timezone.utc)
+
+
+def save_observation(data):
+    """ Persist a /weather payload; an observation already stored for the same time is updated """
+    coord = data.get('coord', {})
+    observation = Observation(
+        location=make_location(data['name'], data['sys']['country']),
+        city=data['name'],
+        country=data['sys']['country'],
+        latitude=coord.get('lat'),
+        longitude=coord.get('lon'),
+        observed_at=from_epoch(data['dt']) if 'dt' in data else timezone.now(),
+        temperature=data['main']['temp'],
+        description=data['weather'][0]['description'],
+        fetched_at=timezone.now(),
+    )
+    Observation.objects.bulk_create(
+        [observation],
+        update_conflicts=True,
+        unique_fields=['location', 'observed_at'],
+        update_fields=['temperature', 'description', 'latitude', 'longitude', 'fetched_at'],
+    )
+
+
+def save_forecast(data):
+    """ Persist every slot of a /forecast payload in one statement, replacing older predictions """
+    city = data['city']
+    coord = city.get('coord', {})
+    location = make_location(city['name'], city['country'])
+    fetched_at = timezone.now()
+    slots = [
+        ForecastSlot(
+            location=location,
+            city=city['name'],
+            country=city['country'],
+            latitude=coord.get('lat'),
+            longitude=coord.get('lon'),
+            forecast_for=from_epoch(entry['dt']),
+            temperature=entry['main']['temp'],
+            description=entry['weather'][0]['description'],
+            fetched_at=fetched_at,
+        )
+        for entry in data['list'] if 'dt' in entry
+    ]
+    ForecastSlot.objects.bulk_create(
+        slots,
+        batch_size=500,
+        update_conflicts=True,
+        unique_fields=['location', 'forecast_for'],
+        update_fields=['temperature', 'description', 'latitude', 'longitude', 'fetched_at'],
+    )
+
+
+def save_payload(base_url, data):
+    """ Persist an upstream payload according to its endpoint """
+    endpoint = get_endpoint(base_url)
+    if endpoint == 'weather':
+        save_observation(data)
+    elif endpoint == 'forecast':
+        save_forecast(data)
+
+
+def filter_location(queryset, params):
+    """ Narrow a queryset to the location described by upstream params, or return None """
+    if params.get('lat') is not None and params.get('lon') is not None:
+        latitude, longitude = float(params['lat']), float(params['lon'])
+        return queryset.filter(
+            latitude__range=(latitude - COORDINATE_TOLERANCE, latitude + COORDINATE_TOLERANCE),
+            longitude__range=(longitude - COORDINATE_TOLERANCE, longitude + COORDINATE_TOLERANCE),
+        )
+    query = params.get('q')
+    if not query:
+        return None
+    city, _, country = str(query).partition(',')
+    if country:
+        return queryset.filter(location=make_location(city, country))
+    return queryset.filter(location__startswith=make_location(city))
+
+
+def load_observation(params, max_age):
+    queryset = filter_location(Observation.objects.all(), params)
+    if queryset is None:
+        return None
+    observation = queryset.filter(fetched_at__gte=timezone.now() - max_age).order_by('-observed_at').first()
+    if observation is None:
+        return None
+    return {
+        'coord': {'lat': observation.latitude, 'lon': observation.longitude},
+        'weather': [{'description': observation.description}],
+        'main': {'temp': observation.temperature},
+        'dt': int(observation.observed_at.timestamp()),
+        'sys': {'country': observation.country},
+        'name': observation.city,
+    }
+
+
+def load_forecast(params, max_age):
+    queryset = filter_location(ForecastSlot.objects.all(), params)
+    if queryset is None:
+        return None
+    latest = queryset.filter(fetched_at__gte=timezone.now() - max_age).order_by('-fetched_at').first()
+    if latest is None:
+        return None
+    slots = ForecastSlot.objects.filter(
+        location=latest.location,
+        forecast_for__gte=timezone.now() - timedelta(hours=3),
+    ).order_by('forecast_for')
+    return {
+        'city': {'name': latest.city, 'country': latest.country,
+                 'coord': {'lat': latest.latitude, 'lon': latest.longitude}},
+        'list': [
+            {
+                'dt': int(slot.forecast_for.timestamp()),
+                'dt_txt': slot.forecast_for.astimezone(dt_timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+                'main': {'temp': slot.temperature},
+                'weather': [{'description': slot.description}],
+            }
+            for slot in slots
+        ],
+    }
+
+
+def load_recent_payload(base_url, params):
+    """ Rebuild an upstream-shaped payload from stored rows fetched within the endpoint's TTL, or None """
+    endpoint = get_endpoint(base_url)
+    max_age = timedelta(seconds=settings.WEATHER_CACHE_TTLS.get(endpoint, 0))
+    if not max_age:
+        return None
+    if endpoint == 'weather':
+        return load_observation(params, max_age)
+    if endpoint == 'forecast':
+        return load_forecast(params, max_age)
+    return None
+
+
+def resolve_history_location(query):
+    """ The stored location key for a 'city[,country]' query; the most recently observed match wins """
+    queryset = filter_location(Observation.objects.all(), {'q': query})
+    if queryset is None:
+        return None
+    return queryset.order_by('-observed_at').values_list('location', flat=True).first()
+
+
+def history_queryset(location, start, end, interval=None):
+    """
+    Observations of a location within [start, end) as dicts. With an interval they are downsampled in the
+    database into one row per hour or day with the min/max/avg temperature and the number of samples.
+    """
+    queryset = Observation.objects.filter(location=location, observed_at__gte=start, observed_at__lt=end)
+    if interval is None:
+        return queryset.values('observed_at', 'temperature', 'description')
+    trunc = HISTORY_INTERVALS[interval]
+    return queryset.annotate(bucket=trunc('observed_at', tzinfo=dt_timezone.utc)).values('bucket').annotate(
+        min_temperature=Min('temperature'),
+        max_temperature=Max('temperature'),
+        avg_temperature=Avg('temperature'),
+        samples=Count('id'),
+    )
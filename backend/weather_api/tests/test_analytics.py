@@ -0,0 +1,65 @@
+from unittest import skipUnless
+
+from django.test import TestCase
+
+from weather_api.analytics import HAS_NUMPY, summarize_forecast, summarize_forecasts
+
+DAY = 86400
+
+
+def build_payload(temperatures, descriptions, first_day=20000):
+    """ A forecast payload with 8 three-hourly slots per day starting at midnight of first_day """
+    return {
+        'city': {'name': 'Tallinn', 'country': 'EE'},
+        'list': [
+            {
+                'dt': first_day * DAY + index * 3 * 3600,
+                'main': {'temp': temperature},
+                'weather': [{'description': description}],
+            }
+            for index, (temperature, description) in enumerate(zip(temperatures, descriptions))
+        ],
+    }
+
+
+class ForecastSummaryTestCase(TestCase):
+    def setUp(self):
+        self.payload = build_payload(
+            [1, 2, 3, 4, 5, 6, 7, 8, 10, 10, 10, 10],
+            ['snow'] * 5 + ['mist'] * 3 + ['fog', 'rain', 'rain', 'fog'],
+        )
+
+    def test_daily_summary(self):
+        """ Ensure that days carry min/max/mean, the most frequent description and the trend """
+        first, second = summarize_forecast(self.payload, vectorized=False)
+
+        self.assertEqual(first, {
+            'datetime': '04 October 2024', 'min_temperature': 1, 'max_temperature': 8, 'mean_temperature': 4.5,
+            'description': 'snow', 'trend': None,
+        })
+        self.assertEqual(second['mean_temperature'], 10)
+        self.assertEqual(second['trend'], 5.5)
+        # Ties resolve to the alphabetically first description
+        self.assertEqual(second['description'], 'fog')
+
+    def test_summarizes_many_payloads_in_order(self):
+        """ Ensure that batched summaries stay separated per payload, including empty ones """
+        other = build_payload([20] * 8, ['clear sky'] * 8, first_day=20001)
+        empty = {'city': {'name': 'Nowhere', 'country': ''}, 'list': []}
+
+        summaries = summarize_forecasts([self.payload, empty, other], vectorized=False)
+
+        self.assertEqual([len(summary) for summary in summaries], [2, 0, 1])
+        self.assertIsNone(summaries[2][0]['trend'])
+
+    @skipUnless(HAS_NUMPY, 'numpy is not installed')
+    def test_vectorized_matches_python(self):
+        """ Ensure that the NumPy implementation returns exactly the pure-Python results """
+        payloads = [
+            build_payload([(index * 7 + slot) % 13 - 4.25 for slot in range(40)],
+                          [('rain', 'mist', 'clear sky')[(index + slot) % 3] for slot in range(40)],
+                          first_day=20000 + index % 3)
+            for index in range(50)
+        ]
+        self.assertEqual(summarize_forecasts(payloads, vectorized=True),
+                         summarize_forecasts(payloads, vectorized=False))
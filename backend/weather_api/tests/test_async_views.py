@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, Mock, patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+
+from weather_api.cache import weather_cache
+from weather_api.geolocation import geo_cache
+from weather_api.resilience import reset_breakers
+
+User = get_user_model()
+
+CURRENT_WEATHER = {
+    'sys': {'country': 'EE'},
+    'name': 'Tallinn',
+    'main': {'temp': 4.5},
+    'weather': [{'description': 'light rain'}]
+}
+
+FORECAST = {
+    'city': {'name': 'Tallinn', 'country': 'EE'},
+    'list': [
+        {
+            'dt_txt': (datetime.now() + timedelta(days=i)).strftime('%Y-%m-%d %H:%M:%S'),
+            'main': {'temp': 5},
+            'weather': [{'description': 'overcast clouds'}]
+        } for i in range(5)
+    ]
+}
+
+
+def upstream_response(payload):
+    """ Build a fake httpx response returning the payload """
+    response = Mock(status_code=200, is_server_error=False)
+    response.json.return_value = payload
+    return response
+
+
+class AsyncWeatherViewsTestCase(TestCase):
+    def setUp(self):
+        """ Set up test environment """
+        weather_cache.clear()
+        geo_cache.clear()
+        reset_breakers()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    def test_unauthenticated_access(self):
+        """ Ensure that unauthenticated users are denied access """
+        response = self.client.get('/api/weather/async/search/', {'query': 'Tallinn'})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_invalid_token(self):
+        """ Ensure that an invalid token is rejected """
+        response = self.client.get('/api/weather/async/search/', {'query': 'Tallinn'},
+                                   HTTP_AUTHORIZATION='Bearer invalid')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_missing_query(self):
+        """ Ensure that a missing query is a bad request """
+        response = self.client.get('/api/weather/async/search/', **self.auth)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch('httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_search_weather_view(self, mock_get):
+        """ Test the async search weather view """
+        mock_get.return_value = upstream_response(CURRENT_WEATHER)
+
+        response = self.client.get('/api/weather/async/search/', {'query': 'Tallinn'}, **self.auth)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['current_weather_data']['city'], 'Tallinn')
+
+    @patch('httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_search_not_modified(self, mock_get):
+        """ Ensure that the async search view answers a matching If-None-Match with 304 """
+        mock_get.return_value = upstream_response(CURRENT_WEATHER)
+
+        etag = self.client.get('/api/weather/async/search/', {'query': 'Tallinn'}, **self.auth)['ETag']
+        response = self.client.get('/api/weather/async/search/', {'query': 'Tallinn'}, HTTP_IF_NONE_MATCH=etag,
+                                   **self.auth)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        mock_get.assert_called_once()
+
+    @patch('httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_forecast_view(self, mock_get):
+        """ Test the async forecast view """
+        mock_get.return_value = upstream_response(FORECAST)
+
+        response = self.client.get('/api/weather/async/forecast/', {'query': 'Tallinn'}, **self.auth)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.json()['next_7_days_forecast']), 5)
+
+    @patch('httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_current_forecast_view(self, mock_get):
+        """ Ensure that current weather and forecast are both fetched by coordinates """
+
+        async def fake_get(url, params=None):
+            if 'ipinfo' in url:
+                return upstream_response({'loc': '59.4370,24.7536'})
+            return upstream_response(FORECAST if url.endswith('/forecast') else CURRENT_WEATHER)
+
+        mock_get.side_effect = fake_get
+
+        response = self.client.get('/api/weather/async/current_forecast/', HTTP_X_FORWARDED_FOR='8.8.8.8',
+                                   **self.auth)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data['current_weather_data']['city'], 'Tallinn')
+        self.assertEqual(len(data['next_7_days_forecast']), 5)
+        forecast_params = [call.kwargs['params'] for call in mock_get.call_args_list if call.kwargs.get('params')]
+        self.assertTrue(all(params['lat'] == '59.4370' for params in forecast_params))
+
+    def test_unable_to_determine_location(self):
+        """ Ensure that a loopback client gets a location error without upstream calls """
+        response = self.client.get('/api/weather/async/current/', **self.auth)
+        self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+        self.assertIn('Unable to determine user location', response.json()['detail'])
@@ -0,0 +1,66 @@
+from unittest.mock import AsyncMock, Mock, patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.tokens import AccessToken
+
+from weather_api.authentication import verified_tokens
+from weather_api.cache import weather_cache
+
+User = get_user_model()
+
+
+@override_settings(WEATHER_STATELESS_AUTH=True)
+class StatelessAuthenticationTestCase(TestCase):
+    def setUp(self):
+        weather_cache.clear()
+        verified_tokens.clear()
+        self.user = User.objects.create_user(username='testuser', password='testpassword')
+        self.token = str(AccessToken.for_user(self.user))
+        self.auth = {'HTTP_AUTHORIZATION': f'Bearer {self.token}'}
+
+    def test_no_user_lookup(self):
+        """ Ensure that weather views authenticate from the token alone and cache it as verified """
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/weather/locations/', {'prefix': 'lon'}, **self.auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        user, validated_token = verified_tokens.get(self.token.encode())
+        self.assertIsInstance(user, TokenUser)
+        self.assertEqual(user.pk, self.user.pk)
+
+    @override_settings(WEATHER_STATELESS_AUTH=False)
+    def test_disabled(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/weather/locations/', {'prefix': 'lon'}, **self.auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(verified_tokens.get(self.token.encode()))
+
+    def test_invalid_token(self):
+        """ Ensure that invalid tokens are rejected and never cached """
+        response = self.client.get('/api/weather/locations/', {'prefix': 'lon'}, HTTP_AUTHORIZATION='Bearer invalid')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIsNone(verified_tokens.get(b'invalid'))
+
+    def test_user_endpoints_keep_database_auth(self):
+        """ Ensure that a deactivated user keeps weather access until the token expires, but not user access """
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.get('/api/weather/locations/', {'prefix': 'lon'}, **self.auth)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.get('/api/users/', **self.auth)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @patch('httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_async_view(self, mock_get):
+        mock_get.return_value = Mock(status_code=200, is_server_error=False, json=Mock(return_value={
+            'sys': {'country': 'EE'}, 'name': 'Tallinn', 'main': {'temp': 4.5},
+            'weather': [{'description': 'light rain'}]}))
+
+        response = self.client.get('/api/weather/async/search/', {'query': 'Tallinn'}, **self.auth)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(self.token.encode(), verified_tokens._data)
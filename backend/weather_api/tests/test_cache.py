@@ -0,0 +1,224 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import Mock, patch
+
+from django.test import TestCase
+
+from weather_api.cache import LRUCache, SingleFlight, WeatherCache
+
+WEATHER_URL = 'https://api.openweathermap.org/data/2.5/weather'
+FORECAST_URL = 'https://api.openweathermap.org/data/2.5/forecast'
+
+
+class LRUCacheTestCase(TestCase):
+    def test_evicts_least_recently_used(self):
+        """ Ensure that the cache never grows past maxsize """
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1, 60)
+        cache.set('b', 2, 60)
+        cache.get('a')
+        cache.set('c', 3, 60)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(len(cache), 2)
+
+    @patch('weather_api.cache.time.monotonic')
+    def test_entries_expire(self, mock_monotonic):
+        """ Ensure that expired entries are not returned """
+        mock_monotonic.return_value = 100
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1, 10)
+        mock_monotonic.return_value = 111
+        self.assertIsNone(cache.get('a'))
+
+    @patch('weather_api.cache.time.monotonic')
+    def test_stale_window(self, mock_monotonic):
+        """ Ensure that entries are reported stale, then dropped after the stale window """
+        mock_monotonic.return_value = 100
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1, 10, stale_ttl=5)
+        mock_monotonic.return_value = 112
+        self.assertEqual(cache.get_entry('a'), (1, False))
+        self.assertIsNone(cache.get('a'))
+        mock_monotonic.return_value = 116
+        self.assertIsNone(cache.get_entry('a'))
+
+
+class SingleFlightTestCase(TestCase):
+    def test_concurrent_calls_are_coalesced(self):
+        """ Ensure that concurrent callers of one key share a single call """
+        flight = SingleFlight()
+        calls = []
+        started = threading.Event()
+
+        def fetch():
+            calls.append(1)
+            started.set()
+            time.sleep(0.2)
+            return 'payload'
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            leader = executor.submit(flight.do, 'key', fetch)
+            started.wait()
+            followers = [executor.submit(flight.do, 'key', fetch) for _ in range(7)]
+            results = [leader.result()] + [future.result() for future in followers]
+
+        self.assertEqual(results, ['payload'] * 8)
+        self.assertEqual(len(calls), 1)
+
+    def test_errors_are_shared(self):
+        """ Ensure that a failed call is raised to the caller and the key is released """
+        flight = SingleFlight()
+        with self.assertRaises(ValueError):
+            flight.do('key', Mock(side_effect=ValueError))
+        self.assertEqual(flight.do('key', lambda: 1), 1)
+
+    async def test_cancelled_leader(self):
+        """ Ensure that cancelling the first async caller still resolves the call for the others """
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def fetch():
+            await release.wait()
+            return 'payload'
+
+        leader = asyncio.create_task(flight.ado('key', fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.ado('key', fetch))
+        await asyncio.sleep(0)
+        leader.cancel()
+        release.set()
+
+        self.assertEqual(await asyncio.wait_for(follower, 1), 'payload')
+        self.assertTrue(leader.cancelled())
+        self.assertEqual(flight._calls, {})
+
+
+class WeatherCacheTestCase(TestCase):
+    def setUp(self):
+        self.cache = WeatherCache(maxsize=16, ttls={'weather': 600, 'forecast': 10800})
+
+    def test_key_ignores_appid_and_normalizes_params(self):
+        """ Ensure that the key does not depend on the API key, param order or case """
+        first = self.cache.make_key(WEATHER_URL, {'q': 'London ', 'units': 'metric', 'appid': 'a'})
+        second = self.cache.make_key(WEATHER_URL, {'appid': 'b', 'units': 'metric', 'q': 'london'})
+        self.assertEqual(first, second)
+        self.assertNotIn('appid', first)
+
+    def test_ttl_per_endpoint(self):
+        """ Ensure that current weather and forecast use their own TTL """
+        self.assertEqual(self.cache.get_ttl(WEATHER_URL), 600)
+        self.assertEqual(self.cache.get_ttl(FORECAST_URL), 10800)
+        self.assertEqual(self.cache.get_ttl('https://ipinfo.io/1.1.1.1/json'), 0)
+
+    def test_get_or_fetch_serves_hits_from_cache(self):
+        """ Ensure that the second identical lookup does not call upstream """
+        fetch = Mock(return_value={'name': 'London'})
+        params = {'q': 'London', 'appid': 'key'}
+        self.assertEqual(self.cache.get_or_fetch(WEATHER_URL, params, fetch), {'name': 'London'})
+        self.assertEqual(self.cache.get_or_fetch(WEATHER_URL, params, fetch), {'name': 'London'})
+        fetch.assert_called_once()
+        self.assertEqual(self.cache.stats()['hits'], 1)
+
+    def test_shared_tier_is_used_on_local_miss(self):
+        """ Ensure that a payload cached by another worker is served from the shared tier """
+        cache = WeatherCache(maxsize=16, ttls={'weather': 600}, shared_alias='weather')
+        cache.clear()
+        fetch = Mock(return_value={'name': 'Paris'})
+        cache.get_or_fetch(WEATHER_URL, {'q': 'Paris'}, fetch)
+        cache.local.clear()
+        cache.get_or_fetch(WEATHER_URL, {'q': 'Paris'}, fetch)
+        fetch.assert_called_once()
+        cache.clear()
+
+    @patch('weather_api.cache.upstream.get_executor')
+    def test_stale_while_revalidate(self, mock_executor):
+        """ Ensure that an expired entry is served immediately while one refresh runs in the background """
+        mock_executor.return_value.submit.side_effect = lambda fn: fn()
+        cache = WeatherCache(maxsize=16, ttls={'weather': 600}, stale_ttl=300)
+        fetch = Mock(side_effect=[{'temp': 1}, {'temp': 2}])
+
+        with patch('weather_api.cache.time.monotonic', return_value=1000):
+            cache.get_or_fetch(WEATHER_URL, {'q': 'Oslo'}, fetch)
+        with patch('weather_api.cache.time.monotonic', return_value=1700):
+            self.assertEqual(cache.get_or_fetch(WEATHER_URL, {'q': 'Oslo'}, fetch), {'temp': 1})
+            self.assertEqual(cache.get_or_fetch(WEATHER_URL, {'q': 'Oslo'}, fetch), {'temp': 2})
+
+        self.assertEqual(fetch.call_count, 2)
+        self.assertEqual(cache.stats()['stale_hits'], 1)
+
+    @patch('weather_api.cache.upstream.get_executor')
+    @patch('weather_api.cache.time.time')
+    @patch('weather_api.cache.time.monotonic')
+    def test_stale_entry_adopts_prewarmed_shared_entry(self, mock_monotonic, mock_time, mock_executor):
+        """ Ensure that a worker serves an entry the pre-warmer refreshed in the shared tier instead of refetching """
+        mock_executor.return_value.submit.side_effect = lambda fn: fn()
+        worker = WeatherCache(maxsize=16, ttls={'weather': 600}, shared_alias='weather', stale_ttl=300)
+        prewarmer = WeatherCache(maxsize=16, ttls={'weather': 600}, shared_alias='weather', stale_ttl=300)
+        worker.clear()
+        fetch = Mock(return_value={'temp': 1})
+        prewarm = Mock(return_value={'temp': 2})
+
+        mock_monotonic.return_value = mock_time.return_value = 1000
+        worker.get_or_fetch(WEATHER_URL, {'q': 'Oslo'}, fetch)
+        mock_monotonic.return_value = mock_time.return_value = 1500
+        prewarmer.refresh(WEATHER_URL, {'q': 'Oslo'}, prewarm)
+        mock_monotonic.return_value = mock_time.return_value = 1700
+        self.assertEqual(worker.get_or_fetch(WEATHER_URL, {'q': 'Oslo'}, fetch), {'temp': 2})
+        self.assertEqual(worker.get_or_fetch(WEATHER_URL, {'q': 'Oslo'}, fetch), {'temp': 2})
+
+        fetch.assert_called_once()
+        mock_executor.return_value.submit.assert_not_called()
+        self.assertEqual(worker.stats()['hits'], 2)
+        worker.clear()
+
+    @patch('weather_api.cache.time.time')
+    def test_background_refresh_rechecks_shared_tier(self, mock_time):
+        """ Ensure that a background refresh adopts an entry another worker stored since the stale lookup """
+        mock_time.return_value = 1000
+        cache = WeatherCache(maxsize=16, ttls={'weather': 600}, shared_alias='weather', stale_ttl=300)
+        cache.clear()
+        key = cache.make_key(WEATHER_URL, {'q': 'Oslo'})
+        cache.shared.set(key, {'value': {'temp': 2}, 'fresh_until': 1600}, 900)
+        fetch = Mock(return_value={'temp': 3})
+
+        self.assertEqual(cache.reload(key, 600, fetch), {'temp': 2})
+        self.assertEqual(asyncio.run(cache.areload(key, 600, fetch)), {'temp': 2})
+        fetch.assert_not_called()
+        self.assertEqual(cache.local.get(key), {'temp': 2})
+        cache.clear()
+
+    def test_counters_are_thread_safe(self):
+        """ Ensure that no lookup is lost when many threads count at once """
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda _: self.cache.count('hit'), range(2000)))
+        self.assertEqual(self.cache.stats()['hits'], 2000)
+
+    def test_distributed_lock_waits_for_other_worker(self):
+        """ Ensure that a worker finding the shared lock taken waits for the other worker's result """
+        cache = WeatherCache(maxsize=16, ttls={'weather': 600}, shared_alias='weather', distributed_lock=True,
+                             lock_timeout=2)
+        cache.clear()
+        key = cache.make_key(WEATHER_URL, {'q': 'Rome'})
+        cache.shared.add(f'{key}:lock', 1, 2)
+        threading.Timer(0.1, lambda: cache.set(key, {'name': 'Rome'}, 600)).start()
+        cache.local.clear()
+
+        fetch = Mock(return_value={'name': 'other'})
+        self.assertEqual(cache.get_or_fetch(WEATHER_URL, {'q': 'Rome'}, fetch), {'name': 'Rome'})
+        fetch.assert_not_called()
+        cache.clear()
+
+    def test_distributed_lock_of_other_worker_is_kept(self):
+        """ Ensure that a worker fetching after a timed-out wait does not release the other worker's lock """
+        cache = WeatherCache(maxsize=16, ttls={'weather': 600}, shared_alias='weather', distributed_lock=True,
+                             lock_timeout=0.1)
+        cache.clear()
+        key = cache.make_key(WEATHER_URL, {'q': 'Rome'})
+        cache.shared.add(f'{key}:lock', 1, 5)
+
+        self.assertEqual(cache.get_or_fetch(WEATHER_URL, {'q': 'Rome'}, lambda: {'name': 'Rome'}), {'name': 'Rome'})
+        self.assertIsNotNone(cache.shared.get(f'{key}:lock'))
+        cache.clear()
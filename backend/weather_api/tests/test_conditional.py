@@ -0,0 +1,101 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from weather_api.cache import weather_cache
+from weather_api.resilience import reset_breakers
+
+OBSERVED_AT = 1700000000
+
+
+def current_weather(dt=OBSERVED_AT):
+    return {
+        'sys': {'country': 'EE'},
+        'name': 'Tallinn',
+        'main': {'temp': 4.5},
+        'weather': [{'description': 'light rain'}],
+        'dt': dt,
+    }
+
+
+def forecast(temp):
+    return {
+        'city': {'name': 'Tallinn', 'country': 'EE'},
+        'list': [{'dt': OBSERVED_AT + 10800 * i, 'main': {'temp': temp}, 'weather': [{'description': 'mist'}]}
+                 for i in range(4)],
+    }
+
+
+class ConditionalRequestsTestCase(TestCase):
+    def setUp(self):
+        weather_cache.clear()
+        reset_breakers()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+
+    @patch('requests.Session.get')
+    def test_validators_on_response(self, mock_get):
+        """ Ensure that responses carry an ETag, the observation time and the remaining freshness """
+        mock_get.return_value.json.return_value = current_weather()
+
+        response = self.client.get('/api/weather/search/', {'query': 'Tallinn'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        self.assertEqual(response['Last-Modified'], http_date(OBSERVED_AT))
+        self.assertIn('private', response['Cache-Control'])
+        max_age = int(response['Cache-Control'].split('max-age=')[1].split(',')[0])
+        self.assertTrue(590 <= max_age <= 600, max_age)
+
+    @patch('requests.Session.get')
+    def test_if_none_match_skips_upstream_and_body(self, mock_get):
+        """ Ensure that a matching If-None-Match is answered with 304 from the cache """
+        mock_get.return_value.json.return_value = current_weather()
+        etag = self.client.get('/api/weather/search/', {'query': 'Tallinn'})['ETag']
+
+        with patch('weather_api.views.WeatherSearchView.extract_current_weather_info') as extract:
+            response = self.client.get('/api/weather/search/', {'query': 'Tallinn'}, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+        extract.assert_not_called()
+        mock_get.assert_called_once()
+
+    @patch('requests.Session.get')
+    def test_if_modified_since(self, mock_get):
+        """ Ensure that If-Modified-Since is honoured against the observation time """
+        mock_get.return_value.json.return_value = current_weather()
+
+        response = self.client.get('/api/weather/search/', {'query': 'Tallinn'},
+                                   HTTP_IF_MODIFIED_SINCE=http_date(OBSERVED_AT))
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.client.get('/api/weather/search/', {'query': 'Tallinn'},
+                                   HTTP_IF_MODIFIED_SINCE=http_date(OBSERVED_AT - 60))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(WEATHER_CACHE_CONTROL='public')
+    @patch('requests.Session.get')
+    def test_new_forecast_changes_etag(self, mock_get):
+        """ Ensure that a refreshed forecast with the same slots but new values gets a new ETag """
+        mock_get.return_value.json.return_value = forecast(5)
+        first = self.client.get('/api/weather/forecast/', {'query': 'Tallinn'})
+        self.assertIn('public', first['Cache-Control'])
+        self.assertNotIn('Last-Modified', first)
+
+        weather_cache.clear()
+        mock_get.return_value.json.return_value = forecast(6)
+        response = self.client.get('/api/weather/forecast/', {'query': 'Tallinn'}, HTTP_IF_NONE_MATCH=first['ETag'])
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+        # Representations differ per URL, so the stream variant has its own validator
+        stream = self.client.get('/api/weather/forecast/', {'query': 'Tallinn', 'stream': '1'})
+        self.assertNotEqual(stream['ETag'], response['ETag'])
@@ -0,0 +1,73 @@
+import io
+import json
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+from django.test import TestCase
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from weather_api import fastjson
+from weather_api.parsers import FastJSONParser
+from weather_api.renderers import FastJSONRenderer, FastJsonResponse, to_ndjson_line
+
+PAYLOAD = {
+    'city': 'São Paulo',
+    'observed_at': datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+    'temperature': Decimal('21.5'),
+    'note': 'line\u2028separator',
+    'forecast': [{'time': '12:00', 'temperature': 21.5}] * 3,
+}
+
+
+class FastJSONTestCase(TestCase):
+    def test_renderer_matches_json_renderer(self):
+        """ Ensure that the fast renderer produces the same document as DRF's JSONRenderer """
+        rendered = FastJSONRenderer().render(PAYLOAD)
+
+        self.assertEqual(json.loads(rendered), json.loads(JSONRenderer().render(PAYLOAD)))
+        self.assertIn(b'"2026-01-02T03:04:05Z"', rendered)
+        self.assertIn(b'\\u2028', rendered)
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+    def test_renderer_indent_and_fallback(self):
+        """ Ensure that indented output and a missing orjson go through the stdlib encoder """
+        indented = FastJSONRenderer().render(PAYLOAD, 'application/json; indent=4')
+        self.assertIn(b'\n    "city"', indented)
+
+        with patch.object(fastjson, 'HAS_ORJSON', False):
+            self.assertEqual(json.loads(FastJSONRenderer().render(PAYLOAD)), json.loads(JSONRenderer().render(PAYLOAD)))
+            self.assertEqual(json.loads(to_ndjson_line(PAYLOAD)), json.loads(FastJSONRenderer().render(PAYLOAD)))
+
+    def test_dumps_unsupported_by_orjson(self):
+        """ Ensure that values orjson rejects are still encoded by the stdlib """
+        self.assertEqual(json.loads(fastjson.dumps({1: 2 ** 70})), {'1': 2 ** 70})
+
+    def test_parser(self):
+        """ Ensure that request bodies are decoded and malformed ones raise ParseError """
+        body = '{"queries": ["Tallinn", "São Paulo"]}'.encode('utf-8')
+        self.assertEqual(FastJSONParser().parse(io.BytesIO(body)), {'queries': ['Tallinn', 'São Paulo']})
+
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"queries": '))
+
+        latin1 = '{"city": "São Paulo"}'.encode('latin-1')
+        self.assertEqual(FastJSONParser().parse(io.BytesIO(latin1), parser_context={'encoding': 'latin-1'}),
+                         {'city': 'São Paulo'})
+
+    def test_response_json(self):
+        """ Ensure that upstream bodies are decoded from bytes, falling back to the client's decoder """
+        self.assertEqual(fastjson.response_json(Mock(content=b'{"cod": 200}')), {'cod': 200})
+
+        response = Mock(content=b'\xff not json')
+        response.json.side_effect = ValueError('invalid')
+        with self.assertRaises(ValueError):
+            fastjson.response_json(response)
+
+    def test_fast_json_response(self):
+        response = FastJsonResponse({'detail': 'ok'}, status=201)
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(response.content), {'detail': 'ok'})
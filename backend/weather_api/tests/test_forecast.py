@@ -0,0 +1,64 @@
+from datetime import datetime, timedelta, timezone
+
+from django.test import TestCase
+
+from weather_api.views import WeatherDataMixin
+
+
+def build_forecast(entries, with_epoch=True):
+    """ A 3-hourly forecast payload starting at the current UTC hour """
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    slots = []
+    for index in range(entries):
+        slot = start + timedelta(hours=3 * index)
+        entry = {
+            'dt_txt': slot.strftime('%Y-%m-%d %H:%M:%S'),
+            'main': {'temp': index},
+            'weather': [{'description': 'light rain'}],
+        }
+        if with_epoch:
+            entry['dt'] = int(slot.timestamp())
+        slots.append(entry)
+    return {'city': {'name': 'Tallinn', 'country': 'EE'}, 'list': slots}
+
+
+def legacy_forecast(data):
+    """ The original two-pass strptime/strftime pipeline the single-pass transform must match """
+    city_name, country = data['city']['name'], data['city']['country']
+    forecast_info = []
+    for entry in data['list']:
+        formatted_date = datetime.strptime(entry['dt_txt'], '%Y-%m-%d %H:%M:%S')
+        forecast_info.append({
+            'time': formatted_date.strftime('%H:%M'),
+            'country': country,
+            'city': city_name,
+            'temperature': entry['main']['temp'],
+            'description': entry['weather'][0]['description'],
+            'datetime': formatted_date.strftime('%d %B %Y'),
+        })
+    return [entry for entry in forecast_info if
+            datetime.strptime(entry['datetime'], '%d %B %Y') <= datetime.now() + timedelta(days=7)]
+
+
+class ForecastTransformTestCase(TestCase):
+    def test_matches_legacy_pipeline(self):
+        """ Ensure that the epoch-based single pass produces the same entries as the original pipeline """
+        data = build_forecast(40)
+        self.assertEqual(WeatherDataMixin.get_next_7_days_forecast(data), legacy_forecast(data))
+
+    def test_matches_legacy_pipeline_without_epoch(self):
+        """ Ensure that payloads without 'dt' fall back to 'dt_txt' """
+        data = build_forecast(40, with_epoch=False)
+        self.assertEqual(WeatherDataMixin.get_next_7_days_forecast(data), legacy_forecast(data))
+
+    def test_drops_entries_after_seven_days(self):
+        """ Ensure that entries past the 7-day cutoff are filtered out """
+        data = build_forecast(80)
+        forecast = WeatherDataMixin.get_next_7_days_forecast(data)
+        self.assertLess(len(forecast), 80)
+        self.assertEqual(forecast, legacy_forecast(data))
+
+    def test_extract_forecast_info_keeps_every_entry(self):
+        """ Ensure that extract_forecast_info does not filter """
+        data = build_forecast(80)
+        self.assertEqual(len(WeatherDataMixin.extract_forecast_info(data, 'Tallinn', 'EE')), 80)
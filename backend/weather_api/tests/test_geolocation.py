@@ -0,0 +1,122 @@
+import os
+import tempfile
+from unittest.mock import patch
+
+import requests
+from django.test import TestCase, override_settings
+
+from weather_api.resilience import reset_breakers
+from weather_api.geolocation import (
+    RangeDatabaseProvider, geo_cache, get_cache_key, is_public_ip, reset_providers, resolve_location
+)
+
+RANGE_DATABASE = """start_ip,end_ip,latitude,longitude
+8.8.8.0,8.8.8.255,37.4056,-122.0775
+1.0.0.0,1.0.0.255,-33.4940,143.2104
+2001:4860::,2001:4860:ffff:ffff:ffff:ffff:ffff:ffff,37.7510,-97.8220
+"""
+
+
+class GeoLocationTestCase(TestCase):
+    def setUp(self):
+        geo_cache.clear()
+        reset_providers()
+        reset_breakers()
+
+    def tearDown(self):
+        reset_providers()
+        reset_breakers()
+
+    def test_private_addresses_are_not_public(self):
+        """ Ensure that loopback, private and invalid addresses are short-circuited """
+        for ip in ('127.0.0.1', '10.0.0.5', '192.168.1.1', '::1', 'not-an-ip', None):
+            self.assertFalse(is_public_ip(ip))
+        self.assertTrue(is_public_ip('8.8.8.8'))
+
+    @patch('requests.Session.get')
+    def test_private_address_skips_network(self, mock_get):
+        """ Ensure that no upstream call is made for a loopback address """
+        self.assertIsNone(resolve_location('127.0.0.1'))
+        mock_get.assert_not_called()
+
+    @patch('requests.Session.get')
+    def test_location_is_cached(self, mock_get):
+        """ Ensure that a resolved IP is only looked up once """
+        mock_get.return_value.json.return_value = {'loc': '59.4370,24.7536'}
+        self.assertEqual(resolve_location('8.8.8.8'), ('59.4370', '24.7536'))
+        self.assertEqual(resolve_location('8.8.8.8'), ('59.4370', '24.7536'))
+        mock_get.assert_called_once()
+
+    @patch('requests.Session.get')
+    def test_unresolved_location_is_negatively_cached(self, mock_get):
+        """ Ensure that an IP without a location is not looked up again """
+        mock_get.return_value.json.return_value = {'bogon': True}
+        self.assertIsNone(resolve_location('8.8.4.4'))
+        self.assertIsNone(resolve_location('8.8.4.4'))
+        mock_get.assert_called_once()
+
+    @override_settings(UPSTREAM_RETRIES=0)
+    @patch('requests.Session.get', side_effect=requests.ConnectionError)
+    def test_transport_errors_are_not_cached(self, mock_get):
+        """ Ensure that a failed lookup is retried on the next request """
+        self.assertIsNone(resolve_location('1.1.1.1'))
+        self.assertIsNone(resolve_location('1.1.1.1'))
+        self.assertEqual(mock_get.call_count, 2)
+
+    @override_settings(UPSTREAM_RETRIES=0)
+    @patch('requests.Session.get')
+    def test_error_responses_are_not_cached(self, mock_get):
+        """ Ensure that a rate limited or failed lookup is not taken for an IP without a location """
+        mock_get.return_value.status_code = 429
+        mock_get.return_value.ok = False
+        mock_get.return_value.json.return_value = {'error': {'title': 'Rate limit exceeded'}}
+        mock_get.return_value.raise_for_status.side_effect = requests.HTTPError('429 Client Error')
+        self.assertIsNone(resolve_location('9.9.9.9'))
+        self.assertIsNone(resolve_location('9.9.9.9'))
+        self.assertEqual(mock_get.call_count, 2)
+
+    @override_settings(WEATHER_GEOIP_CACHE_BY_PREFIX=True)
+    def test_prefix_cache_key(self):
+        """ Ensure that addresses in the same /24 share a cache key """
+        self.assertEqual(get_cache_key('8.8.8.8'), get_cache_key('8.8.8.200'))
+        self.assertNotEqual(get_cache_key('8.8.8.8'), get_cache_key('8.8.9.8'))
+
+
+class RangeDatabaseProviderTestCase(TestCase):
+    def setUp(self):
+        """ Write a small range database to a temporary file """
+        geo_cache.clear()
+        reset_providers()
+        db_file = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+        db_file.write(RANGE_DATABASE)
+        db_file.close()
+        self.path = db_file.name
+        self.provider = RangeDatabaseProvider(self.path)
+
+    def tearDown(self):
+        os.unlink(self.path)
+        reset_providers()
+
+    def test_lookup_inside_range(self):
+        """ Ensure that IPs inside a range resolve to its coordinates """
+        self.assertEqual(self.provider.lookup('8.8.8.8'), ('37.4056', '-122.0775'))
+        self.assertEqual(self.provider.lookup('1.0.0.0'), ('-33.4940', '143.2104'))
+        self.assertEqual(self.provider.lookup('2001:4860::8888'), ('37.7510', '-97.8220'))
+
+    def test_lookup_outside_range(self):
+        """ Ensure that IPs between or before ranges do not resolve """
+        self.assertIsNone(self.provider.lookup('8.8.9.1'))
+        self.assertIsNone(self.provider.lookup('0.0.0.1'))
+        self.assertIsNone(self.provider.lookup('2a00::1'))
+
+    @patch('requests.Session.get')
+    def test_database_provider_skips_http(self, mock_get):
+        """ Ensure that the HTTP provider is only a fallback """
+        providers = ['weather_api.geolocation.RangeDatabaseProvider', 'weather_api.geolocation.IpinfoProvider']
+        with override_settings(WEATHER_GEOIP_DATABASE=self.path, WEATHER_GEOIP_PROVIDERS=providers):
+            self.assertEqual(resolve_location('8.8.8.8'), ('37.4056', '-122.0775'))
+            mock_get.assert_not_called()
+
+            mock_get.return_value.json.return_value = {'loc': '48.8534,2.3488'}
+            self.assertEqual(resolve_location('9.9.9.9'), ('48.8534', '2.3488'))
+            mock_get.assert_called_once()
@@ -0,0 +1,70 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from weather_api.cache import weather_cache
+from weather_api.hot_queries import SHARED_KEY, DecayingTopK, HotQueryTracker
+
+
+class DecayingTopKTestCase(TestCase):
+    def test_scores_halve_every_half_life(self):
+        """ Ensure that a hit loses half its weight after one half-life """
+        counter = DecayingTopK(half_life=60, capacity=10)
+        counter.add('a', now=counter.origin)
+        [(item, score)] = counter.top(1, now=counter.origin + 60)
+        self.assertEqual(item, 'a')
+        self.assertAlmostEqual(score, 0.5)
+
+    def test_recent_hits_outrank_old_ones(self):
+        """ Ensure that recent popularity wins over stale popularity """
+        counter = DecayingTopK(half_life=60, capacity=10)
+        for _ in range(4):
+            counter.add('old', now=counter.origin)
+        for _ in range(2):
+            counter.add('new', now=counter.origin + 180)
+        self.assertEqual([item for item, _ in counter.top(2, now=counter.origin + 180)], ['new', 'old'])
+
+    def test_capacity_is_bounded(self):
+        """ Ensure that the long tail is pruned """
+        counter = DecayingTopK(half_life=60, capacity=5)
+        for index in range(100):
+            counter.add(str(index))
+        self.assertLessEqual(len(counter.scores), 10)
+
+
+class HotQueryTrackerTestCase(TestCase):
+    def setUp(self):
+        caches['weather'].delete(SHARED_KEY)
+        self.tracker = HotQueryTracker(half_life=3600, capacity=100, flush_interval=3600, cache_alias='weather')
+
+    def test_top_merges_into_shared_snapshot(self):
+        """ Ensure that normalized queries are ranked across flushes """
+        for query in ('London', ' london', 'Paris'):
+            self.tracker.record('weather', query)
+        self.tracker.record('forecast', 'Paris')
+
+        top = self.tracker.top(3)
+        self.assertEqual(top[0][:2], ('weather', 'london'))
+        self.assertEqual({(kind, query) for kind, query, _ in top},
+                         {('weather', 'london'), ('weather', 'paris'), ('forecast', 'paris')})
+        self.assertIsNotNone(caches['weather'].get(SHARED_KEY))
+
+    @patch('weather_api.management.commands.prewarm_weather.time.sleep')
+    @patch('weather_api.views.WeatherDataMixin.fetch_weather_data')
+    def test_prewarm_command_refreshes_hot_queries(self, mock_fetch, mock_sleep):
+        """ Ensure that the command fetches hot queries missing from the cache """
+        weather_cache.clear()
+        mock_fetch.return_value = {'name': 'London'}
+        with patch('weather_api.management.commands.prewarm_weather.hot_queries', self.tracker):
+            self.tracker.record('weather', 'London')
+            out = StringIO()
+            with self.assertRaises(CommandError):
+                call_command('prewarm_weather', '--once', stdout=out, stderr=StringIO())
+            call_command('prewarm_weather', '--once', '--allow-local-cache', stdout=out, stderr=StringIO())
+
+        self.assertIn('Refreshed 1 hot queries', out.getvalue())
+        mock_fetch.assert_called_once()
+        weather_cache.clear()
@@ -0,0 +1,161 @@
+from unittest.mock import AsyncMock, Mock, patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from weather_api.cache import weather_cache
+from weather_api.geolocation import geo_cache
+from weather_api.metrics import Histogram, cache_lookups, registry, upstream_duration
+from weather_api.ratelimit import TokenBucket, upstream_limiter
+from weather_api.resilience import reset_breakers
+
+CURRENT_WEATHER = {
+    'sys': {'country': 'GB'},
+    'name': 'London',
+    'main': {'temp': 9.5},
+    'weather': [{'description': 'mist'}],
+}
+
+
+def ok(payload):
+    return Mock(status_code=200, json=Mock(return_value=payload))
+
+
+def server_timing(response):
+    """ Server-Timing metrics by name, each a dict of its parameters """
+    metrics = {}
+    for metric in response['Server-Timing'].split(', '):
+        name, *params = metric.split(';')
+        metrics[name] = dict(param.split('=', 1) for param in params)
+    return metrics
+
+
+class HistogramTestCase(TestCase):
+    def test_export(self):
+        """ Ensure that buckets are exported cumulatively with sum and count """
+        histogram = Histogram('test_seconds', 'Test.', ('view',), buckets=(0.1, 1.0))
+        for value in (0.05, 0.5, 0.5, 3.0):
+            histogram.observe(value, 'search')
+
+        samples = list(histogram.samples())
+        self.assertEqual(samples, [
+            'test_seconds_bucket{view="search",le="0.1"} 1',
+            'test_seconds_bucket{view="search",le="1.0"} 3',
+            'test_seconds_bucket{view="search",le="+Inf"} 4',
+            'test_seconds_sum{view="search"} 4.05',
+            'test_seconds_count{view="search"} 4',
+        ])
+
+
+@override_settings(SERVER_TIMING=1)
+class ServerTimingTestCase(TestCase):
+    def setUp(self):
+        weather_cache.clear()
+        geo_cache.clear()
+        reset_breakers()
+        registry.clear()
+        budget = patch.object(upstream_limiter, 'bucket', TokenBucket(rate=1000))
+        budget.start()
+        self.addCleanup(budget.stop)
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(username='testuser', password='testpassword')
+        token = self.client.post('/api/token/', {'username': 'testuser', 'password': 'testpassword'}).data['access']
+        self.authorization = f'Bearer {token}'
+        self.client.credentials(HTTP_AUTHORIZATION=self.authorization)
+
+    @patch('requests.Session.get')
+    def test_phases_of_a_search(self, mock_get):
+        """ Ensure that auth, upstream, transform, render and the cache result are reported per request """
+        mock_get.return_value = ok(CURRENT_WEATHER)
+
+        response = self.client.get('/api/weather/search/', {'query': 'London'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        metrics = server_timing(response)
+        for phase in ('auth', 'openweathermap', 'transform', 'render', 'total'):
+            self.assertIn('dur', metrics[phase])
+        self.assertEqual(metrics['openweathermap']['desc'], '"200"')
+        self.assertEqual(metrics['cache']['desc'], '"miss"')
+
+        metrics = server_timing(self.client.get('/api/weather/search/', {'query': 'London'}))
+        self.assertEqual(metrics['cache']['desc'], '"hit"')
+        self.assertNotIn('openweathermap', metrics)
+        self.assertEqual((cache_lookups.value('miss'), cache_lookups.value('hit')), (1, 1))
+
+    @patch('requests.Session.get')
+    def test_phases_of_parallel_calls(self, mock_get):
+        """ Ensure that calls made on the upstream pool are attributed to the request """
+        payloads = {
+            'json': {'loc': '51.5085,-0.1257'},
+            'weather': CURRENT_WEATHER,
+            'forecast': {'city': {'name': 'London', 'country': 'GB'}, 'list': []},
+        }
+        mock_get.side_effect = lambda url, params=None, timeout=None: ok(payloads[url.rsplit('/', 1)[-1]])
+
+        response = self.client.get('/api/weather/current_forecast/', HTTP_X_FORWARDED_FOR='8.8.8.8')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        metrics = server_timing(response)
+        self.assertIn('ipinfo', metrics)
+        self.assertIn('openweathermap', metrics)
+        self.assertEqual(upstream_duration.count('openweathermap', '200'), 2)
+
+    @patch('httpx.AsyncClient.get', new_callable=AsyncMock)
+    async def test_phases_of_an_async_view(self, mock_get):
+        """ Ensure that async views are timed on the event loop, including their concurrent upstream calls """
+        payloads = {
+            'json': {'loc': '51.5085,-0.1257'},
+            'weather': CURRENT_WEATHER,
+            'forecast': {'city': {'name': 'London', 'country': 'GB'}, 'list': []},
+        }
+        mock_get.side_effect = lambda url, params=None: Mock(status_code=200, is_server_error=False,
+                                                             json=Mock(return_value=payloads[url.rsplit('/', 1)[-1]]))
+
+        response = await self.async_client.get('/api/weather/async/current_forecast/', headers={
+            'Authorization': self.authorization, 'X-Forwarded-For': '8.8.8.8'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        metrics = server_timing(response)
+        for phase in ('auth', 'ipinfo', 'openweathermap', 'total'):
+            self.assertIn('dur', metrics[phase])
+
+    @override_settings(SERVER_TIMING=0)
+    def test_header_can_be_disabled(self):
+        response = self.client.get('/api/weather/search/')
+        self.assertFalse(response.has_header('Server-Timing'))
+
+
+class MetricsViewTestCase(TestCase):
+    def setUp(self):
+        registry.clear()
+
+    @override_settings(METRICS_ALLOWED_NETWORKS=['127.0.0.0/8'])
+    def test_metrics(self):
+        """ Ensure that request latencies are exported in the Prometheus text format """
+        self.client.get('/api/weather/search/')
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        body = response.content.decode()
+        self.assertIn('# TYPE weather_http_request_duration_seconds histogram', body)
+        self.assertIn('weather_http_request_duration_seconds_count{view="search_weather",method="GET",status="401"} 1',
+                      body)
+
+    @override_settings(METRICS_TOKEN='scrape-secret')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_refused_by_default(self):
+        """ Ensure that nobody can scrape until a token or an allowed network is configured """
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_403_FORBIDDEN)
+
+    @override_settings(METRICS_ALLOWED_NETWORKS=['10.0.0.0/8'])
+    def test_allowed_networks(self):
+        """ Ensure that only peers in an allowed network get in, whatever they forward """
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.1.2.3').status_code, status.HTTP_200_OK)
+        response = self.client.get('/metrics', REMOTE_ADDR='192.0.2.1', HTTP_X_FORWARDED_FOR='10.1.2.3')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
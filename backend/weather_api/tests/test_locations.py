@@ -0,0 +1,113 @@
+import io
+import os
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from unittest.mock import patch
+
+from weather_api.cache import WeatherCache
+from weather_api.locations import LocationIndex, location_params, normalize_query
+from weather_api.views import WeatherDataMixin
+
+WEATHER_URL = 'https://api.openweathermap.org/data/2.5/weather'
+
+
+class QueryNormalizationTestCase(TestCase):
+    def test_normalize_query(self):
+        """ Ensure that case, accents and whitespace around commas do not change the query """
+        self.assertEqual(normalize_query('  São   Paulo , BR '), 'sao paulo,br')
+        self.assertEqual(normalize_query('London,'), 'london')
+
+
+class LocationIndexTestCase(TestCase):
+    def setUp(self):
+        self.index = LocationIndex()
+
+    def test_resolve_prefers_most_populous(self):
+        """ Ensure that ambiguous names resolve to the most populous city unless a country is given """
+        self.assertEqual(self.index.resolve('london').id, 'london,gb')
+        self.assertEqual(self.index.resolve('London, CA').id, 'london,ca')
+        self.assertEqual(self.index.resolve('sao paulo').name, 'São Paulo')
+        self.assertIsNone(self.index.resolve('Atlantis'))
+
+    def test_complete_prefix_and_typos(self):
+        """ Ensure that prefix completion ranks by population and tolerates a typo """
+        self.assertEqual([location.id for location in self.index.complete('lon', limit=2)],
+                         ['london,gb', 'london,ca'])
+        for typo in ('mnuich', 'munnich', 'mumich', 'muich'):
+            self.assertEqual(self.index.complete(typo)[0].id, 'munich,de', typo)
+        self.assertEqual([location.country for location in self.index.complete('paris,us')], ['US'])
+
+    def test_packed_index_matches_csv(self):
+        """ Ensure that the memory-mapped packed index answers exactly like the CSV it was built from """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cities.idx')
+            call_command('build_location_index', path, stdout=io.StringIO())
+            packed = LocationIndex(path=path)
+
+            self.assertEqual(len(packed), len(self.index))
+            for prefix in ('l', 'sao', 'new y', 'berln', 'paris,us'):
+                self.assertEqual(packed.complete(prefix), self.index.complete(prefix), prefix)
+            self.assertEqual(packed.resolve('Córdoba, AR'), self.index.resolve('cordoba,ar'))
+
+    def test_empty_index(self):
+        """ Ensure that a disabled index resolves nothing """
+        index = LocationIndex(path='')
+        self.assertEqual(len(index), 0)
+        self.assertIsNone(index.resolve('London'))
+
+
+class LocationParamsTestCase(TestCase):
+    def test_spellings_share_upstream_params(self):
+        """ Ensure that every spelling of an indexed city produces the same upstream params and cache key """
+        params = [WeatherDataMixin.get_query_params(query) for query in ('london', 'London ', 'London,GB')]
+        self.assertEqual(params[0], params[1])
+        self.assertEqual(params[0], params[2])
+        self.assertEqual(params[0]['q'], 'London,GB')
+        self.assertNotIn('zip', params[0])
+
+    def test_unindexed_queries(self):
+        """ Ensure that zip codes, state-qualified and unknown cities are passed on as typed, spacing tidied """
+        self.assertEqual(location_params('94040, US'), {'zip': '94040,US'})
+        self.assertEqual(location_params('Portland, ME, US'), {'q': 'Portland,ME,US'})
+        self.assertEqual(location_params(' Atlantis '), {'q': 'Atlantis'})
+        self.assertEqual(location_params('Київ'), {'q': 'Київ'})
+        self.assertEqual(location_params('Łódź ,  PL'), {'q': 'Łódź,PL'})
+
+    def test_spellings_share_a_cache_key(self):
+        """ Ensure that cache keys are still built from the folded query """
+        self.assertEqual(WeatherCache.make_key(WEATHER_URL, location_params('Bromölla ,  SE')),
+                         WeatherCache.make_key(WEATHER_URL, location_params('bromolla,se')))
+
+    @patch('weather_api.locations.location_index', LocationIndex(path=''))
+    def test_without_index(self):
+        """ Ensure that queries still work when the index is disabled """
+        self.assertEqual(location_params('London'), {'q': 'London'})
+
+
+class WeatherLocationsViewTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+
+    @patch('requests.Session.get')
+    def test_autocomplete(self, mock_get):
+        """ Ensure that autocomplete ranks cities by population without calling upstream """
+        response = self.client.get('/api/weather/locations/', {'prefix': 'San ', 'limit': 3})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()['results']
+        self.assertEqual([result['name'] for result in results], ['Santiago', 'Santo Domingo', 'San Diego'])
+        self.assertEqual(set(results[0]), {'id', 'name', 'country', 'latitude', 'longitude', 'population'})
+        mock_get.assert_not_called()
+
+    def test_autocomplete_requires_prefix(self):
+        """ Ensure that a missing prefix or bad limit is rejected """
+        self.assertEqual(self.client.get('/api/weather/locations/').status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/weather/locations/', {'prefix': 'lon', 'limit': 'ten'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
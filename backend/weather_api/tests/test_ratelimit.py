@@ -0,0 +1,130 @@
+from unittest.mock import AsyncMock, patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from weather_api.cache import weather_cache
+from weather_api.ratelimit import (
+    SharedWindowCounter, TokenBucket, UpstreamRateLimited, UpstreamRateLimiter, WeatherUserRateThrottle,
+    upstream_limiter
+)
+from weather_api.resilience import reset_breakers
+
+
+class TokenBucketTestCase(TestCase):
+    @patch('weather_api.ratelimit.time.monotonic')
+    def test_burst_then_refill(self, mock_monotonic):
+        """ Ensure that the bucket allows a burst and then refills at the configured rate """
+        mock_monotonic.return_value = 100
+        bucket = TokenBucket(rate=60, burst=2)
+        self.assertEqual(bucket.try_acquire(), 0)
+        self.assertEqual(bucket.try_acquire(), 0)
+        self.assertAlmostEqual(bucket.try_acquire(), 1.0)
+        mock_monotonic.return_value = 101
+        self.assertEqual(bucket.try_acquire(), 0)
+
+
+class SharedWindowCounterTestCase(TestCase):
+    def setUp(self):
+        caches['weather'].clear()
+
+    def test_budget_is_shared(self):
+        """ Ensure that two limiters on the same cache spend one budget """
+        first = SharedWindowCounter(rate=3, cache_alias='weather')
+        second = SharedWindowCounter(rate=3, cache_alias='weather')
+        results = [first.try_acquire(), second.try_acquire(), first.try_acquire(), second.try_acquire()]
+        self.assertEqual(results[:3], [0, 0, 0])
+        self.assertGreater(results[3], 0)
+
+
+class UpstreamRateLimiterTestCase(TestCase):
+    def test_rejects_when_budget_is_exhausted(self):
+        """ Ensure that callers fail once they have waited max_wait without budget """
+        limiter = UpstreamRateLimiter(TokenBucket(rate=1, burst=1), max_wait=0)
+        limiter.acquire()
+        with self.assertRaises(UpstreamRateLimited):
+            limiter.acquire()
+        self.assertEqual((limiter.allowed, limiter.rejected), (1, 1))
+
+    @patch('weather_api.ratelimit.time.monotonic', return_value=100)
+    def test_retry_after(self, mock_monotonic):
+        """ Ensure that a rejection tells when the next call is available, in whole seconds """
+        limiter = UpstreamRateLimiter(TokenBucket(rate=20, burst=1), max_wait=0)
+        limiter.acquire()
+        with self.assertRaises(UpstreamRateLimited) as raised:
+            limiter.acquire()
+        self.assertEqual(raised.exception.retry_after, 3)
+
+    def test_queues_until_budget_is_available(self):
+        """ Ensure that callers wait for the next token within max_wait """
+        limiter = UpstreamRateLimiter(TokenBucket(rate=600, burst=1), max_wait=1)
+        limiter.acquire()
+        limiter.acquire()
+        self.assertEqual((limiter.allowed, limiter.delayed), (2, 1))
+
+
+class WeatherUserRateThrottleTestCase(TestCase):
+    def setUp(self):
+        caches['default'].clear()
+        weather_cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+
+    def tearDown(self):
+        caches['default'].clear()
+
+    @patch.object(WeatherUserRateThrottle, 'THROTTLE_RATES', {'weather': '2/min'})
+    def test_user_is_throttled(self):
+        """ Ensure that a user going over the per-user rate gets 429 """
+        responses = [self.client.get('/api/weather/search/') for _ in range(3)]
+        self.assertEqual([response.status_code for response in responses],
+                         [status.HTTP_400_BAD_REQUEST, status.HTTP_400_BAD_REQUEST,
+                          status.HTTP_429_TOO_MANY_REQUESTS])
+
+    def test_quota_view_requires_admin(self):
+        """ Ensure that only admins can read the quota counters """
+        self.assertEqual(self.client.get('/api/weather/quota/').status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_staff = True
+        self.user.save()
+        response = self.client.get('/api/weather/quota/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('rejected', response.data['quota'])
+        self.assertIn('hit_rate', response.data['cache'])
+
+
+class ExhaustedBudgetTestCase(TestCase):
+    def setUp(self):
+        weather_cache.clear()
+        reset_breakers()
+        self.client = APIClient()
+        self.client.force_authenticate(user=get_user_model().objects.create_user(username='testuser'))
+        bucket = TokenBucket(rate=20, burst=1)
+        bucket.try_acquire()
+        budget = patch.multiple(upstream_limiter, bucket=bucket, max_wait=0)
+        budget.start()
+        self.addCleanup(budget.stop)
+
+    @patch('requests.Session.get')
+    def test_sync_view(self, mock_get):
+        """ Ensure that an exhausted upstream budget is a 503 with Retry-After, not a server error """
+        response = self.client.get('/api/weather/search/', {'query': 'London'})
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '3')
+        mock_get.assert_not_called()
+
+    @patch('httpx.AsyncClient.get', new_callable=AsyncMock)
+    def test_async_view(self, mock_get):
+        user = get_user_model().objects.get()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        response = self.client.get('/api/weather/async/forecast/', {'query': 'London'})
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '3')
+        mock_get.assert_not_called()
@@ -0,0 +1,150 @@
+import asyncio
+from unittest.mock import AsyncMock, Mock, patch
+
+import requests
+from django.test import TestCase, override_settings
+
+from weather_api.ratelimit import UpstreamRateLimited
+from weather_api.resilience import (
+    CircuitBreaker, CircuitOpenError, aget_with_retries, get_breaker, get_with_retries, reset_breakers
+)
+
+URL = 'https://api.openweathermap.org/data/2.5/weather'
+
+
+def http_response(status_code):
+    return Mock(status_code=status_code, ok=status_code < 400)
+
+
+class CircuitBreakerTestCase(TestCase):
+    @patch('weather_api.resilience.time.monotonic')
+    def test_opens_and_half_opens(self, mock_monotonic):
+        """ Ensure that the breaker opens at the threshold and lets one probe through after the timeout """
+        mock_monotonic.return_value = 100
+        breaker = CircuitBreaker(threshold=2, reset_timeout=30)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+
+        mock_monotonic.return_value = 131
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+    @patch('weather_api.resilience.time.monotonic', return_value=100)
+    def test_failed_probe_reopens(self, mock_monotonic):
+        """ Ensure that a failed half-open probe opens the breaker again """
+        breaker = CircuitBreaker(threshold=1, reset_timeout=30)
+        breaker.record_failure()
+        mock_monotonic.return_value = 131
+        self.assertTrue(breaker.allow())
+        breaker.record_failure()
+        self.assertFalse(breaker.allow())
+
+
+@override_settings(UPSTREAM_RETRIES=2, UPSTREAM_BREAKER_THRESHOLD=3, UPSTREAM_BREAKER_RESET_TIMEOUT=30)
+@patch('weather_api.resilience.time.sleep')
+class GetWithRetriesTestCase(TestCase):
+    def setUp(self):
+        reset_breakers()
+
+    def tearDown(self):
+        reset_breakers()
+
+    def test_retries_server_errors(self, mock_sleep):
+        """ Ensure that 5xx responses are retried until one succeeds """
+        send = Mock(side_effect=[http_response(503), http_response(200)])
+        self.assertEqual(get_with_retries(URL, send).status_code, 200)
+        self.assertEqual(send.call_count, 2)
+        mock_sleep.assert_called_once()
+
+    def test_client_errors_are_not_retried(self, mock_sleep):
+        """ Ensure that a 404 is returned as is """
+        send = Mock(return_value=http_response(404))
+        self.assertEqual(get_with_retries(URL, send).status_code, 404)
+        send.assert_called_once()
+
+    def test_transport_errors_raise_after_retries(self, mock_sleep):
+        """ Ensure that the last transport error is raised once retries run out """
+        send = Mock(side_effect=requests.ConnectionError)
+        with self.assertRaises(requests.ConnectionError):
+            get_with_retries(URL, send)
+        self.assertEqual(send.call_count, 3)
+
+    def test_open_circuit_fails_fast(self, mock_sleep):
+        """ Ensure that calls are rejected without going out once the breaker is open """
+        send = Mock(side_effect=requests.Timeout)
+        with self.assertRaises(requests.Timeout):
+            get_with_retries(URL, send)
+        with self.assertRaises(CircuitOpenError):
+            get_with_retries(URL, send)
+        self.assertEqual(send.call_count, 3)
+
+    @patch('weather_api.resilience.time.monotonic', return_value=100)
+    def test_unexpected_error_resolves_probe(self, mock_monotonic, mock_sleep):
+        """ Ensure that a probe failing with any other exception reopens the breaker instead of sticking """
+        with self.assertRaises(requests.Timeout):
+            get_with_retries(URL, Mock(side_effect=requests.Timeout))
+        mock_monotonic.return_value = 131
+        with self.assertRaises(requests.exceptions.ChunkedEncodingError):
+            get_with_retries(URL, Mock(side_effect=requests.exceptions.ChunkedEncodingError))
+
+        mock_monotonic.return_value = 162
+        self.assertEqual(get_with_retries(URL, Mock(return_value=http_response(200))).status_code, 200)
+
+    @patch('weather_api.resilience.time.monotonic', return_value=100)
+    def test_interrupted_probe_is_released(self, mock_monotonic, mock_sleep):
+        """ Ensure that a probe ending in a non-upstream exception frees the probe without counting a failure """
+        with self.assertRaises(requests.Timeout):
+            get_with_retries(URL, Mock(side_effect=requests.Timeout))
+        mock_monotonic.return_value = 131
+        with self.assertRaises(KeyboardInterrupt):
+            get_with_retries(URL, Mock(side_effect=KeyboardInterrupt))
+
+        self.assertEqual(get_with_retries(URL, Mock(return_value=http_response(200))).status_code, 200)
+
+    def test_cancellation_is_not_a_failure(self, mock_sleep):
+        """ Ensure that cancelled async calls do not open the breaker """
+        send = AsyncMock(side_effect=asyncio.CancelledError)
+        for _ in range(3):
+            with self.assertRaises(asyncio.CancelledError):
+                asyncio.run(aget_with_retries(URL, send))
+        self.assertEqual(get_breaker(URL).state, CircuitBreaker.CLOSED)
+        self.assertEqual(get_breaker(URL).failures, 0)
+
+    def test_before_attempt_runs_per_attempt(self, mock_sleep):
+        """ Ensure that every attempt, retries included, goes through before_attempt """
+        before_attempt = Mock()
+        send = Mock(side_effect=[http_response(503), http_response(503), http_response(200)])
+        get_with_retries(URL, send, before_attempt)
+        self.assertEqual(before_attempt.call_count, 3)
+
+    @patch('weather_api.resilience.time.monotonic', return_value=100)
+    def test_open_circuit_spends_no_budget(self, mock_monotonic, mock_sleep):
+        """ Ensure that before_attempt is skipped while the breaker is open, and a failing one frees the probe """
+        with self.assertRaises(requests.Timeout):
+            get_with_retries(URL, Mock(side_effect=requests.Timeout))
+        before_attempt = Mock(side_effect=UpstreamRateLimited)
+        with self.assertRaises(CircuitOpenError):
+            get_with_retries(URL, Mock(), before_attempt)
+        before_attempt.assert_not_called()
+
+        mock_monotonic.return_value = 131
+        with self.assertRaises(UpstreamRateLimited):
+            get_with_retries(URL, Mock(), before_attempt)
+        self.assertEqual(get_with_retries(URL, Mock(return_value=http_response(200))).status_code, 200)
+
+    @override_settings(UPSTREAM_RETRY_BACKOFF_MAX=2)
+    def test_rate_limited_honours_retry_after(self, mock_sleep):
+        """ Ensure that a 429 waits for its Retry-After, and is returned when that is too long """
+        limited = Mock(status_code=429, ok=False, headers={'Retry-After': '1'})
+        send = Mock(side_effect=[limited, http_response(200)])
+        self.assertEqual(get_with_retries(URL, send).status_code, 200)
+        mock_sleep.assert_called_once_with(1.0)
+
+        limited.headers = {'Retry-After': '60'}
+        send = Mock(return_value=limited)
+        self.assertEqual(get_with_retries(URL, send).status_code, 429)
+        send.assert_called_once()
@@ -0,0 +1,183 @@
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from weather_api import store
+from weather_api.cache import weather_cache
+from weather_api.models import ForecastSlot, Observation
+
+WEATHER_URL = 'https://api.openweathermap.org/data/2.5/weather'
+FORECAST_URL = 'https://api.openweathermap.org/data/2.5/forecast'
+
+
+def current_weather(temp=4.5):
+    return {
+        'coord': {'lat': 59.437, 'lon': 24.7535},
+        'sys': {'country': 'EE'},
+        'name': 'Tallinn',
+        'main': {'temp': temp},
+        'weather': [{'description': 'light rain'}],
+        'dt': 1700000000,
+    }
+
+
+def forecast(temp=5, entries=8):
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    return {
+        'city': {'name': 'Tallinn', 'country': 'EE', 'coord': {'lat': 59.437, 'lon': 24.7535}},
+        'list': [
+            {
+                'dt': int((start + timedelta(hours=3 * i)).timestamp()),
+                'main': {'temp': temp},
+                'weather': [{'description': 'overcast clouds'}],
+            } for i in range(entries)
+        ],
+    }
+
+
+class ObservationStoreTestCase(TestCase):
+    def test_observation_upsert(self):
+        """ Ensure that storing the same observation twice updates the existing row """
+        store.save_payload(WEATHER_URL, current_weather(4.5))
+        store.save_payload(WEATHER_URL, current_weather(5.5))
+
+        self.assertEqual(Observation.objects.count(), 1)
+        observation = Observation.objects.get()
+        self.assertEqual(observation.location, 'tallinn,ee')
+        self.assertEqual(observation.temperature, 5.5)
+
+    def test_forecast_upsert(self):
+        """ Ensure that a newer forecast replaces the predictions for the same slots """
+        store.save_payload(FORECAST_URL, forecast(5))
+        store.save_payload(FORECAST_URL, forecast(7))
+
+        self.assertEqual(ForecastSlot.objects.count(), 8)
+        self.assertEqual(set(ForecastSlot.objects.values_list('temperature', flat=True)), {7})
+
+    def test_load_recent_payload(self):
+        """ Ensure that stored rows are rebuilt into upstream-shaped payloads by name or coordinates """
+        store.save_payload(WEATHER_URL, current_weather())
+        store.save_payload(FORECAST_URL, forecast())
+
+        data = store.load_recent_payload(WEATHER_URL, {'q': 'Tallinn'})
+        self.assertEqual((data['name'], data['main']['temp']), ('Tallinn', 4.5))
+
+        data = store.load_recent_payload(FORECAST_URL, {'lat': '59.4370', 'lon': '24.7536'})
+        self.assertEqual(data['city']['name'], 'Tallinn')
+        self.assertEqual(len(data['list']), 8)
+
+        self.assertIsNone(store.load_recent_payload(WEATHER_URL, {'q': 'Paris'}))
+
+
+class ReadThroughTestCase(TestCase):
+    def setUp(self):
+        weather_cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+
+    @override_settings(WEATHER_STORE_READ_THROUGH=True)
+    @patch('requests.Session.get')
+    def test_search_answers_from_store(self, mock_get):
+        """ Ensure that recent stored data is served without calling upstream """
+        store.save_payload(WEATHER_URL, current_weather())
+
+        response = self.client.get('/api/weather/search/', {'query': 'Tallinn'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['current_weather_data']['city'], 'Tallinn')
+        mock_get.assert_not_called()
+
+    @override_settings(WEATHER_STORE_OBSERVATIONS=True)
+    @patch('requests.Session.get')
+    def test_fetched_data_is_stored(self, mock_get):
+        """ Ensure that upstream responses are persisted """
+        mock_get.return_value.json.return_value = current_weather()
+
+        self.client.get('/api/weather/search/', {'query': 'Tallinn'})
+
+        self.assertEqual(Observation.objects.filter(location='tallinn,ee').count(), 1)
+
+
+class WeatherHistoryViewTestCase(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(username='testuser', password='testpassword')
+        self.client.force_authenticate(user=self.user)
+
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        Observation.objects.bulk_create([
+            Observation(location='tallinn,ee', city='Tallinn', country='EE', latitude=59.437, longitude=24.7535,
+                        observed_at=start + timedelta(minutes=30 * i), temperature=float(i),
+                        description='clear sky', fetched_at=start)
+            for i in range(96)
+        ])
+        self.params = {'query': 'Tallinn', 'start': '2026-01-01', 'end': '2026-01-03'}
+
+    def test_raw_history_keyset_pages(self):
+        """ Ensure that following the cursor walks every observation exactly once, in order """
+        response = self.client.get('/api/weather/history/', {**self.params, 'limit': 40})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['interval'], 'raw')
+
+        temperatures = [row['temperature'] for row in response.data['results']]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            temperatures += [row['temperature'] for row in response.data['results']]
+
+        self.assertEqual(temperatures, [float(i) for i in range(96)])
+
+    def test_daily_aggregation(self):
+        """ Ensure that daily buckets carry min/max/avg computed by the database """
+        response = self.client.get('/api/weather/history/', {**self.params, 'interval': 'day'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        first, second = response.data['results']
+        self.assertEqual((first['min_temperature'], first['max_temperature'], first['samples']), (0, 47, 48))
+        self.assertAlmostEqual(second['avg_temperature'], 71.5)
+
+    def walk_buckets(self, interval, limit):
+        """ Bucket starts collected by following the next links, then the previous links back from the last page """
+        response = self.client.get('/api/weather/history/', {**self.params, 'interval': interval, 'limit': limit})
+        pages = [[row['bucket'] for row in response.data['results']]]
+        self.assertIsNone(response.data['previous'])
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            pages.append([row['bucket'] for row in response.data['results']])
+
+        backwards = [pages[-1]]
+        while response.data['previous']:
+            response = self.client.get(response.data['previous'])
+            backwards.insert(0, [row['bucket'] for row in response.data['results']])
+        self.assertEqual(backwards, pages)
+        return [bucket for page in pages for bucket in page]
+
+    def test_bucket_keyset_pages(self):
+        """ Ensure that hourly and daily buckets are paginated both ways without duplicates or gaps """
+        start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        hours = self.walk_buckets('hour', 7)
+        self.assertEqual(hours, [start + timedelta(hours=i) for i in range(48)])
+        days = self.walk_buckets('day', 1)
+        self.assertEqual(days, [start, start + timedelta(days=1)])
+
+    def test_history_stream(self):
+        """ Ensure that ?stream=1 emits one NDJSON line per hourly bucket """
+        response = self.client.get('/api/weather/history/', {**self.params, 'interval': 'hour', 'stream': '1'})
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(len(b''.join(response.streaming_content).splitlines()), 48)
+
+    def test_invalid_requests(self):
+        """ Ensure that bad intervals, ranges and unknown locations are rejected """
+        response = self.client.get('/api/weather/history/', {**self.params, 'interval': 'week'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get('/api/weather/history/', {**self.params, 'start': '2026-01-05'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.get('/api/weather/history/', {**self.params, 'query': 'Paris'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
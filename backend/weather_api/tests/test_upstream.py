@@ -0,0 +1,37 @@
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from weather_api import upstream
+
+
+class UpstreamClientTestCase(TestCase):
+    def setUp(self):
+        """ Start every test with a fresh pool """
+        upstream.reset_session()
+
+    def tearDown(self):
+        upstream.reset_session()
+
+    def test_session_is_shared(self):
+        """ Ensure that every caller goes through the same pooled session """
+        self.assertIs(upstream.get_session(), upstream.get_session())
+
+    @override_settings(UPSTREAM_POOL_MAXSIZE=7)
+    def test_pool_size_from_settings(self):
+        """ Ensure that the adapter pool is sized from settings """
+        adapter = upstream.get_session().get_adapter('https://api.openweathermap.org')
+        self.assertEqual(adapter._pool_maxsize, 7)
+
+    @override_settings(UPSTREAM_CONNECT_TIMEOUT=1.5, UPSTREAM_READ_TIMEOUT=4)
+    @patch('requests.Session.get')
+    def test_get_passes_explicit_timeout(self, mock_get):
+        """ Ensure that upstream calls never run without a timeout """
+        upstream.get('https://example.com', params={'a': 1})
+        mock_get.assert_called_once_with('https://example.com', params={'a': 1}, timeout=(1.5, 4))
+
+    @patch('weather_api.upstream.close_old_connections')
+    def test_pool_tasks_close_connections(self, mock_close):
+        """ Ensure that database connections opened by pool threads are closed around every task """
+        self.assertEqual(upstream.submit(lambda value: value * 2, 21).result(), 42)
+        self.assertEqual(mock_close.call_count, 2)
@@ -1,10 +1,18 @@
-from django.test import TestCase
+import json
+
+import requests
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
 from datetime import datetime, timedelta
-from unittest.mock import patch
+from unittest.mock import Mock, patch
+
+from weather_api.cache import weather_cache
+from weather_api.geolocation import geo_cache
+from weather_api.ratelimit import TokenBucket, upstream_limiter
+from weather_api.resilience import reset_breakers
 
 User = get_user_model()
 
@@ -12,6 +20,13 @@ User = get_user_model()
 class WeatherViewsTestCase(TestCase):
     def setUp(self):
         """ Set up test environment """
+        weather_cache.clear()
+        geo_cache.clear()
+        reset_breakers()
+        # A fresh call budget, so earlier tests of the suite cannot exhaust it
+        budget = patch.object(upstream_limiter, 'bucket', TokenBucket(rate=1000))
+        budget.start()
+        self.addCleanup(budget.stop)
         self.client = APIClient()
         self.user = User.objects.create_user(username='testuser', password='testpassword')
         self.weather_search_url = '/api/weather/search/'
@@ -21,7 +36,7 @@ class WeatherViewsTestCase(TestCase):
         """ Authenticate the test user """
         self.client.force_authenticate(user=self.user)
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_search_weather_view(self, mock_get):
         """ Test the search weather view """
         self.authenticate_user()
@@ -46,7 +61,7 @@ class WeatherViewsTestCase(TestCase):
         self.assertIn('description', data['current_weather_data'])
         self.assertIn('datetime', data['current_weather_data'])
 
-    @patch('requests.get')
+    @patch('requests.Session.get')
     def test_forecast_weather_view(self, mock_get):
         """ Test the forecast weather view """
         self.authenticate_user()
@@ -71,4 +86,201 @@ class WeatherViewsTestCase(TestCase):
         self.assertTrue(isinstance(data['next_7_days_forecast'], list))
         self.assertEqual(len(data['next_7_days_forecast']), 7)
 
+    @patch('requests.Session.get')
+    def test_current_forecast_view(self, mock_get):
+        """ Ensure that current weather and forecast are both requested by the ipinfo coordinates """
+        self.authenticate_user()
+
+        payloads = {
+            'json': {'loc': '40.7143,-74.0060'},
+            'weather': {
+                'sys': {'country': 'US'},
+                'name': 'New York',
+                'main': {'temp': 14.21},
+                'weather': [{'description': 'clear sky'}]
+            },
+            'forecast': {
+                'city': {'name': 'New York', 'country': 'US'},
+                'list': [
+                    {
+                        'dt_txt': (datetime.now() + timedelta(days=i)).strftime('%Y-%m-%d %H:%M:%S'),
+                        'main': {'temp': 20},
+                        'weather': [{'description': 'clear sky'}]
+                    } for i in range(3)
+                ]
+            },
+        }
+
+        def fake_get(url, params=None, timeout=None):
+            response = Mock()
+            response.json.return_value = payloads[url.rsplit('/', 1)[-1]]
+            return response
+
+        mock_get.side_effect = fake_get
+
+        response = self.client.get('/api/weather/current_forecast/', HTTP_X_FORWARDED_FOR='8.8.8.8')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data['current_weather_data']['city'], 'New York')
+        self.assertEqual(len(data['next_7_days_forecast']), 3)
+
+        weather_calls = [call for call in mock_get.call_args_list if call.kwargs.get('params')]
+        self.assertEqual(len(weather_calls), 2)
+        for call in weather_calls:
+            self.assertEqual((call.kwargs['params']['lat'], call.kwargs['params']['lon']), ('40.7143', '-74.0060'))
+            self.assertNotIn('q', call.kwargs['params'])
+
+    @patch('requests.Session.get')
+    def test_batch_weather_view(self, mock_get):
+        """ Ensure that the batch view deduplicates queries and reports failures per item """
+        self.authenticate_user()
+
+        # Mock.call_count is not incremented atomically and the batch fetches from worker threads
+        requested = []
+
+        def fake_get(url, params=None, timeout=None):
+            requested.append(params['q'])
+            response = Mock()
+            if params['q'] == 'atlantis':
+                response.raise_for_status.side_effect = requests.HTTPError('404 Client Error: Not Found')
+            response.json.return_value = {
+                'sys': {'country': 'GB'},
+                'name': params['q'].split(',')[0].title(),
+                'main': {'temp': 9.5},
+                'weather': [{'description': 'mist'}]
+            }
+            return response
+
+        mock_get.side_effect = fake_get
+
+        queries = ['London', ' london ', 'Paris', 'Atlantis']
+        response = self.client.post('/api/weather/batch/', {'queries': queries}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()['results']
+        self.assertEqual([result['query'] for result in results], ['london', 'paris', 'atlantis'])
+        self.assertEqual(results[0]['current_weather_data']['city'], 'London')
+        self.assertIn('error', results[2])
+        self.assertEqual(sorted(requested), ['London,GB', 'Paris,FR', 'atlantis'])
+
+    @patch('requests.Session.get')
+    def test_batch_serves_cache_hits(self, mock_get):
+        """ Ensure that cached cities are not requested upstream again """
+        self.authenticate_user()
+        mock_get.return_value.json.return_value = {
+            'sys': {'country': 'FR'},
+            'name': 'Paris',
+            'main': {'temp': 12},
+            'weather': [{'description': 'clear sky'}]
+        }
+
+        self.client.get(self.weather_search_url, {'query': 'Paris'})
+        response = self.client.post('/api/weather/batch/', {'queries': ['Paris']}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()['results'][0]['current_weather_data']['city'], 'Paris')
+        mock_get.assert_called_once()
+
+    @patch('requests.Session.get')
+    def test_forecast_summary(self, mock_get):
+        """ Ensure that ?summary=1 returns one summary per day instead of 3-hourly entries """
+        self.authenticate_user()
+        start = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        mock_get.return_value.json.return_value = {
+            'city': {'name': 'New York', 'country': 'US'},
+            'list': [
+                {
+                    'dt_txt': (start + timedelta(hours=6 * i)).strftime('%Y-%m-%d %H:%M:%S'),
+                    'main': {'temp': 20 + i},
+                    'weather': [{'description': 'clear sky'}]
+                } for i in range(8)
+            ]
+        }
+
+        response = self.client.get(self.weather_forecast_url, {'query': 'New York', 'summary': '1'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        days = response.json()['daily_summary']
+        self.assertEqual(len(days), 2)
+        self.assertEqual((days[0]['min_temperature'], days[0]['max_temperature']), (20, 23))
+        self.assertEqual(days[1]['trend'], 4)
+
+    @patch('requests.Session.get')
+    def test_batch_forecast_summary(self, mock_get):
+        """ Ensure that a summary batch returns daily forecasts per city and per-item errors """
+        self.authenticate_user()
+
+        def fake_get(url, params=None, timeout=None):
+            response = Mock()
+            if params['q'] == 'atlantis':
+                response.raise_for_status.side_effect = requests.HTTPError('404 Client Error: Not Found')
+            response.json.return_value = {
+                'city': {'name': params['q'].split(',')[0].title(), 'country': 'GB'},
+                'list': [{'dt_txt': datetime.now().strftime('%Y-%m-%d %H:%M:%S'), 'main': {'temp': 9.5},
+                          'weather': [{'description': 'mist'}]}]
+            }
+            return response
+
+        mock_get.side_effect = fake_get
+
+        response = self.client.post('/api/weather/batch/', {'queries': ['London', 'Atlantis', 'Leeds'],
+                                                            'summary': True}, format='json')
 
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        london, atlantis, leeds = response.json()['results']
+        self.assertEqual(london['daily_summary'][0]['mean_temperature'], 9.5)
+        self.assertEqual(leeds['city'], 'Leeds')
+        self.assertIn('error', atlantis)
+        self.assertTrue(all(call.args[0].endswith('/forecast') for call in mock_get.call_args_list))
+
+    @override_settings(WEATHER_BATCH_MAX_QUERIES=2)
+    def test_batch_rejects_invalid_input(self):
+        """ Ensure that the batch view validates the list of queries """
+        self.authenticate_user()
+
+        response = self.client.post('/api/weather/batch/', {'queries': 'London'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.post('/api/weather/batch/', {'queries': ['a', 'b', 'c']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @patch('requests.Session.get')
+    def test_forecast_stream(self, mock_get):
+        """ Ensure that ?stream=1 returns one NDJSON line per forecast entry """
+        self.authenticate_user()
+        mock_get.return_value.json.return_value = {
+            'city': {'name': 'New York', 'country': 'US'},
+            'list': [
+                {
+                    'dt_txt': (datetime.now() + timedelta(days=i)).strftime('%Y-%m-%d %H:%M:%S'),
+                    'main': {'temp': 20},
+                    'weather': [{'description': 'clear sky'}]
+                } for i in range(4)
+            ]
+        }
+
+        response = self.client.get(self.weather_forecast_url, {'query': 'New York', 'stream': '1'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertEqual(json.loads(lines[0])['city'], 'New York')
+
+    @patch('requests.Session.get')
+    def test_batch_stream_with_accept_header(self, mock_get):
+        """ Ensure that Accept: application/x-ndjson streams one line per city """
+        self.authenticate_user()
+        mock_get.return_value.json.return_value = {
+            'sys': {'country': 'GB'},
+            'name': 'London',
+            'main': {'temp': 9.5},
+            'weather': [{'description': 'mist'}]
+        }
+
+        response = self.client.post('/api/weather/batch/', {'queries': ['London', 'Leeds']}, format='json',
+                                    HTTP_ACCEPT='application/x-ndjson')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(sorted(json.loads(line)['query'] for line in lines), ['leeds', 'london'])
@@ -0,0 +1,125 @@
+import contextvars
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+from django.conf import settings
+from django.db import close_old_connections
+from requests.adapters import HTTPAdapter
+
+from weather_api.instrumentation import record_upstream
+from weather_api.resilience import get_with_retries
+
+_lock = threading.Lock()
+_session = None
+_executor = None
+
+
+def build_session():
+    """ Build a requests session with a tuned keep-alive connection pool """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=settings.UPSTREAM_POOL_CONNECTIONS,
+        pool_maxsize=settings.UPSTREAM_POOL_MAXSIZE,
+        pool_block=settings.UPSTREAM_POOL_BLOCK,
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Connection': 'keep-alive', 'Accept': 'application/json'})
+    return session
+
+
+def get_session():
+    """ Return the process-wide upstream session, creating it on first use """
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = build_session()
+    return _session
+
+
+def reset_session():
+    """ Close the shared session so the next call builds a fresh pool """
+    global _session
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+
+
+def get_timeout():
+    """ Explicit (connect, read) timeout used for every upstream call """
+    return settings.UPSTREAM_CONNECT_TIMEOUT, settings.UPSTREAM_READ_TIMEOUT
+
+
+def get(url, params=None, before_attempt=None):
+    """
+    GET an upstream URL through the shared pool with explicit timeouts, the host's breaker and retries.
+    before_attempt() runs ahead of the first call and of every retry.
+    """
+    start = time.perf_counter()
+    try:
+        response = get_with_retries(url, lambda: get_session().get(url, params=params, timeout=get_timeout()),
+                                    before_attempt)
+    except Exception as e:
+        record_upstream(url, type(e).__name__, time.perf_counter() - start)
+        raise
+    record_upstream(url, response.status_code, time.perf_counter() - start)
+    return response
+
+
+def get_executor():
+    """ Process-wide thread pool for running independent upstream calls concurrently """
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=settings.UPSTREAM_FANOUT_WORKERS,
+                                               thread_name_prefix='upstream')
+    return _executor
+
+
+def run_in_worker(func, *args):
+    """
+    Run a task on a pool thread. Django only closes database connections on request signals, so close the
+    connection this thread opened for the task (or one the database dropped meanwhile) around every task.
+    """
+    close_old_connections()
+    try:
+        return func(*args)
+    finally:
+        close_old_connections()
+
+
+def submit(func, *args):
+    """ Run func on the shared pool within a copy of the caller's context, so request timings follow it """
+    return get_executor().submit(contextvars.copy_context().run, run_in_worker, func, *args)
+
+
+def map_bounded(func, items, concurrency):
+    """
+    Run func over items on the shared pool with at most `concurrency` calls in flight.
+    Yields (item, result, error) tuples in completion order.
+    """
+    pending = {}
+    items = iter(items)
+
+    def submit_next():
+        for item in items:
+            pending[submit(func, item)] = item
+            return True
+        return False
+
+    for _ in range(max(1, concurrency)):
+        if not submit_next():
+            break
+
+    while pending:
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            item = pending.pop(future)
+            error = future.exception()
+            yield item, None if error else future.result(), error
+            submit_next()
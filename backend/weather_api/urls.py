@@ -1,5 +1,5 @@
 from django.urls import path
-from weather_api import views
+from weather_api import async_views, views
 
 urlpatterns = [
 
@@ -7,5 +7,16 @@ urlpatterns = [
     path('weather/current_forecast/', views.WeatherCurrentForecastView.as_view(), name='current_weather_forecast'),
 
     path('weather/search/', views.WeatherSearchView.as_view(), name='search_weather'),
+    path('weather/batch/', views.WeatherBatchView.as_view(), name='batch_weather'),
     path('weather/forecast/', views.WeatherForecastView.as_view(), name='weather_forecast'),
+    path('weather/history/', views.WeatherHistoryView.as_view(), name='weather_history'),
+    path('weather/locations/', views.WeatherLocationsView.as_view(), name='weather_locations'),
+    path('weather/quota/', views.WeatherQuotaView.as_view(), name='weather_quota'),
+
+    # Async variants for ASGI deployments
+    path('weather/async/current/', async_views.AsyncWeatherCurrentView.as_view(), name='async_current_weather'),
+    path('weather/async/current_forecast/', async_views.AsyncWeatherCurrentForecastView.as_view(),
+         name='async_current_weather_forecast'),
+    path('weather/async/search/', async_views.AsyncWeatherSearchView.as_view(), name='async_search_weather'),
+    path('weather/async/forecast/', async_views.AsyncWeatherForecastView.as_view(), name='async_weather_forecast'),
 ]
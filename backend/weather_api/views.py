@@ -1,26 +1,99 @@
+import logging
+
 import requests
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta, timezone as dt_timezone
 from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
 
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 
+from weather_api import fastjson, store, upstream
+from weather_api.analytics import summarize_forecast, summarize_forecasts
+from weather_api.authentication import WeatherJWTAuthentication
+from weather_api.cache import weather_cache
+from weather_api.conditional import ConditionalResponseMixin, apply_validators, not_modified_response
+from weather_api.geolocation import resolve_location
+from weather_api.hot_queries import hot_queries
+from weather_api.instrumentation import instrument
+from weather_api.locations import location_index, location_params, normalize_query, tidy_query
+from weather_api.pagination import HistoryCursorPagination
+from weather_api.ratelimit import (
+    LocationsUserRateThrottle, UpstreamRateLimited, WeatherUserRateThrottle, upstream_limiter
+)
+from weather_api.renderers import NDJSONRenderer, NDJSONStreamMixin
+
+logger = logging.getLogger(__name__)
+
+EPOCH_DATE = date(1970, 1, 1)
+
 
 class WeatherDataMixin:
     """ Mixin class for common weather data retrieval and processing methods """
+    response_class = Response
+
+    @classmethod
+    def get_weather_data(cls, base_url, params):
+        """ Return upstream weather data, served from the response cache when fresh """
+        return weather_cache.get_or_fetch(base_url, params, lambda: cls.load_weather_data(base_url, params))
+
+    @classmethod
+    def load_weather_data(cls, base_url, params):
+        """ Answer from the observation store when recent data exists, otherwise fetch and persist """
+        if settings.WEATHER_STORE_READ_THROUGH:
+            data = store.load_recent_payload(base_url, params)
+            if data is not None:
+                return data
+
+        data = cls.fetch_weather_data(base_url, params)
+
+        if settings.WEATHER_STORE_OBSERVATIONS:
+            try:
+                store.save_payload(base_url, data)
+            except Exception:
+                # Persisting is best effort and must never fail the request
+                logger.exception('Could not store weather data from %s', base_url)
+        return data
 
     @staticmethod
-    def get_weather_data(base_url, params):
+    def fetch_weather_data(base_url, params):
         try:
-            response = requests.get(base_url, params=params)
+            # Every attempt, retries included, spends a call of the OpenWeatherMap budget
+            response = upstream.get(base_url, params=params, before_attempt=upstream_limiter.acquire)
             response.raise_for_status()
-            return response.json()
+            return fastjson.response_json(response)
+        except UpstreamRateLimited:
+            raise
         except requests.RequestException as e:
-            raise requests.RequestException(f"Error retrieving weather data: {str(e)}")
+            raise requests.RequestException(f"Error retrieving weather data: {str(e)}") from e
+
+    @classmethod
+    def rate_limited_response(cls, error):
+        """ 503 telling the client when to retry once the OpenWeatherMap call budget is exhausted """
+        return cls.response_class({"detail": str(error)}, status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                  headers={'Retry-After': str(error.retry_after)})
 
     @staticmethod
+    def wants_summary(request):
+        """ Whether daily summaries were requested instead of 3-hourly entries (?summary=1 or "summary": true) """
+        value = request.query_params.get('summary') or request.data.get('summary', '')
+        return str(value).lower() in ('1', 'true', 'yes')
+
+    @staticmethod
+    def get_query_params(query):
+        """ Upstream params for a city name or zip code query, canonicalized through the location index """
+        return {
+            **location_params(query),
+            'appid': settings.OPENWEATHERMAP_API_KEY,
+            'units': 'metric',
+        }
+
+    @staticmethod
+    @instrument('transform')
     def extract_current_weather_info(data):
         """ Extract relevant information from current weather data """
         return {
@@ -37,66 +110,92 @@ class WeatherDataMixin:
         """ Extract city and country information from weather data """
         return data['city']['name'], data['city']['country']
 
-    @staticmethod
-    def extract_forecast_info(data, city_name, country):
+    @classmethod
+    @instrument('transform')
+    def extract_forecast_info(cls, data, city_name, country):
         """ Extract forecast information from weather data """
-        forecast_info = []
+        return list(cls.iter_forecast_info(data, city_name, country))
 
-        for entry in data['list']:
-            formatted_date = datetime.strptime(entry['dt_txt'], '%Y-%m-%d %H:%M:%S')
-            formatted_date_str = formatted_date.strftime('%d %B %Y')
-            time = formatted_date.strftime('%H:%M')
+    @staticmethod
+    def iter_forecast_info(data, city_name, country, days=None):
+        """
+        Single pass over the forecast list: shape each entry and, when days is set, drop entries
+        dated after today + days. Uses the numeric 'dt' epoch (falling back to 'dt_txt') and formats
+        each distinct day only once.
+        """
+        cutoff = (datetime.now() + timedelta(days=days)).date() if days is not None else None
+        formatted_days = {}
 
-            forecast_info.append({
+        for entry in data['list']:
+            epoch = entry.get('dt')
+            if epoch is not None:
+                day_number, seconds = divmod(int(epoch), 86400)
+                day_key = day_number
+                time = f'{seconds // 3600:02d}:{seconds % 3600 // 60:02d}'
+            else:
+                dt_txt = entry['dt_txt']
+                day_key = dt_txt[:10]
+                time = dt_txt[11:16]
+
+            if day_key not in formatted_days:
+                day = EPOCH_DATE + timedelta(days=day_key) if epoch is not None else date.fromisoformat(day_key)
+                # None marks a day past the cutoff, so later entries of that day are skipped without formatting
+                formatted_days[day_key] = None if cutoff is not None and day > cutoff else day.strftime('%d %B %Y')
+
+            formatted_date_str = formatted_days[day_key]
+            if formatted_date_str is None:
+                continue
+
+            yield {
                 'time': time,
                 'country': country,
                 'city': city_name,
                 'temperature': entry['main']['temp'],
                 'description': entry['weather'][0]['description'],
                 'datetime': formatted_date_str,
-            })
-
-        return forecast_info
+            }
 
-    @staticmethod
-    def filter_forecast_for_next_7_days(forecast_info):
-        """ Filter forecast information for the next 7 days """
-        return [entry for entry in forecast_info if
-                datetime.strptime(entry['datetime'], '%d %B %Y') <= datetime.now() + timedelta(days=7)]
+    @classmethod
+    @instrument('transform')
+    def get_next_7_days_forecast(cls, data):
+        """ Shape and filter an upstream forecast payload in a single pass """
+        city_name, country = cls.extract_location_info(data)
+        return list(cls.iter_forecast_info(data, city_name, country, days=7))
 
 
 class WeatherCurrentView(APIView, WeatherDataMixin):
     """ GET the current weather based on the user's IP address """
+    authentication_classes = [WeatherJWTAuthentication]
     permission_classes = [IsAuthenticated]
+    throttle_classes = [WeatherUserRateThrottle]
 
     def get(self, request):
-        user_ip = self.get_client_ip(request)
+        location = resolve_location(self.get_client_ip(request))
 
-        ipinfo_url = f'https://ipinfo.io/{user_ip}/json'
-        ipinfo_response = requests.get(ipinfo_url)
-        ipinfo_data = ipinfo_response.json()
-
-        loc = ipinfo_data.get('loc', '')
-        if not loc or ',' not in loc:
+        if not location:
             return Response({"detail": "Unable to determine user location."},
                             status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-        latitude, longitude = loc.split(',')
-        api_key = settings.OPENWEATHERMAP_API_KEY
+        try:
+            weather_info = self.get_current_weather(*location)
+        except UpstreamRateLimited as e:
+            return self.rate_limited_response(e)
+
+        return Response({"current_weather_data": weather_info}, status=status.HTTP_200_OK)
 
-        base_url = 'https://api.openweathermap.org/data/2.5/weather'
+    def get_current_weather(self, latitude, longitude):
+        """ Get the current weather by coordinates """
+        base_url = f'{settings.OPENWEATHERMAP_API_URL}/weather'
         params = {
             'lat': latitude,
             'lon': longitude,
-            'appid': api_key,
+            'appid': settings.OPENWEATHERMAP_API_KEY,
             'units': 'metric',
         }
 
         data = self.get_weather_data(base_url, params)
 
-        weather_info = self.extract_current_weather_info(data)
-
-        return Response({"current_weather_data": weather_info}, status=status.HTTP_200_OK)
+        return self.extract_current_weather_info(data)
 
     @staticmethod
     def get_client_ip(request):
@@ -109,9 +208,11 @@ class WeatherCurrentView(APIView, WeatherDataMixin):
         return ip
 
 
-class WeatherSearchView(APIView, WeatherDataMixin):
+class WeatherSearchView(APIView, WeatherDataMixin, ConditionalResponseMixin):
     """ GET the current weather based on the provided city name or zip code """
+    authentication_classes = [WeatherJWTAuthentication]
     permission_classes = [IsAuthenticated]
+    throttle_classes = [WeatherUserRateThrottle]
 
     def get(self, request):
         try:
@@ -121,28 +222,142 @@ class WeatherSearchView(APIView, WeatherDataMixin):
                 return Response({"detail": "Please provide a city name or zip code"},
                                 status=status.HTTP_400_BAD_REQUEST)
 
-            base_url = 'https://api.openweathermap.org/data/2.5/weather'
-            params = {
-                'q': query,
-                'zip': query,
-                'appid': settings.OPENWEATHERMAP_API_KEY,
-                'units': 'metric',
-            }
+            hot_queries.record('weather', tidy_query(query))
+
+            base_url = f'{settings.OPENWEATHERMAP_API_URL}/weather'
+            params = self.get_query_params(query)
 
-            data = self.get_weather_data(base_url, params)
+            data, validators = self.get_validated_data(request, base_url, params)
+            if data is None:
+                return not_modified_response(validators)
 
             weather_info = self.extract_current_weather_info(data)
 
-            return Response({"current_weather_data": weather_info}, status=status.HTTP_200_OK)
+            return apply_validators(Response({"current_weather_data": weather_info}, status=status.HTTP_200_OK),
+                                    validators)
 
+        except UpstreamRateLimited as e:
+            return self.rate_limited_response(e)
         except Exception as e:
             error_message = f"Check that the entered data is correct:  {str(e)}"
             return Response({"error": error_message}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class WeatherForecastView(APIView, WeatherDataMixin):
+class WeatherBatchView(APIView, WeatherDataMixin, NDJSONStreamMixin):
+    """
+    POST a list of city names or zip codes and GET the current weather for all of them,
+    or with "summary": true the daily forecast summaries of all of them
+    """
+    authentication_classes = [WeatherJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [WeatherUserRateThrottle]
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [NDJSONRenderer]
+
+    def post(self, request):
+        queries = request.data.get('queries', None)
+
+        if not isinstance(queries, list) or not queries or not all(isinstance(q, str) for q in queries):
+            return Response({"detail": "Please provide a list of city names or zip codes in 'queries'"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        queries = self.normalize_queries(queries)
+
+        if len(queries) > settings.WEATHER_BATCH_MAX_QUERIES:
+            return Response({"detail": f"A batch may contain at most {settings.WEATHER_BATCH_MAX_QUERIES} queries"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        if self.wants_summary(request):
+            results = self.summarize_results(queries)
+            if self.wants_stream(request):
+                return self.stream_response(results)
+            return Response({"results": results}, status=status.HTTP_200_OK)
+
+        if self.wants_stream(request):
+            return self.stream_response(result for _, result in self.iter_results(queries))
+
+        results = dict(self.iter_results(queries))
+
+        return Response({"results": [results[query] for query in queries]}, status=status.HTTP_200_OK)
+
+    @staticmethod
+    def normalize_queries(queries):
+        """
+        Collapse whitespace and case, dropping empty queries and other spellings of an earlier query (same
+        folded form) while keeping their order
+        """
+        unique = {}
+        for query in queries:
+            key = normalize_query(query)
+            if key and key not in unique:
+                unique[key] = tidy_query(query).lower()
+        return list(unique.values())
+
+    def iter_payloads(self, queries, endpoint):
+        """ Yield (query, data, error) triples: cache hits first, then upstream misses as they complete """
+        base_url = f'{settings.OPENWEATHERMAP_API_URL}/{endpoint}'
+        misses = []
+
+        for query in queries:
+            hot_queries.record(endpoint, query)
+            data = weather_cache.peek(base_url, self.get_query_params(query))
+            if data is None:
+                misses.append(query)
+            else:
+                yield query, data, None
+
+        yield from upstream.map_bounded(
+            lambda query: self.get_weather_data(base_url, self.get_query_params(query)),
+            misses,
+            settings.WEATHER_BATCH_CONCURRENCY,
+        )
+
+    def iter_results(self, queries):
+        """ Yield (query, result) pairs of current weather in completion order """
+        for query, data, error in self.iter_payloads(queries, 'weather'):
+            yield query, self.build_result(query, data, error)
+
+    def summarize_results(self, queries):
+        """ Fetch every forecast, then summarize all of them in one vectorized pass; results keep query order """
+        fetched = {query: (data, error) for query, data, error in self.iter_payloads(queries, 'forecast')}
+        results, summarized = {}, []
+
+        for query in queries:
+            data, error = fetched[query]
+            if error is None:
+                try:
+                    city_name, country = self.extract_location_info(data)
+                    if not isinstance(data['list'], list):
+                        raise TypeError("'list' is not a list")
+                except (KeyError, TypeError) as e:
+                    error = e
+                else:
+                    results[query] = {"query": query, "city": city_name, "country": country}
+                    summarized.append((query, data))
+                    continue
+            results[query] = self.build_result(query, None, error)
+
+        summaries = summarize_forecasts([data for _, data in summarized], days=7)
+        for (query, _), summary in zip(summarized, summaries):
+            results[query]["daily_summary"] = summary
+
+        return [results[query] for query in queries]
+
+    def build_result(self, query, data, error=None):
+        """ Shape one batch item like WeatherSearchView, or as an error entry """
+        if error is None:
+            try:
+                return {"query": query, "current_weather_data": self.extract_current_weather_info(data)}
+            except (KeyError, IndexError, TypeError) as e:
+                error = e
+        return {"query": query, "error": f"Check that the entered data is correct:  {str(error)}"}
+
+
+class WeatherForecastView(APIView, WeatherDataMixin, NDJSONStreamMixin, ConditionalResponseMixin):
     """ GET the weather forecast for the next 7 days based on the provided city name or zip code """
+    authentication_classes = [WeatherJWTAuthentication]
     permission_classes = [IsAuthenticated]
+    throttle_classes = [WeatherUserRateThrottle]
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [NDJSONRenderer]
 
     def get(self, request):
         try:
@@ -152,73 +367,179 @@ class WeatherForecastView(APIView, WeatherDataMixin):
                 return Response({"detail": "Please provide a city name or zip code"},
                                 status=status.HTTP_400_BAD_REQUEST)
 
-            base_url = 'https://api.openweathermap.org/data/2.5/forecast'
-            api_key = settings.OPENWEATHERMAP_API_KEY
-
-            params = {
-                'q': query,
-                'zip': query,
-                'appid': api_key,
-                'units': 'metric',
-            }
+            hot_queries.record('forecast', tidy_query(query))
 
-            data = self.get_weather_data(base_url, params)
+            base_url = f'{settings.OPENWEATHERMAP_API_URL}/forecast'
+            params = self.get_query_params(query)
 
-            city_name, country = self.extract_location_info(data)
+            data, validators = self.get_validated_data(request, base_url, params)
+            if data is None:
+                return not_modified_response(validators)
 
-            forecast_info = self.extract_forecast_info(data, city_name, country)
+            if self.wants_summary(request):
+                city_name, country = self.extract_location_info(data)
+                response = Response({"city": city_name, "country": country,
+                                     "daily_summary": summarize_forecast(data, days=7)}, status=status.HTTP_200_OK)
+            elif self.wants_stream(request):
+                city_name, country = self.extract_location_info(data)
+                response = self.stream_response(self.iter_forecast_info(data, city_name, country, days=7))
+            else:
+                next_7_days_forecast = self.get_next_7_days_forecast(data)
+                response = Response({"next_7_days_forecast": next_7_days_forecast}, status=status.HTTP_200_OK)
 
-            next_7_days_forecast = self.filter_forecast_for_next_7_days(forecast_info)
-
-            return Response({"next_7_days_forecast": next_7_days_forecast}, status=status.HTTP_200_OK)
+            return apply_validators(response, validators)
 
+        except UpstreamRateLimited as e:
+            return self.rate_limited_response(e)
         except Exception as e:
             error_message = f"Check that the entered data is correct:  {str(e)}"
             return Response({"error": error_message}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
-class WeatherCurrentForecastView(WeatherCurrentView):
-    """ GET the current weather and forecast for the next 7 days based on the user's IP address """
+class WeatherHistoryView(APIView, NDJSONStreamMixin):
+    """
+    GET stored observations for a location and time range (?query=&start=&end=), optionally downsampled
+    in the database with ?interval=hour|day. Pages are keyset-paginated; ?stream=1 streams the whole range.
+    """
+    authentication_classes = [WeatherJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [WeatherUserRateThrottle]
+    renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES + [NDJSONRenderer]
+    pagination_class = HistoryCursorPagination
 
     def get(self, request):
-        current_weather_response = super().get(request)
+        query = request.query_params.get('query', None)
+        if not query:
+            return Response({"detail": "Please provide a city name"}, status=status.HTTP_400_BAD_REQUEST)
 
-        if current_weather_response.status_code != status.HTTP_200_OK:
-            return current_weather_response
+        interval = request.query_params.get('interval') or None
+        if interval is not None and interval not in store.HISTORY_INTERVALS:
+            return Response({"detail": f"Interval must be one of: {', '.join(store.HISTORY_INTERVALS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
 
-        current_weather_data = current_weather_response.data.get("current_weather_data", {})
+        try:
+            start, end = self.get_time_range(request.query_params)
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-        city_name = current_weather_data.get("city", "")
+        location = store.resolve_history_location(query)
+        if location is None:
+            return Response({"detail": "No stored observations for this location"}, status=status.HTTP_404_NOT_FOUND)
 
-        forecast_response = self.get_7_days_forecast(city_name, current_weather_data)
+        queryset = store.history_queryset(location, start, end, interval)
+        ordering = 'bucket' if interval else 'observed_at'
 
-        return forecast_response
+        if self.wants_stream(request):
+            return self.stream_response(
+                queryset.order_by(ordering).iterator(chunk_size=settings.WEATHER_HISTORY_CHUNK_SIZE))
 
-    def get_7_days_forecast(self, city_name, current_weather_data):
-        """ Add logic to get the weather forecast for the next 7 days """
-        try:
-            base_url = 'https://api.openweathermap.org/data/2.5/forecast'
-            api_key = settings.OPENWEATHERMAP_API_KEY
+        paginator = self.pagination_class()
+        paginator.ordering = ordering
+        page = paginator.paginate_queryset(queryset, request, view=self)
 
-            params = {
-                'q': city_name,
-                'appid': api_key,
-                'units': 'metric',
-            }
+        return Response({
+            "location": location,
+            "interval": interval or 'raw',
+            "next": paginator.get_next_link(),
+            "previous": paginator.get_previous_link(),
+            "results": page,
+        }, status=status.HTTP_200_OK)
 
-            data = self.get_weather_data(base_url, params)
+    @staticmethod
+    def parse_time(value, name):
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                raise ValueError(f"Invalid {name}: use an ISO 8601 date or datetime")
+            moment = datetime(day.year, day.month, day.day)
+        if timezone.is_naive(moment):
+            moment = timezone.make_aware(moment, dt_timezone.utc)
+        return moment
+
+    def get_time_range(self, query_params):
+        """ The [start, end) range of the request; defaults to the last WEATHER_HISTORY_DEFAULT_DAYS days """
+        end = query_params.get('end')
+        end = self.parse_time(end, 'end') if end else timezone.now()
+        start = query_params.get('start')
+        start = self.parse_time(start, 'start') if start else end - timedelta(days=settings.WEATHER_HISTORY_DEFAULT_DAYS)
+        if start >= end:
+            raise ValueError("start must be before end")
+        return start, end
 
-            city_name, country = self.extract_location_info(data)
-            forecast_info = self.extract_forecast_info(data, city_name, country)
-            next_7_days_forecast = self.filter_forecast_for_next_7_days(forecast_info)
 
-            response_data = {
-                "current_weather_data": current_weather_data,
-                "next_7_days_forecast": next_7_days_forecast
-            }
+class WeatherCurrentForecastView(WeatherCurrentView):
+    """ GET the current weather and forecast for the next 7 days based on the user's IP address """
 
-            return Response(response_data, status=status.HTTP_200_OK)
+    def get(self, request):
+        location = resolve_location(self.get_client_ip(request))
 
+        if not location:
+            return Response({"detail": "Unable to determine user location."},
+                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        latitude, longitude = location
+
+        try:
+            # The forecast only needs the coordinates, so it runs alongside the current weather call
+            forecast_future = upstream.submit(self.get_7_days_forecast, latitude, longitude)
+            current_weather_data = self.get_current_weather(latitude, longitude)
+            next_7_days_forecast = forecast_future.result()
+        except UpstreamRateLimited as e:
+            return self.rate_limited_response(e)
         except Exception as e:
             error_message = f"Error retrieving forecast data: {str(e)}"
             return Response({"error": error_message}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        response_data = {
+            "current_weather_data": current_weather_data,
+            "next_7_days_forecast": next_7_days_forecast
+        }
+
+        return Response(response_data, status=status.HTTP_200_OK)
+
+    def get_7_days_forecast(self, latitude, longitude):
+        """ Get the weather forecast for the next 7 days by coordinates """
+        base_url = f'{settings.OPENWEATHERMAP_API_URL}/forecast'
+        params = {
+            'lat': latitude,
+            'lon': longitude,
+            'appid': settings.OPENWEATHERMAP_API_KEY,
+            'units': 'metric',
+        }
+
+        data = self.get_weather_data(base_url, params)
+
+        return self.get_next_7_days_forecast(data)
+
+
+class WeatherLocationsView(APIView):
+    """ GET the most populous cities whose name starts with ?prefix=, answered from the local location index """
+    authentication_classes = [WeatherJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    throttle_classes = [LocationsUserRateThrottle]
+
+    def get(self, request):
+        prefix = request.query_params.get('prefix', '')
+
+        if not normalize_query(prefix):
+            return Response({"detail": "Please provide a city name prefix"}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = int(request.query_params.get('limit', settings.WEATHER_LOCATIONS_LIMIT))
+        except ValueError:
+            return Response({"detail": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        limit = min(max(limit, 1), settings.WEATHER_LOCATIONS_MAX_LIMIT)
+
+        results = [location._asdict() for location in location_index.complete(prefix, limit)]
+
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+
+class WeatherQuotaView(APIView):
+    """ GET the OpenWeatherMap quota counters and response cache statistics (admins only) """
+    permission_classes = [IsAdminUser]
+
+    @staticmethod
+    def get(request):
+        return Response({"quota": upstream_limiter.stats(), "cache": weather_cache.stats()}, status=status.HTTP_200_OK)
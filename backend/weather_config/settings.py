@@ -51,6 +51,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so that its timings cover every other middleware
+    'weather_api.instrumentation.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -63,10 +65,28 @@ AUTH_USER_MODEL = 'clients.CustomUser'
 
 ROOT_URLCONF = 'weather_config.urls'
 
+# orjson-backed JSON rendering and parsing (stdlib json when orjson is not installed)
+FAST_JSON = int(os.getenv('FAST_JSON', 1))
+
 REST_FRAMEWORK = {
+    # The browsable API is only rendered in development
+    'DEFAULT_RENDERER_CLASSES': [
+        'weather_api.renderers.FastJSONRenderer' if FAST_JSON else 'rest_framework.renderers.JSONRenderer',
+    ] + (['rest_framework.renderers.BrowsableAPIRenderer'] if DEBUG else []),
+    'DEFAULT_PARSER_CLASSES': [
+        'weather_api.parsers.FastJSONParser' if FAST_JSON else 'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'weather_api.authentication.TimedJWTAuthentication',
     ],
+    'DEFAULT_THROTTLE_RATES': {
+        # Per-user limit on the weather endpoints
+        'weather': os.getenv('WEATHER_USER_RATE', '120/min'),
+        # Autocomplete is answered in process, so it gets a far higher limit
+        'locations': os.getenv('WEATHER_LOCATIONS_USER_RATE', '1200/min'),
+    },
 }
 
 TEMPLATES = [
@@ -101,6 +121,19 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'weather': {
+        'BACKEND': os.getenv('WEATHER_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('WEATHER_CACHE_LOCATION', 'weather'),
+    },
+}
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -119,6 +152,27 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Preferred password hasher: 'pbkdf2', 'scrypt', 'argon2' (needs argon2-cffi) or 'bcrypt' (needs bcrypt).
+# The others still verify existing hashes, which are re-encoded with the preferred one on the next login.
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_HASHER_CLASSES = {
+    'pbkdf2': 'clients.hashers.PBKDF2PasswordHasher',
+    'scrypt': 'django.contrib.auth.hashers.ScryptPasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'bcrypt': 'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+}
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+] + ['django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher']
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv('PASSWORD_PBKDF2_ITERATIONS', 600000))
+# Processes hashing passwords for logins and user writes (0 hashes on the request thread), and hashes that
+# may queue per web worker before callers wait up to PASSWORD_HASH_QUEUE_TIMEOUT seconds and then get a 503
+PASSWORD_HASH_WORKERS = int(os.getenv('PASSWORD_HASH_WORKERS', 2))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv('PASSWORD_HASH_MAX_PENDING', 32))
+PASSWORD_HASH_QUEUE_TIMEOUT = float(os.getenv('PASSWORD_HASH_QUEUE_TIMEOUT', 5))
+
+AUTHENTICATION_BACKENDS = ['clients.backends.PooledPasswordBackend']
+
 # Internationalization
 # https://docs.djangoproject.com/en/4.2/topics/i18n/
 
@@ -179,3 +233,113 @@ SIMPLE_JWT = {
 # stormglass API key
 OPENWEATHERMAP_URL = os.getenv("OPENWEATHERMAP_URL")
 OPENWEATHERMAP_API_KEY = os.getenv('OPENWEATHERMAP_API_KEY')
+OPENWEATHERMAP_API_URL = os.getenv('OPENWEATHERMAP_API_URL', 'https://api.openweathermap.org/data/2.5')
+IPINFO_API_URL = os.getenv('IPINFO_API_URL', 'https://ipinfo.io')
+
+# Upstream HTTP client (shared keep-alive pool)
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv('UPSTREAM_CONNECT_TIMEOUT', 3.05))
+UPSTREAM_READ_TIMEOUT = float(os.getenv('UPSTREAM_READ_TIMEOUT', 10))
+UPSTREAM_POOL_CONNECTIONS = int(os.getenv('UPSTREAM_POOL_CONNECTIONS', 4))
+UPSTREAM_POOL_MAXSIZE = int(os.getenv('UPSTREAM_POOL_MAXSIZE', 32))
+UPSTREAM_POOL_BLOCK = bool(int(os.getenv('UPSTREAM_POOL_BLOCK', 0)))
+# Retries of failed upstream GETs (transport errors, 5xx, 429) with jittered exponential backoff
+UPSTREAM_RETRIES = int(os.getenv('UPSTREAM_RETRIES', 2))
+UPSTREAM_RETRY_BACKOFF = float(os.getenv('UPSTREAM_RETRY_BACKOFF', 0.2))
+UPSTREAM_RETRY_BACKOFF_MAX = float(os.getenv('UPSTREAM_RETRY_BACKOFF_MAX', 2))
+# Per-host circuit breaker: consecutive failures before opening, seconds before a half-open probe
+UPSTREAM_BREAKER_THRESHOLD = int(os.getenv('UPSTREAM_BREAKER_THRESHOLD', 5))
+UPSTREAM_BREAKER_RESET_TIMEOUT = int(os.getenv('UPSTREAM_BREAKER_RESET_TIMEOUT', 30))
+# Threads used to run independent upstream calls of one request concurrently
+UPSTREAM_FANOUT_WORKERS = int(os.getenv('UPSTREAM_FANOUT_WORKERS', 16))
+
+# Upstream response cache (TTL in seconds per OpenWeatherMap endpoint)
+WEATHER_CACHE_TTLS = {
+    'weather': int(os.getenv('WEATHER_CACHE_TTL_CURRENT', 600)),
+    'forecast': int(os.getenv('WEATHER_CACHE_TTL_FORECAST', 10800)),
+}
+WEATHER_CACHE_MAXSIZE = int(os.getenv('WEATHER_CACHE_MAXSIZE', 2048))
+# Alias from CACHES used as the shared tier; empty disables it
+WEATHER_CACHE_SHARED_ALIAS = os.getenv('WEATHER_CACHE_SHARED_ALIAS', '')
+# Seconds an expired entry is still served while one background refresh runs
+WEATHER_CACHE_STALE_TTL = int(os.getenv('WEATHER_CACHE_STALE_TTL', 300))
+# Coalesce misses across workers with a short lock in the shared tier
+WEATHER_CACHE_DISTRIBUTED_LOCK = bool(int(os.getenv('WEATHER_CACHE_DISTRIBUTED_LOCK', 0)))
+WEATHER_CACHE_LOCK_TIMEOUT = int(os.getenv('WEATHER_CACHE_LOCK_TIMEOUT', 10))
+
+# Client IP geolocation: providers are tried in order until one resolves the IP
+WEATHER_GEOIP_DATABASE = os.getenv('WEATHER_GEOIP_DATABASE', '')
+WEATHER_GEOIP_PROVIDERS = (
+    ['weather_api.geolocation.RangeDatabaseProvider'] if WEATHER_GEOIP_DATABASE else []
+) + ['weather_api.geolocation.IpinfoProvider']
+WEATHER_GEOIP_CACHE_TTL = int(os.getenv('WEATHER_GEOIP_CACHE_TTL', 86400))
+WEATHER_GEOIP_NEGATIVE_TTL = int(os.getenv('WEATHER_GEOIP_NEGATIVE_TTL', 3600))
+WEATHER_GEOIP_CACHE_MAXSIZE = int(os.getenv('WEATHER_GEOIP_CACHE_MAXSIZE', 10000))
+# Share one cache entry per /24 (IPv4) or /48 (IPv6) network instead of per address
+WEATHER_GEOIP_CACHE_BY_PREFIX = bool(int(os.getenv('WEATHER_GEOIP_CACHE_BY_PREFIX', 0)))
+
+# Batch weather endpoint
+WEATHER_BATCH_MAX_QUERIES = int(os.getenv('WEATHER_BATCH_MAX_QUERIES', 500))
+# Upstream calls in flight per batch request for cache misses
+WEATHER_BATCH_CONCURRENCY = int(os.getenv('WEATHER_BATCH_CONCURRENCY', 10))
+
+# Hot query tracking and pre-warming (manage.py prewarm_weather)
+WEATHER_HOT_QUERIES_HALF_LIFE = int(os.getenv('WEATHER_HOT_QUERIES_HALF_LIFE', 3600))
+WEATHER_HOT_QUERIES_CAPACITY = int(os.getenv('WEATHER_HOT_QUERIES_CAPACITY', 1000))
+WEATHER_HOT_QUERIES_FLUSH_INTERVAL = int(os.getenv('WEATHER_HOT_QUERIES_FLUSH_INTERVAL', 30))
+WEATHER_HOT_QUERIES_CACHE_ALIAS = os.getenv('WEATHER_HOT_QUERIES_CACHE_ALIAS', 'weather')
+WEATHER_PREWARM_TOP = int(os.getenv('WEATHER_PREWARM_TOP', 300))
+# Refresh entries this many seconds before they go stale
+WEATHER_PREWARM_LEAD_TIME = int(os.getenv('WEATHER_PREWARM_LEAD_TIME', 120))
+# Upstream calls per minute the pre-warmer may spend
+WEATHER_PREWARM_CALLS_PER_MINUTE = int(os.getenv('WEATHER_PREWARM_CALLS_PER_MINUTE', 30))
+
+# OpenWeatherMap call budget shared by the API key
+OPENWEATHERMAP_CALLS_PER_MINUTE = int(os.getenv('OPENWEATHERMAP_CALLS_PER_MINUTE', 60))
+# 'local' gives every process its own token bucket, 'shared' counts calls of all workers in the cache
+WEATHER_RATE_LIMIT_MODE = os.getenv('WEATHER_RATE_LIMIT_MODE', 'local')
+WEATHER_RATE_LIMIT_CACHE_ALIAS = os.getenv('WEATHER_RATE_LIMIT_CACHE_ALIAS', 'weather')
+WEATHER_RATE_LIMIT_BURST = int(os.getenv('WEATHER_RATE_LIMIT_BURST', 10))
+# Seconds a request may queue for budget before failing
+WEATHER_RATE_LIMIT_MAX_WAIT = float(os.getenv('WEATHER_RATE_LIMIT_MAX_WAIT', 2))
+
+# Observation store: persist fetched weather (one synchronous write per cache miss, so off by default; the history
+# endpoint only has data while it is on) and optionally answer from it while it is fresh
+WEATHER_STORE_OBSERVATIONS = bool(int(os.getenv('WEATHER_STORE_OBSERVATIONS', 0)))
+WEATHER_STORE_READ_THROUGH = bool(int(os.getenv('WEATHER_STORE_READ_THROUGH', 0)))
+
+# User list: keyset page sizes and the chunk size of the admin export (?stream=1)
+USERS_PAGE_SIZE = int(os.getenv('USERS_PAGE_SIZE', 100))
+USERS_MAX_PAGE_SIZE = int(os.getenv('USERS_MAX_PAGE_SIZE', 1000))
+USERS_EXPORT_CHUNK_SIZE = int(os.getenv('USERS_EXPORT_CHUNK_SIZE', 2000))
+
+# History endpoint: keyset page sizes, default range and streaming chunk size
+WEATHER_HISTORY_PAGE_SIZE = int(os.getenv('WEATHER_HISTORY_PAGE_SIZE', 500))
+WEATHER_HISTORY_MAX_PAGE_SIZE = int(os.getenv('WEATHER_HISTORY_MAX_PAGE_SIZE', 5000))
+WEATHER_HISTORY_DEFAULT_DAYS = int(os.getenv('WEATHER_HISTORY_DEFAULT_DAYS', 7))
+WEATHER_HISTORY_CHUNK_SIZE = int(os.getenv('WEATHER_HISTORY_CHUNK_SIZE', 2000))
+
+# Location index: bundled city list used to canonicalize city queries and for autocomplete (empty disables it).
+# A packed file built with `manage.py build_location_index` is memory-mapped and shared by all workers.
+WEATHER_LOCATIONS_FILE = os.getenv('WEATHER_LOCATIONS_FILE', os.path.join(BASE_DIR, 'weather_api', 'data', 'cities.csv'))
+WEATHER_LOCATIONS_LIMIT = int(os.getenv('WEATHER_LOCATIONS_LIMIT', 10))
+WEATHER_LOCATIONS_MAX_LIMIT = int(os.getenv('WEATHER_LOCATIONS_MAX_LIMIT', 50))
+
+# Weather views trust a valid access token without loading its user (TokenUser); verified tokens are
+# cached in process for at most WEATHER_AUTH_CACHE_TTL seconds. User and admin endpoints always hit the database.
+WEATHER_STATELESS_AUTH = bool(int(os.getenv('WEATHER_STATELESS_AUTH', 0)))
+WEATHER_AUTH_CACHE_TTL = int(os.getenv('WEATHER_AUTH_CACHE_TTL', 300))
+WEATHER_AUTH_CACHE_MAXSIZE = int(os.getenv('WEATHER_AUTH_CACHE_MAXSIZE', 10000))
+
+# Cache-Control scope of weather responses: 'private' (browsers only) or 'public' to let a CDN share them
+WEATHER_CACHE_CONTROL = os.getenv('WEATHER_CACHE_CONTROL', 'private')
+
+# Per-phase timings (auth, db, upstream, render...) in a Server-Timing response header, visible to every client and
+# so off by default; histograms are kept regardless
+SERVER_TIMING = int(os.getenv('SERVER_TIMING', 0))
+
+# Bearer token that lets a scrape of /metrics through
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+# Comma-separated networks (e.g. 10.0.0.0/8) whose REMOTE_ADDR may scrape /metrics without the token; with neither
+# this nor METRICS_TOKEN set, every scrape is refused
+METRICS_ALLOWED_NETWORKS = [network.strip() for network in os.getenv('METRICS_ALLOWED_NETWORKS', '').split(',')
+                            if network.strip()]
@@ -18,6 +18,8 @@ from django.contrib import admin
 from django.urls import path, include
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
+from weather_api.metrics import metrics_view
+
 urlpatterns = [
     # Admin panel
     path('admin/', admin.site.urls),
@@ -34,4 +36,7 @@ urlpatterns = [
     # JWT TOKEN
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+
+    # Prometheus scrape endpoint
+    path('metrics', metrics_view, name='metrics'),
 ]